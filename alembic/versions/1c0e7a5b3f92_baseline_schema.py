@@ -0,0 +1,167 @@
+"""Baseline schema
+
+Revision ID: 1c0e7a5b3f92
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+The schema of the models before the first migration. Databases created before this revision
+(from the models) already have it and are stamped instead: `alembic stamp 1c0e7a5b3f92`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '1c0e7a5b3f92'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('customers',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('subdomain', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('contact_email', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=True),
+    sa.Column('contact_phone', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=True),
+    sa.Column('address', sqlmodel.sql.sqltypes.AutoString(length=200), nullable=True),
+    sa.Column('city', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=True),
+    sa.Column('country', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=True),
+    sa.Column('description', sqlmodel.sql.sqltypes.AutoString(length=140), nullable=True),
+    sa.Column('observation', sqlmodel.sql.sqltypes.AutoString(length=140), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('source_system', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name', name='uq_customer_name'),
+    sa.UniqueConstraint('subdomain', name='uq_customer_subdomain')
+    )
+    op.create_table('users',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('email', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('phone', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('is_superuser', sa.Boolean(), nullable=False),
+    sa.Column('superuser_role', sa.Enum('ADMIN', 'STAFF', name='superuserrole'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email', name='uq_user_email')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_table('campaigns',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('customer_id', sa.Uuid(), nullable=False),
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('announcer', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('description', sqlmodel.sql.sqltypes.AutoString(length=140), nullable=True),
+    sa.Column('budget', sa.Float(), nullable=True),
+    sa.Column('budget_currency', sqlmodel.sql.sqltypes.AutoString(length=4), nullable=True),
+    sa.Column('city', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=True),
+    sa.Column('country', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=True),
+    sa.Column('target_gender', sa.Enum('MALE', 'FEMALE', 'BOTH', name='campaigntargetgender'), nullable=False),
+    sa.Column('target_age_min', sa.Integer(), nullable=False),
+    sa.Column('target_age_max', sa.Integer(), nullable=False),
+    sa.Column('target_audience_size', sa.Integer(), nullable=False),
+    sa.Column('start_date', sa.DateTime(), nullable=False),
+    sa.Column('end_date', sa.DateTime(), nullable=True),
+    sa.Column('observation', sqlmodel.sql.sqltypes.AutoString(length=140), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('last_seen_at', sa.DateTime(), nullable=False),
+    sa.Column('source_system', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=True),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name', 'customer_id', name='uq_campaign_name')
+    )
+    op.create_index('ix_campaign_customer_id', 'campaigns', ['customer_id'], unique=False)
+    op.create_index(op.f('ix_campaigns_customer_id'), 'campaigns', ['customer_id'], unique=False)
+    op.create_index(op.f('ix_campaigns_name'), 'campaigns', ['name'], unique=False)
+    op.create_table('customer_access_keys',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('key', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+    sa.Column('customer_id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_customer_access_keys_customer_id'), 'customer_access_keys', ['customer_id'], unique=False)
+    op.create_index(op.f('ix_customer_access_keys_key'), 'customer_access_keys', ['key'], unique=True)
+    op.create_table('user_customer_links',
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('customer_id', sa.Uuid(), nullable=False),
+    sa.Column('role', sa.Enum('MANAGER', 'ANALYST', 'OPERATION', 'VISITOR', name='userrole'), nullable=True),
+    sa.Column('campaign_ids', postgresql.ARRAY(postgresql.UUID()), nullable=True),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'customer_id'),
+    sa.UniqueConstraint('user_id', 'customer_id', name='uq_user_customer')
+    )
+    op.create_table('user_sessions',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('refresh_token', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_used', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('is_revoked', sa.Boolean(), nullable=False),
+    sa.Column('magic_link_token', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('magic_link_requested_at', sa.DateTime(), nullable=True),
+    sa.Column('magic_link_expires_at', sa.DateTime(), nullable=True),
+    sa.Column('magic_link_used_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('campaign_advertisements',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('campaign_id', sa.Uuid(), nullable=False),
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('description', sqlmodel.sql.sqltypes.AutoString(length=140), nullable=True),
+    sa.Column('budget', sa.Float(), nullable=True),
+    sa.Column('target_gender', sa.Enum('MALE', 'FEMALE', 'BOTH', name='campaigntargetgender'), nullable=True),
+    sa.Column('target_age_min', sa.Integer(), nullable=True),
+    sa.Column('target_age_max', sa.Integer(), nullable=True),
+    sa.Column('start_date', sa.DateTime(), nullable=True),
+    sa.Column('end_date', sa.DateTime(), nullable=True),
+    sa.Column('observation', sqlmodel.sql.sqltypes.AutoString(length=140), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('source_system', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=True),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name', 'campaign_id', name='uq_advertisement_name')
+    )
+    op.create_index('ix_advertisement_campaign_id', 'campaign_advertisements', ['campaign_id'], unique=False)
+    op.create_index(op.f('ix_campaign_advertisements_campaign_id'), 'campaign_advertisements', ['campaign_id'], unique=False)
+    op.create_index(op.f('ix_campaign_advertisements_name'), 'campaign_advertisements', ['name'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_campaign_advertisements_name'), table_name='campaign_advertisements')
+    op.drop_index(op.f('ix_campaign_advertisements_campaign_id'), table_name='campaign_advertisements')
+    op.drop_index('ix_advertisement_campaign_id', table_name='campaign_advertisements')
+    op.drop_table('campaign_advertisements')
+    op.drop_table('user_sessions')
+    op.drop_table('user_customer_links')
+    op.drop_index(op.f('ix_customer_access_keys_key'), table_name='customer_access_keys')
+    op.drop_index(op.f('ix_customer_access_keys_customer_id'), table_name='customer_access_keys')
+    op.drop_table('customer_access_keys')
+    op.drop_index(op.f('ix_campaigns_name'), table_name='campaigns')
+    op.drop_index(op.f('ix_campaigns_customer_id'), table_name='campaigns')
+    op.drop_index('ix_campaign_customer_id', table_name='campaigns')
+    op.drop_table('campaigns')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_table('customers')
+    sa.Enum(name="campaigntargetgender").drop(op.get_bind(), checkfirst=False)
+    sa.Enum(name="userrole").drop(op.get_bind(), checkfirst=False)
+    sa.Enum(name="superuserrole").drop(op.get_bind(), checkfirst=False)
@@ -0,0 +1,39 @@
+"""Add campaign pagination index
+
+Revision ID: 3a9d6f2b8c17
+Revises: 7f3d9c1a5e2b
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '3a9d6f2b8c17'
+down_revision = '7f3d9c1a5e2b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Built concurrently, campaigns are read by every campaign list request
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_campaign_customer_id_created_at_id",
+            "campaigns",
+            ["customer_id", "created_at", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_campaign_customer_id_created_at_id",
+            table_name="campaigns",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,35 @@
+"""Add user session revocations
+
+Revision ID: 4c8e2a6f1b3d
+Revises: 9b1f3c2d7e4a
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '4c8e2a6f1b3d'
+down_revision = '9b1f3c2d7e4a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "user_session_revocations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("session_id", sa.Uuid(), nullable=False),
+        sa.Column("revoked_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_user_session_revocations_revoked_at"), "user_session_revocations", ["revoked_at"], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f("ix_user_session_revocations_revoked_at"), table_name="user_session_revocations")
+    op.drop_table("user_session_revocations")
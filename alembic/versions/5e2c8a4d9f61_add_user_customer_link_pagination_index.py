@@ -0,0 +1,40 @@
+"""Add user customer link pagination index
+
+Revision ID: 5e2c8a4d9f61
+Revises: 3a9d6f2b8c17
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2c8a4d9f61'
+down_revision = '3a9d6f2b8c17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Built concurrently, user_customer_links is read by every role check
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_user_customer_link_customer_id_created_at",
+            "user_customer_links",
+            ["customer_id", "created_at", "user_id"],
+            postgresql_include=["role", "status", "campaign_ids", "updated_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_user_customer_link_customer_id_created_at",
+            table_name="user_customer_links",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,30 @@
+"""Hash user session magic link tokens
+
+Revision ID: 7f3d9c1a5e2b
+Revises: d2a7b5e9c1f4
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '7f3d9c1a5e2b'
+down_revision = 'd2a7b5e9c1f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Pending links use the previous token format and can't be redeemed anymore, they aren't carried over
+    op.add_column("user_sessions", sa.Column("magic_link_token_hash", sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True))
+    op.create_index(op.f("ix_user_sessions_magic_link_token_hash"), "user_sessions", ["magic_link_token_hash"], unique=True)
+    op.drop_column("user_sessions", "magic_link_token")
+
+
+def downgrade():
+    op.add_column("user_sessions", sa.Column("magic_link_token", sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.drop_index(op.f("ix_user_sessions_magic_link_token_hash"), table_name="user_sessions")
+    op.drop_column("user_sessions", "magic_link_token_hash")
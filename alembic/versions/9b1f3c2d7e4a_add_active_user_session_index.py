@@ -0,0 +1,40 @@
+"""Add active user session index
+
+Revision ID: 9b1f3c2d7e4a
+Revises: 1c0e7a5b3f92
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '9b1f3c2d7e4a'
+down_revision = '1c0e7a5b3f92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Built concurrently, user_sessions is read on every authenticated request
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_user_session_active_user_id",
+            "user_sessions",
+            ["user_id", "expires_at"],
+            postgresql_where=sa.text("NOT is_revoked"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_user_session_active_user_id",
+            table_name="user_sessions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,48 @@
+"""Hash user session refresh tokens
+
+Revision ID: d2a7b5e9c1f4
+Revises: 4c8e2a6f1b3d
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7b5e9c1f4'
+down_revision = '4c8e2a6f1b3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("user_sessions", sa.Column("refresh_token_hash", sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True))
+    op.execute("UPDATE user_sessions SET refresh_token_hash = encode(sha256(convert_to(refresh_token, 'UTF8')), 'hex')")
+
+    # Identical tokens (same user and second) can't share the unique hash, the older copies are revoked
+    op.execute("""
+        UPDATE user_sessions
+        SET is_revoked = true, refresh_token_hash = encode(sha256(convert_to(refresh_token || id::text, 'UTF8')), 'hex')
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (PARTITION BY refresh_token_hash ORDER BY created_at DESC) AS position
+                FROM user_sessions
+            ) AS duplicates
+            WHERE position > 1
+        )
+    """)
+
+    op.alter_column("user_sessions", "refresh_token_hash", nullable=False)
+    op.create_index(op.f("ix_user_sessions_refresh_token_hash"), "user_sessions", ["refresh_token_hash"], unique=True)
+    op.drop_column("user_sessions", "refresh_token")
+
+
+def downgrade():
+    # Raw tokens can't be restored from their hashes, every session has to sign in again
+    op.add_column("user_sessions", sa.Column("refresh_token", sqlmodel.sql.sqltypes.AutoString(), nullable=False, server_default=""))
+    op.alter_column("user_sessions", "refresh_token", server_default=None)
+    op.execute("UPDATE user_sessions SET is_revoked = true")
+    op.drop_index(op.f("ix_user_sessions_refresh_token_hash"), table_name="user_sessions")
+    op.drop_column("user_sessions", "refresh_token_hash")
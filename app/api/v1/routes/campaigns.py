@@ -1,58 +1,154 @@
+from datetime import datetime
 from typing import List
+from uuid import UUID
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
+from pydantic import TypeAdapter
 from sqlalchemy.exc import IntegrityError
-
-from app.core.deps import UserAnalystRole, UserVisitorRole, SessionDep
-from app.crud import campaign as crud
-from app.crud.customer import get_customer_by_subdomain
-from app.validators.campaigns import validate_create_campaign_input, validate_update_campaign_input
-from app.models import UserRole
-from app.schemas.campaigns import CampaignResponse, CreateCampaign, UpdateCampaign
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.conditional import collection_etag, make_etag, is_not_modified, not_modified_response, set_validators
+from app.core.response_cache import response_cache, tenant_scope
+from app.core.deps import UserAnalystRole, UserVisitorRole, AsyncSessionDep, ReadSessionDep, PaginationDep
+from app.crud.aio import campaign as crud
+from app.validators.campaigns import validate_create_campaign_input, validate_update_campaign_input, validate_advertisement_input
+from app.schemas.campaigns import (
+    CampaignResponse,
+    CreateCampaign,
+    UpdateCampaign,
+    AdvertisementResponse,
+    CreateAdvertisement,
+    UpdateAdvertisement,
+    BulkUpdateAdvertisements,
+)
 from app.schemas import Message
 from app.exceptions import campaigns as CampaignExceptions
 from app.services.monitoring import logger
 
 router = APIRouter()
 
+campaign_list_adapter = TypeAdapter(List[CampaignResponse])
+
 
 @router.get("/{customer_subdomain}", response_model=List[CampaignResponse])
-def retrieve_campaigns(
-    session: SessionDep,
+async def retrieve_campaigns(
+    session: ReadSessionDep,
     customer_subdomain: str,
-    current_user: UserVisitorRole
+    tenant: UserVisitorRole,
+    pagination: PaginationDep,
+    request: Request,
+    response: Response
 ) -> List[CampaignResponse]:
     """
-    Retrieve a list of campaigns for a given customer.
+    Retrieve a list of campaigns for a given customer, newest first.
 
     **Access:** Manager, Analyst, and some Visitor roles.
 
     **Args:**
     - `customer_subdomain (str)`: The subdomain of the customer whose campaigns are to be retrieved.
+    - `limit (int, optional)`: The page size. Without a limit or a cursor, every campaign is returned.
+    - `cursor (str, optional)`: The `X-Next-Cursor` header of the previous page.
+    - `count (str, optional)`: `exact` or `estimated`, to get the number of campaigns in the `X-Total-Count` header.
+
+    The response has an `ETag` header, requests with a matching `If-None-Match` header get a `304 Not Modified` response.
+
+    Responses are cached by tenant, role and visible campaigns when the response cache is enabled.
 
     **Returns:**
     - `List[CampaignResponse]`: A list of campaigns associated with the customer.
     """
 
-    # Get customer
-    customer = get_customer_by_subdomain(session=session, customer_subdomain=customer_subdomain)
+    visible_campaign_ids = sorted(map(str, tenant.campaign_ids)) if tenant.campaign_ids is not None else None
+
+    async def load() -> List[CampaignResponse]:
+        # Revalidation: conditional and paginated requests read the list validator first, and
+        # get a 304 without reading the campaigns when it matches
+        scope = (tenant.customer.id, visible_campaign_ids, pagination.limit, pagination.cursor)
+        etag = None
+        if request.headers.get("if-none-match") is not None or pagination.limit:
+            count, last_modified = await crud.retrieve_customer_campaigns_version(session=session, customer_id=tenant.customer.id, campaign_ids=tenant.campaign_ids)
+            etag = collection_etag(*scope, count=count, last_modified=last_modified)
+            if is_not_modified(request, etag):
+                return not_modified_response(etag)
+
+        # Get the campaigns of the customer (visitors only read the ones they were given access to)
+        campaigns = await crud.retrieve_customer_campaign_responses(
+            session=session,
+            customer_id=tenant.customer.id,
+            campaign_ids=tenant.campaign_ids,
+            limit=pagination.fetch_limit,
+            after=pagination.position(datetime.fromisoformat, UUID),
+        )
+        if etag is None:
+            # The whole list was read, its validator comes from the campaigns themselves
+            etag = collection_etag(*scope, count=len(campaigns), last_modified=max((campaign.updated_at for campaign in campaigns), default=None))
+        set_validators(response, etag)
+        campaigns = pagination.page(campaigns, key=lambda campaign: (campaign.created_at, campaign.id), response=response)
+
+        if pagination.count:
+            response.headers["X-Total-Count"] = str(await crud.count_customer_campaigns(session=session, customer_id=tenant.customer.id, campaign_ids=tenant.campaign_ids, mode=pagination.count))
+
+        return campaigns
+
+    return await response_cache.respond(
+        request,
+        response,
+        scope=tenant_scope(tenant.customer.id),
+        variant=(tenant.role, visible_campaign_ids),
+        adapter=campaign_list_adapter,
+        load=load,
+    )
+
+
+@router.get("/{customer_subdomain}/{campaign_id}", response_model=CampaignResponse)
+async def retrieve_campaign(
+    session: ReadSessionDep,
+    request: Request,
+    response: Response,
+    customer_subdomain: str,
+    tenant: UserVisitorRole,
+    campaign_id: UUID
+) -> CampaignResponse:
+    """
+    Retrieve a campaign with its advertisements.
+
+    The response has `ETag` and `Last-Modified` headers, requests with a matching `If-None-Match`
+    or `If-Modified-Since` header get a `304 Not Modified` response.
+
+    **Access:** Manager, Analyst, and some Visitor roles.
+
+    **Args:**
+    - `customer_subdomain (str)`: The subdomain of the customer.
+    - `campaign_id (UUID)`: The id of the campaign.
+
+    **Returns:**
+    - `CampaignResponse`: The campaign.
+    """
+
+    # Visitors only read the campaigns they were given access to
+    if tenant.campaign_ids is not None and campaign_id not in tenant.campaign_ids:
+        raise CampaignExceptions.CampaignNotAllowedException()
 
-    # Get all campaigns of the customer
-    campaigns = crud.retrieve_customer_campaigns(session=session, customer_id=customer.id)
+    campaign = await crud.retrieve_campaign_by_id(session=session, customer_id=tenant.customer.id, campaign_id=campaign_id, with_advertisements=False)
+    if not campaign:
+        raise CampaignExceptions.CampaignNotFoundException()
 
-    # Filter campaigns for visitor role
-    if hasattr(current_user, 'role') and current_user.role == UserRole.VISITOR:
-        campaigns = [campaign for campaign in campaigns if current_user.campaign_ids and campaign.id in current_user.campaign_ids]
+    # Revalidation, before the advertisements are read
+    etag = make_etag(campaign.id, campaign.updated_at.isoformat())
+    if is_not_modified(request, etag, campaign.updated_at):
+        return not_modified_response(etag, campaign.updated_at)
+    set_validators(response, etag, campaign.updated_at)
 
-    return [CampaignResponse.model_validate(campaign) for campaign in campaigns]
+    advertisements = await crud.retrieve_campaign_advertisements(session=session, campaign_id=campaign.id)
+    return CampaignResponse.model_validate({**campaign.model_dump(), "advertisements": advertisements})
 
 
 @router.post("/{customer_subdomain}", response_model=CampaignResponse)
-def create_campaign(
-    session: SessionDep,
+async def create_campaign(
+    session: AsyncSessionDep,
     campaign_input: CreateCampaign,
     customer_subdomain: str,
-    current_user: UserAnalystRole
+    tenant: UserAnalystRole
 ) -> CampaignResponse:
     """
     Create a new campaign for a specified customer.
@@ -67,16 +163,14 @@ def create_campaign(
     - `CampaignResponse`: The newly created campaign.
     """
 
-    # Get customer
-    customer = get_customer_by_subdomain(session=session, customer_subdomain=customer_subdomain)
+    customer = tenant.customer
 
     # Validate campaign input
-    validate_create_campaign_input(session=session, campaign_input=campaign_input, customer=customer)
+    await validate_create_campaign_input(session=session, campaign_input=campaign_input, customer=customer)
         
     # Create a new campaign
     try:
-        campaign = crud.create_campaign(session=session, campaign_input=campaign_input, customer=customer, source_system="Created by user")
-        return CampaignResponse.model_validate(campaign)
+        campaign = await crud.create_campaign(session=session, campaign_input=campaign_input, customer=customer, source_system="Created by user")
     
     except IntegrityError as e:
         if "duplicate key value violates unique constraint" in str(e):
@@ -87,13 +181,16 @@ def create_campaign(
         logger.error(e)
         raise CampaignExceptions.CouldNotCreateCampaignException()
 
+    await response_cache.invalidate(tenant_scope(customer.id))
+    return CampaignResponse.model_validate(campaign)
+
 
 @router.put("/{customer_subdomain}/{campaign_id}", response_model=CampaignResponse)
-def update_campaign(
-    session: SessionDep,
+async def update_campaign(
+    session: AsyncSessionDep,
     campaign_input: UpdateCampaign,
     customer_subdomain: str,
-    current_user: UserAnalystRole,
+    tenant: UserAnalystRole,
     campaign_id: str
 ) -> CampaignResponse:
     """
@@ -110,26 +207,28 @@ def update_campaign(
     - `CampaignResponse`: The edited campaign.
     """
 
-    # Get customer
-    customer = get_customer_by_subdomain(session=session, customer_subdomain=customer_subdomain)
+    customer = tenant.customer
 
-    # Get the campaign object
-    campaign = crud.retrieve_campaign_by_id(session=session, customer_id=customer.id, campaign_id=campaign_id)
+    # Get the campaign object (its advertisements are replaced without being loaded)
+    campaign = await crud.retrieve_campaign_by_id(session=session, customer_id=customer.id, campaign_id=campaign_id, with_advertisements=False)
     
     # Validate campaign input
     validate_update_campaign_input(session=session, campaign_input=campaign_input, customer=customer, campaign=campaign)
 
     # Update campaign
-    campaign = crud.update_campaign(session=session, campaign=campaign, campaign_input=campaign_input)
+    campaign = await crud.update_campaign(session=session, campaign=campaign, campaign_input=campaign_input)
+    if not campaign:
+        raise CampaignExceptions.CampaignNotFoundException()
+    await response_cache.invalidate(tenant_scope(customer.id))
   
     return campaign
 
 
 @router.delete("/{customer_subdomain}/{campaign_id}", response_model=Message)
-def delete_campaign(
-    session: SessionDep,
+async def delete_campaign(
+    session: AsyncSessionDep,
     customer_subdomain: str,
-    current_user: UserAnalystRole,
+    tenant: UserAnalystRole,
     campaign_id: str
 ) -> Message:
     """
@@ -145,15 +244,196 @@ def delete_campaign(
     - `Message`: Message contaning the following message: `Campaign deleted successfully`.
     """
 
-    # Get customer
-    customer = get_customer_by_subdomain(session=session, customer_subdomain=customer_subdomain)
+    customer = tenant.customer
 
     # Get the campaign object
-    campaign = crud.retrieve_campaign_by_id(session=session, customer_id=customer.id, campaign_id=campaign_id)
+    campaign = await crud.retrieve_campaign_by_id(session=session, customer_id=customer.id, campaign_id=campaign_id)
     if not campaign:
         raise CampaignExceptions.CampaignNotFoundException()
 
     # Delete campaign
-    crud.delete_campaign(session=session, campaign=campaign)
+    await crud.delete_campaign(session=session, campaign=campaign)
+    await response_cache.invalidate(tenant_scope(customer.id))
 
     return Message(message="Campaign deleted successfully.")
+
+
+# Advertisements
+@router.get("/{customer_subdomain}/{campaign_id}/advertisements", response_model=List[AdvertisementResponse])
+async def retrieve_advertisements(
+    session: ReadSessionDep,
+    customer_subdomain: str,
+    tenant: UserVisitorRole,
+    campaign_id: UUID
+) -> List[AdvertisementResponse]:
+    """
+    Retrieve the advertisements of a campaign.
+
+    **Access:** Manager, Analyst, and some Visitor roles.
+
+    **Args:**
+    - `customer_subdomain (str)`: The subdomain of the customer.
+    - `campaign_id (UUID)`: The id of the campaign.
+
+    **Returns:**
+    - `List[AdvertisementResponse]`: The advertisements of the campaign.
+    """
+
+    # Visitors only read the campaigns they were given access to
+    if tenant.campaign_ids is not None and campaign_id not in tenant.campaign_ids:
+        raise CampaignExceptions.CampaignNotAllowedException()
+
+    await ensure_customer_campaign(session=session, customer_id=tenant.customer.id, campaign_id=campaign_id)
+
+    return await crud.retrieve_campaign_advertisements(session=session, campaign_id=campaign_id)
+
+
+@router.post("/{customer_subdomain}/{campaign_id}/advertisements", response_model=AdvertisementResponse)
+async def create_advertisement(
+    session: AsyncSessionDep,
+    advertisement_input: CreateAdvertisement,
+    customer_subdomain: str,
+    tenant: UserAnalystRole,
+    campaign_id: UUID
+) -> AdvertisementResponse:
+    """
+    Create an advertisement in a campaign.
+
+    **Access:** Manager and Analyst roles.
+
+    **Args:**
+    - `advertisement_input (CreateAdvertisement)`: The advertisement details.
+    - `customer_subdomain (str)`: The subdomain of the customer.
+    - `campaign_id (UUID)`: The id of the campaign.
+
+    **Returns:**
+    - `AdvertisementResponse`: The newly created advertisement.
+    """
+
+    validate_advertisement_input(advertisement_input)
+    await ensure_customer_campaign(session=session, customer_id=tenant.customer.id, campaign_id=campaign_id, touch=True)
+
+    try:
+        advertisement = await crud.create_advertisement(session=session, campaign_id=campaign_id, advertisement_input=advertisement_input)
+    except IntegrityError as e:
+        raise CampaignExceptions.AdvertisementAlreadyExistsException() from e
+    await response_cache.invalidate(tenant_scope(tenant.customer.id))
+
+    return advertisement
+
+
+@router.patch("/{customer_subdomain}/{campaign_id}/advertisements", response_model=List[AdvertisementResponse])
+async def bulk_update_advertisements(
+    session: AsyncSessionDep,
+    advertisements_input: BulkUpdateAdvertisements,
+    customer_subdomain: str,
+    tenant: UserAnalystRole,
+    campaign_id: UUID
+) -> List[AdvertisementResponse]:
+    """
+    Create, update and delete several advertisements of a campaign at once. The other advertisements are left untouched.
+
+    **Access:** Manager and Analyst roles.
+
+    **Args:**
+    - `advertisements_input (BulkUpdateAdvertisements)`: The advertisements to upsert (matched by name) and the ids of the ones to delete.
+    - `customer_subdomain (str)`: The subdomain of the customer.
+    - `campaign_id (UUID)`: The id of the campaign.
+
+    **Returns:**
+    - `List[AdvertisementResponse]`: The created and updated advertisements.
+    """
+
+    for advertisement_input in advertisements_input.upsert:
+        validate_advertisement_input(advertisement_input)
+    await ensure_customer_campaign(session=session, customer_id=tenant.customer.id, campaign_id=campaign_id, touch=True)
+
+    advertisements = await crud.bulk_update_advertisements(
+        session=session,
+        campaign_id=campaign_id,
+        upsert=advertisements_input.upsert,
+        delete_ids=advertisements_input.delete,
+    )
+    await response_cache.invalidate(tenant_scope(tenant.customer.id))
+
+    return advertisements
+
+
+@router.put("/{customer_subdomain}/{campaign_id}/advertisements/{advertisement_id}", response_model=AdvertisementResponse)
+async def update_advertisement(
+    session: AsyncSessionDep,
+    advertisement_input: UpdateAdvertisement,
+    customer_subdomain: str,
+    tenant: UserAnalystRole,
+    campaign_id: UUID,
+    advertisement_id: UUID
+) -> AdvertisementResponse:
+    """
+    Update an advertisement of a campaign.
+
+    **Access:** Manager and Analyst roles.
+
+    **Args:**
+    - `advertisement_input (UpdateAdvertisement)`: The advertisement details.
+    - `customer_subdomain (str)`: The subdomain of the customer.
+    - `campaign_id (UUID)`: The id of the campaign.
+    - `advertisement_id (UUID)`: The id of the advertisement.
+
+    **Returns:**
+    - `AdvertisementResponse`: The updated advertisement.
+    """
+
+    validate_advertisement_input(advertisement_input)
+    await ensure_customer_campaign(session=session, customer_id=tenant.customer.id, campaign_id=campaign_id, touch=True)
+
+    try:
+        advertisement = await crud.update_advertisement(session=session, campaign_id=campaign_id, advertisement_id=advertisement_id, advertisement_input=advertisement_input)
+    except IntegrityError as e:
+        raise CampaignExceptions.AdvertisementAlreadyExistsException() from e
+    if not advertisement:
+        raise CampaignExceptions.AdvertisementNotFoundException()
+    await response_cache.invalidate(tenant_scope(tenant.customer.id))
+
+    return advertisement
+
+
+@router.delete("/{customer_subdomain}/{campaign_id}/advertisements/{advertisement_id}", response_model=Message)
+async def delete_advertisement(
+    session: AsyncSessionDep,
+    customer_subdomain: str,
+    tenant: UserAnalystRole,
+    campaign_id: UUID,
+    advertisement_id: UUID
+) -> Message:
+    """
+    Delete an advertisement of a campaign.
+
+    **Access:** Manager and Analyst roles.
+
+    **Args:**
+    - `customer_subdomain (str)`: The subdomain of the customer.
+    - `campaign_id (UUID)`: The id of the campaign.
+    - `advertisement_id (UUID)`: The id of the advertisement.
+
+    **Returns:**
+    - `Message`: Message contaning the following message: `Advertisement deleted successfully`.
+    """
+
+    await ensure_customer_campaign(session=session, customer_id=tenant.customer.id, campaign_id=campaign_id, touch=True)
+
+    if not await crud.delete_advertisement(session=session, campaign_id=campaign_id, advertisement_id=advertisement_id):
+        raise CampaignExceptions.AdvertisementNotFoundException()
+    await response_cache.invalidate(tenant_scope(tenant.customer.id))
+
+    return Message(message="Advertisement deleted successfully.")
+
+
+# Helper functions
+async def ensure_customer_campaign(*, session: AsyncSession, customer_id: UUID, campaign_id: UUID, touch: bool = False) -> None:
+    # Advertisements are only reached through a campaign of the customer, writes bump its updated_at (its ETag)
+    if touch:
+        found = await crud.touch_campaign(session=session, customer_id=customer_id, campaign_id=campaign_id)
+    else:
+        found = await crud.retrieve_campaign_by_id(session=session, customer_id=customer_id, campaign_id=campaign_id, with_advertisements=False)
+    if not found:
+        raise CampaignExceptions.CampaignNotFoundException()
@@ -1,12 +1,19 @@
+from datetime import datetime
 from typing import List
+from uuid import UUID
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
+from pydantic import TypeAdapter
 
-from app.crud.customer import get_customer_by_subdomain
-from app.crud import user as crud
+from app.crud.aio import user as crud
+from app.core.response_cache import response_cache, tenant_scope, user_scope
+from app.core.conditional import collection_etag, make_etag, is_not_modified, not_modified_response, set_validators
 from app.core.deps import (
     UserManagerRole,
-    SessionDep,
+    UserManagerRoleUncached,
+    AsyncSessionDep,
+    ReadSessionDep,
+    PaginationDep,
 )
 from app.schemas.users import UserResponse, CreateUser, UpdateUser
 from app.validators.users import validate_create_user_input, validate_update_user_input
@@ -14,35 +21,117 @@ from app.exceptions import users as UserExceptions
 
 router = APIRouter()
 
+user_list_adapter = TypeAdapter(List[UserResponse])
+
 
 @router.get("/{customer_subdomain}", response_model=List[UserResponse])
-def retrieve_users(
-    session: SessionDep,
+async def retrieve_users(
+    session: ReadSessionDep,
     customer_subdomain: str,
-    current_user: UserManagerRole
+    tenant: UserManagerRole,
+    pagination: PaginationDep,
+    request: Request,
+    response: Response
 ) -> List[UserResponse]:
     """
-    Retrieve users associated with a specific customer.
+    Retrieve users associated with a specific customer, last linked first.
 
     **Access:** Only Manager role.
 
     **Args:**
     - `customer_subdomain (str)`: The subdomain of the customer whose users are to be retrieved.
+    - `limit (int, optional)`: The page size. Without a limit or a cursor, every user is returned.
+    - `cursor (str, optional)`: The `X-Next-Cursor` header of the previous page.
+    - `count (str, optional)`: `exact` or `estimated`, to get the number of users in the `X-Total-Count` header.
+
+    The response has an `ETag` header, requests with a matching `If-None-Match` header get a `304 Not Modified` response.
+
+    Responses are cached by tenant and role when the response cache is enabled.
 
     **Returns:**
     - `List[UserResponse]`: A list of users associated with that customer.
     """
-    customer = get_customer_by_subdomain(session=session, customer_subdomain=customer_subdomain)
-    users = crud.retrieve_users_by_customer_id(session=session, customer_id=customer.id)
-    return users
+
+    async def load() -> List[UserResponse]:
+        # Revalidation: conditional and paginated requests read the list validator first, and
+        # get a 304 without reading the users when it matches
+        scope = (tenant.customer.id, pagination.limit, pagination.cursor)
+        etag = None
+        if request.headers.get("if-none-match") is not None or pagination.limit:
+            count, last_modified = await crud.retrieve_customer_users_version(session=session, customer_id=tenant.customer.id)
+            etag = collection_etag(*scope, count=count, last_modified=last_modified)
+            if is_not_modified(request, etag):
+                return not_modified_response(etag)
+
+        users = await crud.retrieve_users_by_customer_id(
+            session=session,
+            customer_id=tenant.customer.id,
+            limit=pagination.fetch_limit,
+            after=pagination.position(datetime.fromisoformat, UUID),
+        )
+        if etag is None:
+            # The whole list was read, its validator comes from the users themselves
+            etag = collection_etag(*scope, count=len(users), last_modified=max((user.updated_at for user in users), default=None))
+        set_validators(response, etag)
+        users = pagination.page(users, key=lambda user: (user.linked_at, user.id), response=response)
+
+        if pagination.count:
+            response.headers["X-Total-Count"] = str(await crud.count_users_by_customer_id(session=session, customer_id=tenant.customer.id, mode=pagination.count))
+
+        return users
+
+    return await response_cache.respond(
+        request,
+        response,
+        scope=tenant_scope(tenant.customer.id),
+        variant=(tenant.role,),
+        adapter=user_list_adapter,
+        load=load,
+    )
+
+
+@router.get("/{customer_subdomain}/{user_id}", response_model=UserResponse)
+async def retrieve_user(
+    session: ReadSessionDep,
+    request: Request,
+    response: Response,
+    customer_subdomain: str,
+    user_id: UUID,
+    tenant: UserManagerRole
+) -> UserResponse:
+    """
+    Retrieve a user associated with a specific customer.
+
+    The response has `ETag` and `Last-Modified` headers, requests with a matching `If-None-Match`
+    or `If-Modified-Since` header get a `304 Not Modified` response.
+
+    **Access:** Only Manager role.
+
+    **Args:**
+    - `customer_subdomain (str)`: The subdomain of the customer.
+    - `user_id (UUID)`: The id of the user.
+
+    **Returns:**
+    - `UserResponse`: The user, with its role in that customer.
+    """
+    user = await crud.retrieve_user_response_by_id(session=session, customer_id=tenant.customer.id, user_id=user_id)
+    if not user:
+        raise UserExceptions.UserNotFoundException()
+
+    etag = make_etag(user.id, user.updated_at.isoformat())
+    if is_not_modified(request, etag, user.updated_at):
+        return not_modified_response(etag, user.updated_at)
+    set_validators(response, etag, user.updated_at)
+
+    return user
 
 
 @router.post("/{customer_subdomain}", response_model=UserResponse)
-def create_user(
-    session: SessionDep,
+async def create_user(
+    session: AsyncSessionDep,
     customer_subdomain: str,
     user_input: CreateUser,
-    current_user: UserManagerRole
+    tenant: UserManagerRoleUncached
 ) -> UserResponse:
     """
     Create a new user (if necessary) and link them to a customer.
@@ -57,23 +146,24 @@ def create_user(
     - `UserResponse`: The response containing the newly created user.
     """
 
-    customer = get_customer_by_subdomain(session=session, customer_subdomain=customer_subdomain)
+    customer = tenant.customer
 
     # Validate user input
-    validate_create_user_input(session=session, user_input=user_input, customer=customer)
+    await validate_create_user_input(session=session, user_input=user_input, customer=customer)
 
     # Check if a user with this email already exists
-    user = crud.get_user_by_email(session=session, email=user_input.email)
+    user = await crud.get_user_by_email(session=session, email=user_input.email)
     if not user:
         # Create a new User
-        user = crud.create_user(session=session, user_input=user_input)
+        user = await crud.create_user(session=session, user_input=user_input)
 
     # Check if user is already connected to that customer
-    if (crud.retrieve_user_customer_link(session=session, user=user, customer=customer)):
+    if (await crud.retrieve_user_customer_link(session=session, user=user, customer=customer)):
         raise UserExceptions.UserCustomerLinkAlreadyExistException()
     
     # Create a new UserCustomerLink
-    user_link = crud.create_user_customer_link(session=session, user=user, customer=customer, user_input=user_input)
+    user_link = await crud.create_user_customer_link(session=session, user=user, customer=customer, user_input=user_input)
+    await response_cache.invalidate(tenant_scope(customer.id), user_scope(user.id))
 
     return UserResponse(
         id=user.id,
@@ -84,17 +174,18 @@ def create_user(
         role=user_link.role,
         campaign_ids=user_link.campaign_ids,
         created_at=user.created_at,
-        updated_at=user_link.updated_at
+        updated_at=user_link.updated_at,
+        linked_at=user_link.created_at
     )
 
 
 @router.put("/{customer_subdomain}/{user_id}", response_model=UserResponse)
-def update_user_customer_link(
-    session: SessionDep,
+async def update_user_customer_link(
+    session: AsyncSessionDep,
     customer_subdomain: str,
     user_id: str,
     user_input: UpdateUser,
-    current_user: UserManagerRole
+    tenant: UserManagerRoleUncached
 ) -> UserResponse:
     """
     Updates a User Customer Link.
@@ -110,23 +201,24 @@ def update_user_customer_link(
     - `UserResponse`: The response containing the updated user.
     """
 
-    customer = get_customer_by_subdomain(session=session, customer_subdomain=customer_subdomain)
+    customer = tenant.customer
 
     # Validate user input
-    validate_update_user_input(session=session, user_input=user_input, customer=customer)
+    await validate_update_user_input(session=session, user_input=user_input, customer=customer)
 
     # Check if a user with this email exists
-    user = crud.get_user_by_id(session=session, user_id=user_id)
+    user = await crud.get_user_by_id(session=session, user_id=user_id)
     if not user:
         raise UserExceptions.UserNotFoundException()
 
     # Check if hte user is connected to that customer
-    user_link = crud.retrieve_user_customer_link(session=session, user=user, customer=customer)
+    user_link = await crud.retrieve_user_customer_link(session=session, user=user, customer=customer)
     if not user_link:
         raise UserExceptions.UserCustomerLinkNotFoundException()
     
     # Update the UserCustomerLink
-    user_link = crud.update_user_customer_link(session=session, user=user, customer=customer, user_input=user_input)
+    user_link = await crud.update_user_customer_link(session=session, user=user, customer=customer, user_input=user_input)
+    await response_cache.invalidate(tenant_scope(customer.id), user_scope(user.id))
 
     return UserResponse(
         id=user.id,
@@ -137,6 +229,7 @@ def update_user_customer_link(
         role=user_link.role,
         campaign_ids=user_link.campaign_ids,
         created_at=user.created_at,
-        updated_at=user_link.updated_at
+        updated_at=user_link.updated_at,
+        linked_at=user_link.created_at
     )
 
@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+
+# Returned by TTLCache.get when the key isn't cached (None is a valid cached value)
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded in-process cache with per-entry expiration, evicting the least recently used entry.
+
+    Each Lambda container or server worker has its own cache, entries are shared by the
+    requests that process handles.
+    """
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float | None = None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        # TTL of None values (negative results), defaults to the regular TTL
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Any:
+        """Returns the cached value, or MISSING when the key isn't cached or has expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_matching(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        """Drops every entry whose key and value match the predicate."""
+        with self._lock:
+            for key in [key for key, (value, _) in self._entries.items() if predicate(key, value)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
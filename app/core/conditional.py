@@ -0,0 +1,57 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: object) -> str:
+    """Builds a weak ETag from the values that identify a version of a resource."""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+def collection_etag(*scope: object, count: int, last_modified: datetime | None) -> str:
+    """
+    Builds the ETag of a collection from its size and last update: an insert or update moves the
+    last update, a delete changes the size.
+    """
+    return make_etag(*scope, count, last_modified.isoformat() if last_modified else None)
+
+def _as_utc(value: datetime) -> datetime:
+    # Timestamps are stored without time zone, in UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    """
+    Evaluates the If-None-Match (weak comparison) and If-Modified-Since request headers.
+
+    If-Modified-Since is only used when there is no If-None-Match, as in RFC 9110.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        opaque_tag = etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == opaque_tag for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have a resolution of one second
+    return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+
+def set_validators(response: Response, etag: str, last_modified: datetime | None = None) -> None:
+    """Sets the ETag and Last-Modified headers, responses must be revalidated before reuse."""
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    response.headers["Cache-Control"] = "private, no-cache"
+
+def not_modified_response(etag: str, last_modified: datetime | None = None) -> Response:
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+    return response
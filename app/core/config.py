@@ -27,6 +27,10 @@ def parse_cors(v: Any) -> list[str] | str:
     raise ValueError(v)
 
 
+# Lifetime of the access tokens, also bounds what is kept per access token (verified tokens, revocations)
+JWT_ACCESS_TOKEN_EXPIRE_MINUTES = 15
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         # Use top level .env file (one level above ./backend/)
@@ -65,6 +69,91 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Connection pooling
+    # - lambda: a single pooled connection per container, reused across invocations
+    # - proxy: no client-side pool, for RDS Proxy or PgBouncer (transaction pooling)
+    # - server: a regular pool for long-running workers
+    POSTGRES_POOL_MODE: Literal["lambda", "proxy", "server"] = os.getenv(
+        "POSTGRES_POOL_MODE", "lambda" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "server"
+    )
+    # Unset values fall back to the defaults of the selected pool mode (see app.core.db)
+    POSTGRES_POOL_SIZE: int | None = os.getenv("POSTGRES_POOL_SIZE")
+    POSTGRES_MAX_OVERFLOW: int | None = os.getenv("POSTGRES_MAX_OVERFLOW")
+    POSTGRES_POOL_TIMEOUT: float | None = os.getenv("POSTGRES_POOL_TIMEOUT")
+    POSTGRES_POOL_RECYCLE: int | None = os.getenv("POSTGRES_POOL_RECYCLE")
+    POSTGRES_POOL_PRE_PING: bool | None = os.getenv("POSTGRES_POOL_PRE_PING")
+
+    # Read replicas (comma separated hosts, sharing the primary credentials and database)
+    POSTGRES_REPLICA_SERVERS: str = os.getenv("POSTGRES_REPLICA_SERVERS", "")
+    # Replicas lagging more than this are skipped, reads go to the primary
+    POSTGRES_REPLICA_MAX_LAG_SECONDS: float = os.getenv("POSTGRES_REPLICA_MAX_LAG_SECONDS", 5)
+    # Users that wrote in the last seconds read from the primary (read-your-writes)
+    POSTGRES_READ_YOUR_WRITES_SECONDS: float = os.getenv("POSTGRES_READ_YOUR_WRITES_SECONDS", 10)
+    POSTGRES_READ_YOUR_WRITES_MAX_SIZE: int = os.getenv("POSTGRES_READ_YOUR_WRITES_MAX_SIZE", 4096)
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_REPLICA_URIS(self) -> list[PostgresDsn]:
+        return [
+            MultiHostUrl.build(
+                scheme="postgresql+psycopg",
+                username=self.POSTGRES_USER,
+                password=self.POSTGRES_PASSWORD,
+                host=server.strip(),
+                port=self.POSTGRES_PORT,
+                path=self.POSTGRES_DB,
+            )
+            for server in self.POSTGRES_REPLICA_SERVERS.split(",") if server.strip()
+        ]
+
+    # Query budget per request: warn or raise when a request runs too many statements,
+    # or repeats the same statement too often (N+1 queries). Meant for local and development.
+    QUERY_BUDGET_MODE: Literal["off", "warn", "raise"] = os.getenv(
+        "QUERY_BUDGET_MODE", "warn" if os.getenv("ENVIRONMENT", "local") in ("local", "development") else "off"
+    )
+    QUERY_BUDGET_MAX_QUERIES: int = os.getenv("QUERY_BUDGET_MAX_QUERIES", 20)
+    QUERY_BUDGET_MAX_REPEATS: int = os.getenv("QUERY_BUDGET_MAX_REPEATS", 5)
+
+    # In-process cache of customers by subdomain (TTL 0 disables it)
+    CUSTOMER_CACHE_TTL_SECONDS: float = os.getenv("CUSTOMER_CACHE_TTL_SECONDS", 300)
+    CUSTOMER_CACHE_NEGATIVE_TTL_SECONDS: float = os.getenv("CUSTOMER_CACHE_NEGATIVE_TTL_SECONDS", 30)
+    CUSTOMER_CACHE_MAX_SIZE: int = os.getenv("CUSTOMER_CACHE_MAX_SIZE", 1024)
+
+    # In-process cache of the user customer links used by the role checks (TTL 0 disables it)
+    USER_LINK_CACHE_TTL_SECONDS: float = os.getenv("USER_LINK_CACHE_TTL_SECONDS", 30)
+    USER_LINK_CACHE_MAX_SIZE: int = os.getenv("USER_LINK_CACHE_MAX_SIZE", 4096)
+
+    # Stateless authorization: access tokens carry the user memberships and roles, and
+    # tenant-scoped requests are authorized from them without querying the database
+    STATELESS_AUTH: bool = os.getenv("STATELESS_AUTH", False)
+    # Refresh token rotation: /auth/refresh returns a new refresh token and the used one stops working
+    REFRESH_TOKEN_ROTATION: bool = os.getenv("REFRESH_TOKEN_ROTATION", False)
+    # Interval between two reads of the session revocation log, revocations made by other
+    # processes can take this long to be enforced by the stateless authorization
+    REVOCATION_REFRESH_SECONDS: float = os.getenv("REVOCATION_REFRESH_SECONDS", 5)
+
+    # In-process cache of verified access tokens, by token digest (0 disables it)
+    ACCESS_TOKEN_CACHE_MAX_SIZE: int = os.getenv("ACCESS_TOKEN_CACHE_MAX_SIZE", 4096)
+
+    # Page sizes of the paginated list endpoints (the default applies when a cursor is given without a limit)
+    PAGINATION_DEFAULT_LIMIT: int = os.getenv("PAGINATION_DEFAULT_LIMIT", 50)
+    PAGINATION_MAX_LIMIT: int = os.getenv("PAGINATION_MAX_LIMIT", 500)
+
+    # Session retention of the maintenance handler: expired and revoked sessions are kept this long
+    # (for the sign in error messages), then deleted in batches of SESSION_PRUNE_BATCH_SIZE rows
+    SESSION_RETENTION_DAYS: int = os.getenv("SESSION_RETENTION_DAYS", 30)
+    SESSION_PRUNE_BATCH_SIZE: int = os.getenv("SESSION_PRUNE_BATCH_SIZE", 1000)
+
+    # Cache of the serialized read responses (campaign and user lists, /auth/me), invalidated by
+    # the writes of the tenant: "memory" is per process, "dynamodb" is shared by every process
+    RESPONSE_CACHE_BACKEND: Literal["off", "memory", "dynamodb"] = os.getenv("RESPONSE_CACHE_BACKEND", "off")
+    RESPONSE_CACHE_TTL_SECONDS: float = os.getenv("RESPONSE_CACHE_TTL_SECONDS", 30)
+    RESPONSE_CACHE_MAX_SIZE: int = os.getenv("RESPONSE_CACHE_MAX_SIZE", 2048)
+    RESPONSE_CACHE_DYNAMODB_TABLE: str = os.getenv("RESPONSE_CACHE_DYNAMODB_TABLE", "")
+    RESPONSE_CACHE_DYNAMODB_ENDPOINT_URL: str | None = os.getenv("RESPONSE_CACHE_DYNAMODB_ENDPOINT_URL", None)
+    # Expired responses are served this long after their TTL when the database fails (0 disables it)
+    RESPONSE_CACHE_STALE_IF_ERROR_SECONDS: float = os.getenv("RESPONSE_CACHE_STALE_IF_ERROR_SECONDS", 0)
+
     EMAILS_FROM_EMAIL: str | None = os.getenv("EMAILS_FROM_EMAIL")
     EMAILS_FROM_NAME: str | None = os.getenv("EMAILS_FROM_NAME", "From Name")
 
@@ -1,8 +1,204 @@
+import time
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 from sqlmodel import Session, create_engine
 
 from app.core.config import settings
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+# Failures of the database (unreachable, restarting, pool exhausted) that reads can degrade on
+DATABASE_ERRORS = (DBAPIError, PoolTimeoutError)
+
+# Start of the checkout in progress in the current thread or task, set by the timed pools
+_checkout_started_at: ContextVar[float | None] = ContextVar("checkout_started_at", default=None)
+
+
+class TimedCheckoutMixin:
+    """
+    Pool mixin that records when each checkout starts, for the checkout wait of PoolStats: the
+    time from requesting a connection to getting it (queueing for a free one, plus connecting).
+    """
+    def connect(self) -> Any:
+        token = _checkout_started_at.set(time.perf_counter())
+        try:
+            return super().connect()
+        finally:
+            _checkout_started_at.reset(token)
+
+class TimedQueuePool(TimedCheckoutMixin, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+class TimedNullPool(TimedCheckoutMixin, NullPool):
+    pass
+
+
+# Pool defaults for each deployment mode, overridable through the POSTGRES_POOL_* settings
+POOL_MODE_DEFAULTS: dict[str, dict[str, Any]] = {
+    # One connection per Lambda container: a container only serves one request at a time
+    "lambda": {"pool_size": 1, "max_overflow": 0, "pool_timeout": 10, "pool_recycle": 300, "pool_pre_ping": True},
+    # RDS Proxy / PgBouncer already pool server connections, so don't hold any client-side
+    "proxy": {"pool_size": 0, "max_overflow": 0, "pool_timeout": 10, "pool_recycle": 300, "pool_pre_ping": False},
+    # Long-running workers serving concurrent requests
+    "server": {"pool_size": 5, "max_overflow": 10, "pool_timeout": 30, "pool_recycle": 1800, "pool_pre_ping": True},
+}
+
+
+def get_engine_options(pool_mode: str = settings.POSTGRES_POOL_MODE, is_async: bool = False) -> dict[str, Any]:
+    """
+    Builds the `create_engine` (or `create_async_engine`) keyword arguments for the given pool mode.
+
+    Settings left unset use the mode defaults. A pool size of 0 disables client-side pooling (NullPool).
+    In lambda mode the sync engine doesn't pool either: it only serves scripts and the maintenance
+    handler, and a pooled connection would stay open next to the one of the async engine.
+    """
+    defaults = POOL_MODE_DEFAULTS[pool_mode]
+    options = {
+        "pool_size": settings.POSTGRES_POOL_SIZE,
+        "max_overflow": settings.POSTGRES_MAX_OVERFLOW,
+        "pool_timeout": settings.POSTGRES_POOL_TIMEOUT,
+        "pool_recycle": settings.POSTGRES_POOL_RECYCLE,
+        "pool_pre_ping": settings.POSTGRES_POOL_PRE_PING,
+    }
+    options = {key: defaults[key] if value is None else value for key, value in options.items()}
+
+    engine_options: dict[str, Any] = {"pool_pre_ping": options["pool_pre_ping"]}
+    if options["pool_size"] == 0 or (pool_mode == "lambda" and not is_async):
+        engine_options["poolclass"] = TimedNullPool
+    else:
+        engine_options.update(
+            poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+            pool_size=options["pool_size"],
+            max_overflow=options["max_overflow"],
+            pool_timeout=options["pool_timeout"],
+            pool_recycle=options["pool_recycle"],
+        )
+
+    # Transaction poolers hand each transaction to any server connection,
+    # so server-side prepared statements can't be used
+    if pool_mode == "proxy":
+        engine_options["connect_args"] = {"prepare_threshold": None}
+
+    return engine_options
+
+
+class PoolStats:
+    """
+    Connection pool counters, collected through SQLAlchemy pool events.
+    """
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.connect_wait_total = 0.0
+        self.connect_wait_max = 0.0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.timed_checkouts = 0
+
+    def register(self, engine: Engine) -> None:
+        event.listen(engine, "do_connect", self._on_do_connect)
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def as_dict(self, engine: Engine) -> dict[str, Any]:
+        pool = engine.pool
+        return {
+            "pool": pool.__class__.__name__,
+            "pool_size": pool.size() if isinstance(pool, QueuePool) else 0,
+            "pool_overflow": pool.overflow() if isinstance(pool, QueuePool) else 0,
+            "checked_out": self.checked_out,
+            "peak_checked_out": self.peak_checked_out,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "connect_wait_avg_ms": round(self.connect_wait_total / self.connects * 1000, 2) if self.connects else 0.0,
+            "connect_wait_max_ms": round(self.connect_wait_max * 1000, 2),
+            "checkout_wait_avg_ms": round(self.checkout_wait_total / self.timed_checkouts * 1000, 2) if self.timed_checkouts else 0.0,
+            "checkout_wait_max_ms": round(self.checkout_wait_max * 1000, 2),
+        }
+
+    # Event handlers
+    def _on_do_connect(self, _dialect, connection_record, _cargs, _cparams) -> None:
+        connection_record.info["connect_started_at"] = time.perf_counter()
+
+    def _on_connect(self, _dbapi_connection, connection_record) -> None:
+        self.connects += 1
+        started_at = connection_record.info.pop("connect_started_at", None)
+        if started_at is not None:
+            wait = time.perf_counter() - started_at
+            self.connect_wait_total += wait
+            self.connect_wait_max = max(self.connect_wait_max, wait)
+
+    def _on_checkout(self, _dbapi_connection, _connection_record, _connection_proxy) -> None:
+        self.checkouts += 1
+        self.checked_out += 1
+        self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+        # Only pools with the TimedCheckoutMixin record the start of their checkouts
+        started_at = _checkout_started_at.get()
+        if started_at is not None:
+            wait = time.perf_counter() - started_at
+            self.timed_checkouts += 1
+            self.checkout_wait_total += wait
+            self.checkout_wait_max = max(self.checkout_wait_max, wait)
+
+    def _on_checkin(self, _dbapi_connection, _connection_record) -> None:
+        self.checkins += 1
+        self.checked_out = max(self.checked_out - 1, 0)
+
+    def _on_invalidate(self, _dbapi_connection, _connection_record, _exception) -> None:
+        self.invalidations += 1
+
+
+# Sync engine (scripts, migrations and sync code paths)
+engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), **get_engine_options())
+
+# Async engine (API routes), psycopg3 supports both from the same URL
+async_engine = create_async_engine(str(settings.SQLALCHEMY_DATABASE_URI), **get_engine_options(is_async=True))
+
+# Async read replica engines (GET endpoints, see app.core.replicas)
+replica_engines = [
+    create_async_engine(str(uri), **get_engine_options(is_async=True))
+    for uri in settings.SQLALCHEMY_REPLICA_URIS
+]
+
+pool_stats = PoolStats()
+pool_stats.register(engine)
+
+async_pool_stats = PoolStats()
+async_pool_stats.register(async_engine.sync_engine)
+
+replica_pool_stats = [PoolStats() for _ in replica_engines]
+for replica_engine, replica_stats in zip(replica_engines, replica_pool_stats, strict=True):
+    replica_stats.register(replica_engine.sync_engine)
+
+
+def get_pool_stats() -> dict[str, Any]:
+    """Returns the connection pool counters of the sync, async and replica engines."""
+    return {
+        "mode": settings.POSTGRES_POOL_MODE,
+        "sync": pool_stats.as_dict(engine),
+        "async": async_pool_stats.as_dict(async_engine.sync_engine),
+        "replicas": [
+            replica_stats.as_dict(replica_engine.sync_engine)
+            for replica_engine, replica_stats in zip(replica_engines, replica_pool_stats, strict=True)
+        ],
+    }
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
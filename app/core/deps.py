@@ -1,22 +1,34 @@
-from collections.abc import Generator
+import hashlib
+import time
+from collections.abc import AsyncGenerator, Generator
+from dataclasses import dataclass
 from typing import Annotated, List, Callable
+from uuid import UUID
 import jwt
 from functools import partial
-from fastapi import Depends
+from fastapi import Depends, Request
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
-from sqlmodel import Session, select
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core import security
 from app.core.config import settings
-from app.core.db import engine
+from app.core.db import DATABASE_ERRORS, engine, async_engine
+from app.core.cache import MISSING
+from app.core.pagination import Pagination, pagination_params
+from app.core.revocation import is_session_revoked, refresh_revocations, verified_token_cache
+from app.core.replicas import ReadReplicaSession, current_user_id, select_replica_engine
+from app.core.response_cache import response_cache
 from app.core.security.token import ALGORITHM
-from app.crud.customer import get_customer_by_subdomain
-from app.crud.user.user_session import retrieve_active_user_session_by_user_id
+from app.crud.aio.customer import get_customer_by_subdomain
+from app.crud.aio.user import retrieve_cached_user_customer_link
+from app.crud.aio.user.user_session import retrieve_user_with_active_session
 from app.schemas.auth import TokenPayload
-from app.models import User, UserCustomerLink
+from app.models import User, UserCustomerLink, Customer
 from app.models.user import UserRole
 from app.exceptions import auth as AuthExceptions
+from app.services.monitoring import logger
 
 
 # DB Session Dependency
@@ -26,13 +38,55 @@ def get_db() -> Generator[Session, None, None]:
 SessionDep = Annotated[Session, Depends(get_db)]
 
 
+# Async DB Session Dependency
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    # Objects are kept loaded after commit, lazy refreshes would need IO outside the session
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
+
+
+# Read-only DB Session Dependency
+async def get_read_db(request: Request, session: AsyncSessionDep) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Yields a session reading from a replica, falling back to the primary session when no replica
+    is configured or healthy, or when the request itself writes.
+    """
+    replica_engine = await select_replica_engine() if request.method in ("GET", "HEAD") else None
+    if replica_engine is None:
+        yield session
+        return
+
+    async with AsyncSession(
+        session.bind,
+        sync_session_class=ReadReplicaSession,
+        expire_on_commit=False,
+        info={"replica_engine": replica_engine},
+    ) as read_session:
+        yield read_session
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_db)]
+
+
+# Pagination Dependency
+PaginationDep = Annotated[Pagination, Depends(pagination_params)]
+
+
 # Token Dependency
 oauth2_scheme = security.JWTBearer()
 TokenDep = Annotated[str, Depends(oauth2_scheme)]
 
 
-# Current User Dependency
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+# Access Token Decoding
+def decode_access_token(token: str) -> TokenPayload:
+    """
+    Verifies the access token, reusing the payload of tokens already verified by this process
+    until they expire (dashboards send the same token on every request).
+    """
+    token_digest = hashlib.sha256(token.encode()).digest()
+    token_data = verified_token_cache.get(token_digest)
+    if token_data is not MISSING:
+        return token_data
+
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[ALGORITHM]
@@ -40,68 +94,181 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
         token_data = TokenPayload(**payload)
     except (InvalidTokenError, ValidationError):
         raise AuthExceptions.InvalidTokenException()
-    
-    user = session.get(User, token_data.sub)
+
+    verified_token_cache.set(token_digest, token_data, ttl=payload["exp"] - time.time() if "exp" in payload else None)
+    return token_data
+
+
+# Current User Dependency
+async def get_current_user(request: Request, session: AsyncSessionDep, token: TokenDep) -> User:
+    token_data = decode_access_token(token)
+
+    try:
+        user, has_active_session = await retrieve_user_with_active_session(session=session, user_id=token_data.sub)
+    except DATABASE_ERRORS as e:
+        if not response_cache.serves_stale(request):
+            raise
+        # The user is resolved from the verified token while the database fails, for the route to
+        # serve its stale cached response. Only tokens of a session that can be checked against
+        # the revocations are accepted.
+        logger.warning(f"Authenticating the user from the access token claims: {e}")
+        await session.rollback()
+        if not token_data.sid or is_session_revoked(token_data.sid):
+            raise AuthExceptions.UserNotAuthenticatedException()
+        user, has_active_session = User(id=UUID(token_data.sub), is_superuser=token_data.su), True
     if not user:
         raise AuthExceptions.UserNotFoundException()
-    if not retrieve_active_user_session_by_user_id(session=session, user_id=user.id):
+    if not has_active_session:
         raise AuthExceptions.UserNotAuthenticatedException()
+
+    # Used to route the reads of users that just wrote to the primary
+    current_user_id.set(str(user.id))
     return user
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
 
+# Tenant Context
+@dataclass
+class TenantContext:
+    """
+    Authorization context of a tenant-scoped request, built once by the role dependencies.
+
+    `link` and `role` are None for superusers, and `link` is None too when authorized from the
+    token claims (stateless authorization, where `user` only has its id and superuser flag).
+    `campaign_ids` is None when every campaign of the customer is visible, and the allowed
+    campaigns otherwise (visitors).
+    """
+    user: User
+    customer: Customer
+    link: UserCustomerLink | None = None
+    role: UserRole | None = None
+    campaign_ids: List[UUID] | None = None
+
+
 # Customer Role User Dependency
-def customer_role_user_dependency(session: SessionDep, current_user: CurrentUser, customer_subdomain: str, required_role: List[UserRole]) -> User:
+async def customer_role_user_dependency(session: AsyncSessionDep, current_user: CurrentUser, customer_subdomain: str, required_role: List[UserRole], use_cache: bool = True) -> TenantContext:
     # Check if the customer exists
-    customer = get_customer_by_subdomain(session=session, customer_subdomain=customer_subdomain)
+    customer = await get_customer_by_subdomain(session=session, customer_subdomain=customer_subdomain)
     if not customer:
         raise AuthExceptions.CustomerNotFoundException()
 
     if current_user.is_superuser:
-        return current_user
+        return TenantContext(user=current_user, customer=customer)
 
     # Get the UserCustomerLink for the current user and the customer
-    customer_link = session.exec(select(UserCustomerLink).where((UserCustomerLink.user_id == current_user.id) & (UserCustomerLink.customer_id == customer.id))).first()
+    customer_link = await retrieve_cached_user_customer_link(session=session, user_id=current_user.id, customer_id=customer.id, use_cache=use_cache)
     if not customer_link:
         raise AuthExceptions.UserHasNoAccessToCustomerException()
     
+    verify_customer_role(status=customer_link.status, role=customer_link.role, required_role=required_role)
+
+    return TenantContext(
+        user=current_user,
+        customer=customer,
+        link=customer_link,
+        role=customer_link.role,
+        campaign_ids=(customer_link.campaign_ids or []) if customer_link.role == UserRole.VISITOR else None,
+    )
+
+# Stateless Customer Role User Dependency
+async def stateless_role_user_dependency(request: Request, session: AsyncSessionDep, token_data: TokenPayload, customer_subdomain: str, required_role: List[UserRole]) -> TenantContext:
+    """
+    Authorizes a tenant-scoped request from the access token claims, without database queries
+    when the customer is cached (besides the periodic read of the revocation log). Roles can be
+    as stale as the access token (15 minutes), revoked sessions are rejected once the
+    revocation log is read.
+    """
+    try:
+        await refresh_revocations(session)
+    except DATABASE_ERRORS as e:
+        if not response_cache.serves_stale(request):
+            raise
+        # Checked against the revocations read so far while the database fails, the log is read again on the next request
+        logger.warning(f"Reading the revocation log failed: {e}")
+        await session.rollback()
+    if is_session_revoked(token_data.sid):
+        raise AuthExceptions.UserNotAuthenticatedException()
+
+    # Check if the customer exists
+    customer = await get_customer_by_subdomain(session=session, customer_subdomain=customer_subdomain)
+    if not customer:
+        raise AuthExceptions.CustomerNotFoundException()
+
+    # Used to route the reads of users that just wrote to the primary
+    current_user_id.set(token_data.sub)
+    user = User(id=UUID(token_data.sub), is_superuser=token_data.su)
+    if user.is_superuser:
+        return TenantContext(user=user, customer=customer)
+
+    membership = token_data.cus.get(str(customer.id))
+    if not membership:
+        raise AuthExceptions.UserHasNoAccessToCustomerException()
+
+    verify_customer_role(status=membership.status, role=membership.role, required_role=required_role)
+
+    return TenantContext(
+        user=user,
+        customer=customer,
+        role=membership.role,
+        campaign_ids=membership.campaign_ids if membership.role == UserRole.VISITOR else None,
+    )
+
+def verify_customer_role(status: str, role: UserRole, required_role: List[UserRole]) -> None:
     # Check if the user is active for this customer in the system
-    if customer_link.status != "active":
+    if status != "active":
         raise AuthExceptions.UserNotActiveException()
 
     # Check if the user has the required role for the customer
-    if len(required_role)>0 and customer_link.role not in required_role:
+    if len(required_role)>0 and role not in required_role:
         raise AuthExceptions.UserActionNotAllowedException()
-    
-    return customer_link
 
 # All Role Dependencies
-def role_dependency(required_role: List[UserRole]) -> Callable:
+def role_dependency(required_role: List[UserRole], use_cache: bool = True) -> Callable:
     """
     Factory to create a dependency that validates a user's role for a customer.
+
+    Roles are read from the access token (STATELESS_AUTH) or the user customer link cache,
+    unless `use_cache` is False, which sensitive writes use to always check the current role.
     """
-    def dependency(
-        session: SessionDep,
-        current_user: CurrentUser,
+    async def dependency(
+        request: Request,
+        session: AsyncSessionDep,
+        token: TokenDep,
         customer_subdomain: str,
-    ) -> UserCustomerLink:
-        return customer_role_user_dependency(
+    ) -> TenantContext:
+        if settings.STATELESS_AUTH and use_cache:
+            token_data = decode_access_token(token)
+            if token_data.sid and token_data.cus is not None:
+                return await stateless_role_user_dependency(
+                    request=request,
+                    session=session,
+                    token_data=token_data,
+                    customer_subdomain=customer_subdomain,
+                    required_role=required_role,
+                )
+
+        current_user = await get_current_user(request=request, session=session, token=token)
+        return await customer_role_user_dependency(
             session=session,
             current_user=current_user,
             customer_subdomain=customer_subdomain,
             required_role=required_role,
+            use_cache=use_cache,
         )
 
     return dependency
-UserAnyRole = Annotated[UserCustomerLink, Depends(role_dependency([]))]
-UserManagerRole = Annotated[UserCustomerLink, Depends(role_dependency([UserRole.MANAGER]))]
-UserAnalystRole = Annotated[UserCustomerLink, Depends(role_dependency([UserRole.ANALYST, UserRole.MANAGER]))]
-UserOperationRole = Annotated[UserCustomerLink, Depends(role_dependency([UserRole.OPERATION, UserRole.MANAGER]))]
-UserVisitorRole = Annotated[UserCustomerLink, Depends(role_dependency([UserRole.VISITOR, UserRole.ANALYST, UserRole.MANAGER]))]
+UserAnyRole = Annotated[TenantContext, Depends(role_dependency([]))]
+UserManagerRole = Annotated[TenantContext, Depends(role_dependency([UserRole.MANAGER]))]
+UserAnalystRole = Annotated[TenantContext, Depends(role_dependency([UserRole.ANALYST, UserRole.MANAGER]))]
+UserOperationRole = Annotated[TenantContext, Depends(role_dependency([UserRole.OPERATION, UserRole.MANAGER]))]
+UserVisitorRole = Annotated[TenantContext, Depends(role_dependency([UserRole.VISITOR, UserRole.ANALYST, UserRole.MANAGER]))]
+
+# Uncached Role Dependencies (sensitive writes)
+UserManagerRoleUncached = Annotated[TenantContext, Depends(role_dependency([UserRole.MANAGER], use_cache=False))]
 
 
 # Superuser Dependency
-def get_current_active_superuser(current_user: CurrentUser) -> User:
+async def get_current_active_superuser(current_user: CurrentUser) -> User:
     if not current_user.is_superuser:
         raise AuthExceptions.UserNotSuperuserException()
     return current_user
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.revocation import REVOCATION_TTL_SECONDS
+from app.crud.user.user_session import prune_user_sessions, prune_user_session_revocations
+
+
+def run_maintenance(*, session: Session) -> dict[str, Any]:
+    """
+    Prunes the sessions past their retention (SESSION_RETENTION_DAYS), and the revocation log
+    entries older than the access tokens they revoke.
+
+    Returns the number of deleted rows of each table.
+    """
+    now = datetime.now(timezone.utc)
+    pruned_sessions = prune_user_sessions(
+        session=session,
+        older_than=now - timedelta(days=settings.SESSION_RETENTION_DAYS),
+        batch_size=settings.SESSION_PRUNE_BATCH_SIZE,
+    )
+    pruned_revocations = prune_user_session_revocations(
+        session=session,
+        older_than=now - timedelta(seconds=REVOCATION_TTL_SECONDS),
+        batch_size=settings.SESSION_PRUNE_BATCH_SIZE,
+    )
+    return {"pruned_sessions": pruned_sessions, "pruned_revocations": pruned_revocations}
@@ -0,0 +1,97 @@
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Literal, TypeVar
+
+from fastapi import Query, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.exceptions.pagination import InvalidCursorException
+
+
+T = TypeVar("T")
+
+
+# Cursors
+def encode_cursor(values: tuple) -> str:
+    """Encodes the sort key of the last item of a page into an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps(jsonable_encoder(values)).encode()).decode()
+
+def decode_cursor(cursor: str, *types: Callable[[str], Any]) -> tuple:
+    """Decodes a cursor into its sort key, converting each value with the matching type."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list):
+            raise ValueError("Unexpected cursor values")
+        # A tampered cursor with too few or too many values raises a ValueError
+        return tuple(value_type(value) for value_type, value in zip(types, values, strict=True))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorException() from e
+
+
+@dataclass
+class Pagination:
+    """
+    Keyset pagination parameters of a list endpoint.
+
+    Without a limit or a cursor the whole list is returned, as before pagination.
+    """
+    limit: int | None = None
+    cursor: str | None = None
+    count: Literal["exact", "estimated"] | None = None
+
+    @property
+    def fetch_limit(self) -> int | None:
+        # One more item than the page, to know if there is a next page
+        return self.limit + 1 if self.limit else None
+
+    def position(self, *types: Callable[[str], Any]) -> tuple | None:
+        return decode_cursor(self.cursor, *types) if self.cursor else None
+
+    def page(self, items: list[T], key: Callable[[T], tuple], response: Response) -> list[T]:
+        """Trims the fetched items to the page, and sets the X-Next-Cursor header when there are more."""
+        if not self.limit or len(items) <= self.limit:
+            return items
+        items = items[:self.limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(key(items[-1]))
+        return items
+
+def pagination_params(
+    limit: int | None = Query(default=None, ge=1, le=settings.PAGINATION_MAX_LIMIT),
+    cursor: str | None = Query(default=None),
+    count: Literal["exact", "estimated"] | None = Query(default=None),
+) -> Pagination:
+    if cursor and not limit:
+        limit = settings.PAGINATION_DEFAULT_LIMIT
+    return Pagination(limit=limit, cursor=cursor, count=count)
+
+
+# Counts
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, to read the planner row estimate."""
+    inherit_cache = False
+
+    def __init__(self, statement: Any) -> None:
+        self.statement = statement
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: Any, **kw: Any) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+async def count_rows(*, session: AsyncSession, query: Any, mode: Literal["exact", "estimated"]) -> int:
+    """
+    Counts the rows of a query, exactly, or from the planner estimate (cheap on large lists,
+    as accurate as the table statistics).
+    """
+    query = query.order_by(None).limit(None)
+    if mode == "estimated":
+        plan = (await session.execute(Explain(query))).scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    return (await session.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
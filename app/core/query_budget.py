@@ -0,0 +1,96 @@
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.services.monitoring import logger
+
+
+class QueryBudgetExceededError(Exception):
+    """
+    Raised (in "raise" mode) when a request runs more statements than its budget,
+    or repeats the same statement more than allowed.
+    """
+
+
+class QueryStats:
+    """
+    Statements executed, and time spent on them, during a request (or any other scope).
+    """
+    def __init__(self, max_queries: int | None = None, max_repeats: int | None = None, mode: str = "off") -> None:
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+        self.mode = mode
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        # Statements are parametrized, so the text is the statement shape
+        self.statements[statement] += 1
+
+        if self.mode == "raise":
+            problems = self.problems()
+            if problems:
+                raise QueryBudgetExceededError("; ".join(problems))
+
+    def problems(self) -> list[str]:
+        problems = []
+        if self.max_queries is not None and self.count > self.max_queries:
+            problems.append(f"{self.count} statements executed, the budget is {self.max_queries}")
+        if self.max_repeats is not None:
+            for statement, repeats in self.statements.most_common():
+                if repeats <= self.max_repeats:
+                    break
+                problems.append(f"Statement repeated {repeats} times (possible N+1): {statement}")
+        return problems
+
+    def summary(self) -> str:
+        lines = [f"{self.count} statements in {self.duration * 1000:.1f}ms"]
+        lines += [f"  {repeats}x {statement}" for statement, repeats in self.statements.most_common()]
+        return "\n".join(lines)
+
+
+# Stats of the current request, set by the query budget middleware
+request_query_stats: ContextVar[QueryStats | None] = ContextVar("request_query_stats", default=None)
+
+
+def new_request_query_stats() -> QueryStats:
+    return QueryStats(
+        max_queries=settings.QUERY_BUDGET_MAX_QUERIES,
+        max_repeats=settings.QUERY_BUDGET_MAX_REPEATS,
+        mode=settings.QUERY_BUDGET_MODE,
+    )
+
+def report_request_query_stats(stats: QueryStats, path: str) -> None:
+    """Logs a warning for requests over their query budget (in "warn" mode)."""
+    if stats.mode != "warn":
+        return
+    problems = stats.problems()
+    if problems:
+        logger.warning(f"Query budget exceeded on {path}: {'; '.join(problems)}")
+
+
+# Instrumentation of every engine (sync, async, replicas and test engines)
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn: Any, _cursor: Any, _statement: str, _parameters: Any, _context: Any, _executemany: bool) -> None:
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn: Any, _cursor: Any, statement: str, _parameters: Any, _context: Any, _executemany: bool) -> None:
+    duration = time.perf_counter() - conn.info["query_started_at"].pop()
+    stats = request_query_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context: Any) -> None:
+    # Failed statements don't reach after_cursor_execute
+    if context.connection is not None and context.connection.info.get("query_started_at"):
+        context.connection.info["query_started_at"].pop()
@@ -0,0 +1,117 @@
+import itertools
+import time
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql.dml import UpdateBase
+from sqlmodel import Session
+
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
+from app.core.db import replica_engines
+from app.services.monitoring import logger
+
+
+# Interval between two replication lag checks of the same replica
+REPLICA_LAG_CHECK_INTERVAL_SECONDS = 5
+
+# Replication lag, 0 when the replica has replayed everything it received (or isn't a replica)
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+# User of the current request, set by the current user dependency
+current_user_id: ContextVar[str | None] = ContextVar("current_user_id", default=None)
+
+# Users that wrote in this process within the read-your-writes window
+_recent_writers = TTLCache(max_size=settings.POSTGRES_READ_YOUR_WRITES_MAX_SIZE, ttl=settings.POSTGRES_READ_YOUR_WRITES_SECONDS)
+
+# Last measured lag and check time of each replica engine
+_replica_lag: dict[AsyncEngine, tuple[float, float]] = {}
+
+_replica_cycle = itertools.cycle(replica_engines)
+
+
+# Write tracking
+@event.listens_for(Session, "after_flush")
+def _track_flush(session: Session, _flush_context: Any) -> None:
+    session.info["has_writes"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_write(orm_execute_state: Any) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+@event.listens_for(Session, "after_commit")
+def _record_write(session: Session) -> None:
+    if session.info.pop("has_writes", False):
+        record_user_write(current_user_id.get())
+
+
+def record_user_write(user_id: str | None) -> None:
+    if user_id:
+        _recent_writers.set(str(user_id), True, ttl=settings.POSTGRES_READ_YOUR_WRITES_SECONDS)
+
+def has_recent_write(user_id: str | None) -> bool:
+    """
+    Checks if the user wrote within the read-your-writes window.
+
+    Writes are tracked per process, each Lambda container or server worker has its own window.
+    """
+    if not user_id:
+        return False
+    return _recent_writers.get(str(user_id)) is not MISSING
+
+
+# Replica selection
+async def _get_replica_lag(replica_engine: AsyncEngine) -> float:
+    lag, checked_at = _replica_lag.get(replica_engine, (0.0, 0.0))
+    if time.monotonic() - checked_at < REPLICA_LAG_CHECK_INTERVAL_SECONDS:
+        return lag
+
+    try:
+        async with replica_engine.connect() as connection:
+            lag = float((await connection.execute(REPLICA_LAG_QUERY)).scalar_one())
+    except Exception as e:
+        logger.warning(f"Could not check replica lag: {e}")
+        lag = float("inf")
+
+    _replica_lag[replica_engine] = (lag, time.monotonic())
+    return lag
+
+async def select_replica_engine() -> AsyncEngine | None:
+    """
+    Picks the next replica (round robin) whose lag is within the configured threshold.
+
+    Returns None when no replica is configured or all of them are lagging.
+    """
+    for _ in range(len(replica_engines)):
+        replica_engine = next(_replica_cycle)
+        if await _get_replica_lag(replica_engine) <= settings.POSTGRES_REPLICA_MAX_LAG_SECONDS:
+            return replica_engine
+    return None
+
+
+class ReadReplicaSession(Session):
+    """
+    Session that runs reads on the replica stored in `info["replica_engine"]`.
+
+    Flushes and DML statements go to the primary, and so does every statement after them
+    or while the current user is within the read-your-writes window.
+    """
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kw: Any) -> Any:
+        replica_engine = self.info.get("replica_engine")
+        if (
+            replica_engine is None
+            or self._flushing
+            or isinstance(clause, UpdateBase)
+            or self.info.get("has_writes")
+            or has_recent_write(current_user_id.get())
+        ):
+            return super().get_bind(mapper, clause=clause, **kw)
+        return replica_engine.sync_engine
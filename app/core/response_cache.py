@@ -0,0 +1,245 @@
+import hashlib
+import itertools
+import json
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import MISSING, TTLCache
+from app.core.conditional import is_not_modified, not_modified_response
+from app.core.config import settings
+from app.core.db import DATABASE_ERRORS
+from app.services.boto3 import get_aws_session
+from app.services.monitoring import logger
+
+
+# Headers of the route responses stored with their body
+CACHED_HEADERS = ("ETag", "Last-Modified", "Cache-Control", "X-Next-Cursor", "X-Total-Count")
+
+
+def tenant_scope(customer_id: Any) -> str:
+    """Scope of the responses built from the campaigns and users of a customer."""
+    return f"customer:{customer_id}"
+
+def user_scope(user_id: Any) -> str:
+    """Scope of the responses built from the account of a user."""
+    return f"user:{user_id}"
+
+
+# Backends
+class ResponseCacheBackend(ABC):
+    """
+    Storage of the cached responses, and of the version of each scope.
+
+    Entries are keyed by the version of their scope, bumping it invalidates every entry of the
+    scope at once (they are left to expire).
+    """
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def get_version(self, scope: str) -> int:
+        ...
+
+    @abstractmethod
+    async def bump_version(self, scope: str) -> None:
+        ...
+
+    def stats(self) -> dict[str, Any]:
+        return {}
+
+
+class MemoryResponseCacheBackend(ResponseCacheBackend):
+    """
+    In-process LRU backend, also the local stand-in of the shared backend in tests.
+
+    Versions are only bumped in the process that ran the write: other Lambda containers or server
+    workers keep serving their entries until they expire.
+    """
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self._entries = TTLCache(max_size=max_size, ttl=ttl)
+        # Bounded as the entries. Versions are never reused, a scope evicted from the versions gets a
+        # new one: its entries are missed, instead of entries of a previous version being served.
+        self._versions = TTLCache(max_size=max_size, ttl=math.inf)
+        self._next_version = itertools.count(1)
+
+    async def get(self, key: str) -> bytes | None:
+        value = self._entries.get(key)
+        return None if value is MISSING else value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._entries.set(key, value, ttl=ttl)
+
+    async def get_version(self, scope: str) -> int:
+        version = self._versions.get(scope)
+        if version is MISSING:
+            version = next(self._next_version)
+            self._versions.set(scope, version)
+        return version
+
+    async def bump_version(self, scope: str) -> None:
+        self._versions.set(scope, next(self._next_version))
+
+    def stats(self) -> dict[str, Any]:
+        return self._entries.stats()
+
+
+class DynamoDBResponseCacheBackend(ResponseCacheBackend):
+    """
+    Backend shared by every process, on a DynamoDB table with a `key` (string) partition key and
+    `expires_at` as its TTL attribute. Writes of any process invalidate the entries of all of them.
+
+    `endpoint_url` points the backend to DynamoDB Local, for local development.
+    """
+    def __init__(self, table_name: str, endpoint_url: str | None = None) -> None:
+        self._table = get_aws_session().resource("dynamodb", endpoint_url=endpoint_url).Table(table_name)
+
+    async def get(self, key: str) -> bytes | None:
+        item = (await run_in_threadpool(self._table.get_item, Key={"key": key})).get("Item")
+        # Expired items are deleted by DynamoDB within a few days, not at their expiration
+        if item is None or item["expires_at"] <= time.time():
+            return None
+        return item["value"].value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        item = {"key": key, "value": value, "expires_at": int(time.time() + ttl) + 1}
+        await run_in_threadpool(self._table.put_item, Item=item)
+
+    async def get_version(self, scope: str) -> int:
+        response = await run_in_threadpool(self._table.get_item, Key={"key": f"version:{scope}"}, ConsistentRead=True)
+        item = response.get("Item")
+        return int(item["version"]) if item else 0
+
+    async def bump_version(self, scope: str) -> None:
+        await run_in_threadpool(
+            self._table.update_item,
+            Key={"key": f"version:{scope}"},
+            UpdateExpression="ADD #version :one",
+            ExpressionAttributeNames={"#version": "version"},
+            ExpressionAttributeValues={":one": 1},
+        )
+
+
+# Cache
+class ResponseCache:
+    """
+    Cache of serialized read responses, by scope (tenant or user) and variant (role, visible
+    campaigns, path and query string).
+
+    Entries are kept `stale_ttl` seconds after they expire, to be served when the database fails.
+    """
+    def __init__(self, backend: ResponseCacheBackend | None, ttl: float, stale_ttl: float = 0) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None and self.ttl > 0
+
+    def serves_stale(self, request: Request) -> bool:
+        """Whether a failing database can be covered by stale entries for the request (cached reads only)."""
+        return self.enabled and self.stale_ttl > 0 and request.method in ("GET", "HEAD")
+
+    async def respond(
+        self,
+        request: Request,
+        response: Response,
+        *,
+        scope: str,
+        variant: tuple,
+        adapter: TypeAdapter,
+        load: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Returns the cached response of the request, or the result of `load` (cached when it isn't
+        a response of its own, e.g. a 304).
+
+        `response` is the route response, its CACHED_HEADERS are stored with the body.
+        """
+        if not self.enabled:
+            return await load()
+
+        version = await self.backend.get_version(scope)
+        variant_digest = hashlib.sha256(json.dumps([*map(str, variant), request.url.path, str(request.url.query)]).encode()).hexdigest()
+        key = f"response:{scope}:{version}:{variant_digest}"
+
+        entry = await self.backend.get(key)
+        if entry is not None:
+            fresh_until, headers, body = self._decode(entry)
+            if fresh_until > time.time():
+                return self._response(request, headers, body, "HIT")
+
+        try:
+            content = await load()
+        except DATABASE_ERRORS as e:
+            if entry is None:
+                raise
+            logger.warning(f"Serving a stale response of {request.url.path}: {e}")
+            return self._response(request, headers, body, "STALE")
+        if isinstance(content, Response):
+            return content
+
+        body = adapter.dump_json(content)
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        await self.backend.set(key, self._encode(time.time() + self.ttl, headers, body), ttl=self.ttl + self.stale_ttl)
+        return self._response(request, headers, body, "MISS")
+
+    async def invalidate(self, *scopes: str) -> None:
+        """Invalidates every entry of the scopes, called after the writes they are built from."""
+        if not self.enabled:
+            return
+        for scope in scopes:
+            await self.backend.bump_version(scope)
+
+    def stats(self) -> dict[str, Any]:
+        return self.backend.stats() if self.backend is not None else {}
+
+    @staticmethod
+    def _encode(fresh_until: float, headers: dict[str, str], body: bytes) -> bytes:
+        return json.dumps({"fresh_until": fresh_until, "headers": headers}).encode() + b"\n" + body
+
+    @staticmethod
+    def _decode(entry: bytes) -> tuple[float, dict[str, str], bytes]:
+        meta, body = entry.split(b"\n", 1)
+        meta = json.loads(meta)
+        return meta["fresh_until"], meta["headers"], body
+
+    @staticmethod
+    def _response(request: Request, headers: dict[str, str], body: bytes, status: str) -> Response:
+        etag = headers.get("ETag")
+        if etag and is_not_modified(request, etag):
+            response = not_modified_response(etag)
+        else:
+            response = Response(content=body, media_type="application/json", headers=headers)
+        response.headers["X-Cache"] = status
+        return response
+
+
+def create_response_cache_backend() -> ResponseCacheBackend | None:
+    if settings.RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryResponseCacheBackend(max_size=settings.RESPONSE_CACHE_MAX_SIZE, ttl=settings.RESPONSE_CACHE_TTL_SECONDS)
+    if settings.RESPONSE_CACHE_BACKEND == "dynamodb":
+        return DynamoDBResponseCacheBackend(
+            table_name=settings.RESPONSE_CACHE_DYNAMODB_TABLE,
+            endpoint_url=settings.RESPONSE_CACHE_DYNAMODB_ENDPOINT_URL,
+        )
+    return None
+
+
+# Read responses of this process, shared by every request
+response_cache = ResponseCache(
+    backend=create_response_cache_backend(),
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    stale_ttl=settings.RESPONSE_CACHE_STALE_IF_ERROR_SECONDS,
+)
@@ -0,0 +1,86 @@
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import or_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import JWT_ACCESS_TOKEN_EXPIRE_MINUTES, settings
+from app.models import UserSessionRevocation
+
+
+# An entry only has to outlive the access tokens issued for the session
+REVOCATION_TTL_SECONDS = JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+# Log entries are re-read for this long, ids are assigned before commit and can land out of order
+REVOCATION_LOG_OVERLAP_SECONDS = 30
+
+# Revoked user sessions (monotonic expiration), checked by the stateless authorization
+_revoked_session_ids: dict[str, float] = {}
+
+# Last revocation log entry read, and time of the last read
+_last_revocation_id = 0
+_last_refresh_at = 0.0
+
+# Verified access token payloads by token digest, each entry expires with its token
+verified_token_cache = TTLCache(max_size=settings.ACCESS_TOKEN_CACHE_MAX_SIZE, ttl=REVOCATION_TTL_SECONDS)
+
+
+def revoke_sessions(user_id: UUID | str, session_ids: list[str]) -> None:
+    """
+    Revokes the sessions in this process, and evicts the cached access tokens of the user.
+
+    Other processes learn about the revocation from the revocation log (see refresh_revocations).
+    """
+    expires_at = time.monotonic() + REVOCATION_TTL_SECONDS
+    for session_id in session_ids:
+        _revoked_session_ids[str(session_id)] = expires_at
+    verified_token_cache.invalidate_matching(lambda _, token_data: token_data.sub == str(user_id))
+
+async def refresh_revocations(session: AsyncSession) -> None:
+    """
+    Reads the revocation log entries added since the last read, at most once every
+    REVOCATION_REFRESH_SECONDS. The first read loads the revocations of the last access token lifetime.
+    """
+    global _last_revocation_id, _last_refresh_at
+    if time.monotonic() - _last_refresh_at < settings.REVOCATION_REFRESH_SECONDS:
+        return
+
+    now = datetime.now(timezone.utc)
+    if _last_revocation_id:
+        condition = or_(
+            UserSessionRevocation.id > _last_revocation_id,
+            UserSessionRevocation.revoked_at > now - timedelta(seconds=REVOCATION_LOG_OVERLAP_SECONDS),
+        )
+    else:
+        condition = UserSessionRevocation.revoked_at > now - timedelta(seconds=REVOCATION_TTL_SECONDS)
+    statement = select(UserSessionRevocation.id, UserSessionRevocation.session_id).where(condition)
+    rows = (await session.exec(statement)).all()
+
+    expires_at = time.monotonic() + REVOCATION_TTL_SECONDS
+    for row in rows:
+        _revoked_session_ids.setdefault(str(row.session_id), expires_at)
+        _last_revocation_id = max(_last_revocation_id, row.id)
+
+    # Drop the revocations that outlived every access token of their session
+    for session_id in [session_id for session_id, expiration in _revoked_session_ids.items() if expiration <= time.monotonic()]:
+        _revoked_session_ids.pop(session_id, None)
+
+    _last_refresh_at = time.monotonic()
+
+def is_session_revoked(session_id: str) -> bool:
+    """
+    Checks if the session was revoked.
+
+    Revocations made by this process are known right away, the ones made by other Lambda
+    containers or server workers once the revocation log is refreshed.
+    """
+    expires_at = _revoked_session_ids.get(str(session_id))
+    if expires_at is None:
+        return False
+    if expires_at <= time.monotonic():
+        _revoked_session_ids.pop(str(session_id), None)
+        return False
+    return True
@@ -10,7 +10,7 @@ from .providers.google import request_google_auth, callback_google_auth
 from .providers.microsoft import request_microsoft_auth, callback_microsoft_auth
 
 # Other
-from .token import create_access_token, create_refresh_token, verify_refresh_token
+from .token import create_access_token, create_user_access_token, create_refresh_token, hash_token, verify_refresh_token
 
 # OAuth2-like Bearer Token for Dependency Injection
 class JWTBearer(HTTPBearer):
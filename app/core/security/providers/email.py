@@ -1,16 +1,17 @@
 from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
 from itsdangerous import URLSafeTimedSerializer
 from itsdangerous import SignatureExpired, BadSignature
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
 from app.schemas.auth import RequestAuthInput, CallbackAuthInput, RedirectURLResponse, AccessRefreshTokenResponse
 from app.models import User, Customer
 from app.services.email import generate_magic_link_email, send_email
-from app.crud.user.user_session import create_user_session, retrieve_user_session_by_magic_link_token, update_magic_link_used, revoke_user_sessions
-from app.crud.user import get_user_by_email
-from app.core.security.token import create_access_token, create_refresh_token, JWT_REFRESH_TOKEN_EXPIRE_DAYS
-from app.exceptions.auth import TokenExpiredException, InvalidTokenException, TokenNotFoundException
+from app.crud.aio.user.user_session import retrieve_user_session_by_magic_link_token, redeem_magic_link, rotate_user_session
+from app.core.security.token import create_user_access_token, create_refresh_token, hash_token, JWT_REFRESH_TOKEN_EXPIRE_DAYS
+from app.exceptions.auth import TokenExpiredException, InvalidTokenException, TokenNotFoundException, TokenHasBeenUsedException, TokenRevokedException
 
 MAGIC_LINK_TOKEN_EXPIRE_MINUTES = 15
 
@@ -18,12 +19,12 @@ serializer = URLSafeTimedSerializer(settings.SECRET_KEY)
 
 
 # Request
-def request_magic_link(session: Session, request_input: RequestAuthInput, user: User, customer: Customer) -> RedirectURLResponse:
+async def request_magic_link(session: AsyncSession, request_input: RequestAuthInput, user: User, customer: Customer) -> RedirectURLResponse:
     """
     Sends a magic link token email for the given user email address.
 
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         request_input (RequestAuthInput): The request input containing the email address.
         user (User): The user object.
         customer (Customer): The customer object.
@@ -33,16 +34,15 @@ def request_magic_link(session: Session, request_input: RequestAuthInput, user:
     """
 
     # Generate magic link token
-    magic_link_token = generate_magic_link_token(request_input.email)
+    magic_link_token = generate_magic_link_token(request_input.email, user.id)
     magic_link_expires_at = datetime.now(timezone.utc) + timedelta(minutes=MAGIC_LINK_TOKEN_EXPIRE_MINUTES)
 
-    # Generate refresh token
+    # Generate refresh token (only its hash is stored, the token given to the user is issued by the callback)
     refresh_token = create_refresh_token(user.id)
     refresh_token_expires_at = datetime.now(timezone.utc) + timedelta(days=JWT_REFRESH_TOKEN_EXPIRE_DAYS)
 
     # Handle the user sessions
-    revoke_user_sessions(session=session, user_id=user.id)
-    _user_session = create_user_session(session=session, user_id=user.id, refresh_token=refresh_token, refresh_token_expires_at=refresh_token_expires_at, magic_link_token=magic_link_token, magic_link_expires_at=magic_link_expires_at)
+    _user_session = await rotate_user_session(session=session, user_id=user.id, refresh_token_hash=hash_token(refresh_token), refresh_token_expires_at=refresh_token_expires_at, magic_link_token_hash=hash_token(magic_link_token), magic_link_expires_at=magic_link_expires_at)
 
     # Generate magic link email
     magic_link_email = generate_magic_link_email(
@@ -52,8 +52,9 @@ def request_magic_link(session: Session, request_input: RequestAuthInput, user:
         MAGIC_LINK_TOKEN_EXPIRE_MINUTES
     )
 
-    # Send email with magic link
-    send_email(
+    # Send email with magic link (boto3 is blocking, keep it off the event loop)
+    await run_in_threadpool(
+        send_email,
         email_to=user.email,
         subject=magic_link_email.subject,
         html_content=magic_link_email.html_content
@@ -63,12 +64,12 @@ def request_magic_link(session: Session, request_input: RequestAuthInput, user:
 
 
 # Callback
-def callback_magic_link(session: Session, callback_input: CallbackAuthInput) -> AccessRefreshTokenResponse:
+async def callback_magic_link(session: AsyncSession, callback_input: CallbackAuthInput) -> AccessRefreshTokenResponse:
     """
     Callback function to handle the magic link token verification.
 
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         callback_input (CallbackAuthInput): Data for the request, such as email, customer_subdomain and callback_url.
 
     Returns:
@@ -77,40 +78,51 @@ def callback_magic_link(session: Session, callback_input: CallbackAuthInput) ->
 
     # Verify the magic link token
     try:
-        email = verify_magic_link_token(callback_input.token)
+        user_id = verify_magic_link_token(callback_input.token)
     except SignatureExpired:
         raise TokenExpiredException()
     except BadSignature:
         raise InvalidTokenException()
-    
-    # Get the user from the database
-    user = get_user_by_email(session=session, email=email)
 
-    # Check if the token exists in the database and hasn't been used
-    user_session = retrieve_user_session_by_magic_link_token(session=session, magic_link_token=callback_input.token)
-    if not user_session or user_session.user_id != user.id:
-        raise TokenNotFoundException()
-    #elif db_user_session.magic_link_used_at:
-    #    raise TokenHasBeenUsedException()
-    elif user_session.magic_link_expires_at.replace(tzinfo=timezone.utc) < datetime.now(timezone.utc):
-        raise TokenExpiredException()
-
-    # Mark token as used
-    update_magic_link_used(session=session, user_session=user_session)
+    # Mark the token as used and issue the refresh token of the session, if the token is still valid
+    refresh_token = create_refresh_token(user_id)
+    user_session_id = await redeem_magic_link(session=session, magic_link_token_hash=hash_token(callback_input.token), user_id=user_id, refresh_token_hash=hash_token(refresh_token))
+    if not user_session_id:
+        await raise_magic_link_error(session=session, magic_link_token=callback_input.token)
 
     # Generate access token
-    access_token = create_access_token(user.id)
+    access_token = await create_user_access_token(session=session, user_id=user_id, user_session_id=user_session_id)
 
     return AccessRefreshTokenResponse(
         access_token=access_token,
-        refresh_token=user_session.refresh_token
+        refresh_token=refresh_token
     )
 
 
 # Helper functions
-def generate_magic_link_token(email: str) -> str:
-    return serializer.dumps(email, salt="$ome$alt")
+async def raise_magic_link_error(session: AsyncSession, magic_link_token: str) -> None:
+    """Raises the reason why a magic link token couldn't be redeemed."""
+    user_session = await retrieve_user_session_by_magic_link_token(session=session, magic_link_token_hash=hash_token(magic_link_token))
+    if not user_session:
+        raise TokenNotFoundException()
+    elif user_session.magic_link_used_at:
+        raise TokenHasBeenUsedException()
+    elif user_session.is_revoked:
+        raise TokenRevokedException()
+    elif user_session.magic_link_expires_at.replace(tzinfo=timezone.utc) < datetime.now(timezone.utc):
+        raise TokenExpiredException()
+    # The token belongs to another user
+    raise TokenNotFoundException()
+
+def generate_magic_link_token(email: str, user_id: UUID | str) -> str:
+    # The user id lets the callback redeem the link without looking the user up,
+    # the nonce keeps two links requested in the same second apart (they are stored by hash)
+    return serializer.dumps({"email": email, "user_id": str(user_id), "nonce": uuid4().hex}, salt="$ome$alt")
 
 def verify_magic_link_token(token: str) -> str:
-    return serializer.loads(token, salt="$ome$alt", max_age=MAGIC_LINK_TOKEN_EXPIRE_MINUTES*60)
+    """Returns the user id of a valid magic link token."""
+    payload = serializer.loads(token, salt="$ome$alt", max_age=MAGIC_LINK_TOKEN_EXPIRE_MINUTES*60)
+    if not isinstance(payload, dict) or "user_id" not in payload:
+        raise BadSignature("Magic link token without user id")
+    return payload["user_id"]
 
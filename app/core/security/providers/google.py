@@ -1,15 +1,15 @@
 import httpx
 from datetime import datetime, timedelta, timezone
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
-from app.core.security.token import create_access_token, create_refresh_token, JWT_REFRESH_TOKEN_EXPIRE_DAYS
+from app.core.security.token import create_user_access_token, create_refresh_token, hash_token, JWT_REFRESH_TOKEN_EXPIRE_DAYS
 from app.exceptions import auth as AuthExceptions
 from app.services.monitoring import logger
 from app.models import Customer
 from app.schemas.auth import RequestAuthInput, CallbackAuthInput, RedirectURLResponse, AccessRefreshTokenResponse
-from app.crud.user import get_user_by_email
-from app.crud.user.user_session import revoke_user_sessions, create_user_session
+from app.crud.aio.user import get_user_by_email
+from app.crud.aio.user.user_session import rotate_user_session
 from app.validators.auth import verify_request_user_customer
 
 
@@ -20,31 +20,30 @@ def request_google_auth(request_input: RequestAuthInput) -> RedirectURLResponse:
 
 
 # Callback
-async def callback_google_auth(session: Session, callback_input: CallbackAuthInput, customer: Customer) -> AccessRefreshTokenResponse:
+async def callback_google_auth(session: AsyncSession, callback_input: CallbackAuthInput, customer: Customer) -> AccessRefreshTokenResponse:
     # Get the user details from Google
     google_user = await get_google_user(callback_input.token, callback_input.callback_url)
     _id, email, _verified_email, _name, _given_name, _family_name, _picture = google_user.values()
     
     # Get the user from the database
-    user = get_user_by_email(session=session, email=email)
+    user = await get_user_by_email(session=session, email=email)
 
     # Verify the user and customer
-    verify_request_user_customer(session=session, user=user, customer=customer)
+    await verify_request_user_customer(session=session, user=user, customer=customer)
 
     # Generate refresh token
     refresh_token = create_refresh_token(user.id)
     refresh_token_expires_at = datetime.now(timezone.utc) + timedelta(days=JWT_REFRESH_TOKEN_EXPIRE_DAYS)
 
     # Handle the user sessions
-    revoke_user_sessions(session=session, user_id=user.id)
-    new_session = create_user_session(session=session, user_id=user.id, refresh_token=refresh_token, refresh_token_expires_at=refresh_token_expires_at)
+    new_session = await rotate_user_session(session=session, user_id=user.id, refresh_token_hash=hash_token(refresh_token), refresh_token_expires_at=refresh_token_expires_at)
 
     # Create JWT access token
-    access_token = create_access_token(user.id)
+    access_token = await create_user_access_token(session=session, user_id=user.id, user_session_id=new_session.id)
     
     return AccessRefreshTokenResponse(
         access_token=access_token,
-        refresh_token=new_session.refresh_token
+        refresh_token=refresh_token
     )
 
 
@@ -1,30 +1,67 @@
+import hashlib
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Any
 import jwt
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.config import settings
+from app.core.config import JWT_ACCESS_TOKEN_EXPIRE_MINUTES, settings
+from app.crud.aio.user import retrieve_user_memberships
+from app.models import User
+from app.schemas.auth import TokenCustomerClaim
 
 
 ALGORITHM = "HS256"
-JWT_ACCESS_TOKEN_EXPIRE_MINUTES = 15
 JWT_REFRESH_TOKEN_EXPIRE_DAYS = 30
 
 
 # Access Token
-def create_access_token(subject: str | Any, expires_delta: timedelta = timedelta(minutes=JWT_ACCESS_TOKEN_EXPIRE_MINUTES)):
+def create_access_token(subject: str | Any, expires_delta: timedelta = timedelta(minutes=JWT_ACCESS_TOKEN_EXPIRE_MINUTES), claims: dict[str, Any] | None = None):
     expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+async def create_user_access_token(*, session: AsyncSession, user_id: str | Any, user_session_id: str | Any) -> str:
+    """
+    Creates the access token of a signed in user.
+
+    With STATELESS_AUTH the token also carries the user session, superuser flag and customer
+    memberships, so tenant-scoped requests can be authorized without querying the database.
+    """
+    if not settings.STATELESS_AUTH:
+        return create_access_token(user_id)
+
+    # Usually already in the session identity map, loaded by the sign in
+    user = await session.get(User, user_id)
+    user_links = await retrieve_user_memberships(session=session, user_id=user.id)
+    claims = {
+        "sid": str(user_session_id),
+        "su": bool(user.is_superuser),
+        "cus": {
+            str(link.customer_id): TokenCustomerClaim(
+                role=link.role,
+                status=link.status,
+                campaign_ids=link.campaign_ids or [],
+            ).model_dump(mode="json")
+            for link in user_links
+        },
+    }
+    return create_access_token(user.id, claims=claims)
+
 def create_refresh_token(subject: str | Any, expires_delta: timedelta = timedelta(days=JWT_REFRESH_TOKEN_EXPIRE_DAYS)):
     expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject)}
+    # The jti keeps two tokens of the same user and second apart, they are stored by hash
+    to_encode = {"exp": expire, "sub": str(subject), "jti": uuid.uuid4().hex}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
 # Refresh Token
+def hash_token(token: str) -> str:
+    """Fixed-length digest under which tokens are stored and looked up."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
 def verify_refresh_token(token: str):
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
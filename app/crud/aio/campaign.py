@@ -0,0 +1,311 @@
+from typing import Any, Literal
+from uuid import UUID, uuid4
+from datetime import datetime, timezone
+from sqlalchemy.orm import selectinload
+from sqlalchemy import Delete, Insert, Update, any_, bindparam, delete, exists, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.pagination import count_rows
+from app.models import Campaign, Customer, Advertisement
+from app.schemas.campaigns import CampaignResponse, CreateCampaign, UpdateCampaign, CreateAdvertisement, UpdateAdvertisement
+
+
+# Create
+async def create_campaign(*, session: AsyncSession, campaign_input: CreateCampaign, customer: Customer, source_system: str) -> Campaign:
+    campaign = Campaign(
+        customer_id=customer.id,
+        name=campaign_input.name,
+        announcer=campaign_input.announcer,
+        description=campaign_input.description,
+        budget=campaign_input.budget,
+        budget_currency=campaign_input.budget_currency,
+        city=campaign_input.city,
+        country=campaign_input.country,
+        target_gender=campaign_input.target_gender,
+        target_age_min=campaign_input.target_age_min,
+        target_age_max=campaign_input.target_age_max,
+        target_audience_size=campaign_input.target_audience_size,
+        start_date=campaign_input.start_date,
+        end_date=campaign_input.end_date,
+        observation=campaign_input.observation,
+        source_system=source_system,
+        advertisements=[Advertisement(
+            campaign_id=ad.campaign_id,
+            name=ad.name,
+            description=ad.description,
+            budget=ad.budget,
+        ) for ad in campaign_input.advertisements]
+    )
+    session.add(campaign)
+    await session.commit()
+    return campaign
+
+
+async def create_advertisement(*, session: AsyncSession, campaign_id: UUID, advertisement_input: CreateAdvertisement) -> Advertisement:
+    advertisement = Advertisement(campaign_id=campaign_id, **advertisement_input.model_dump())
+    session.add(advertisement)
+    await session.commit()
+    return advertisement
+
+
+# Retrieve
+async def retrieve_campaign_by_id(*, session: AsyncSession, customer_id: UUID, campaign_id: UUID, with_advertisements: bool = True) -> Campaign:
+    statement = select(Campaign).where(Campaign.customer_id == customer_id, Campaign.id == campaign_id)
+    if with_advertisements:
+        statement = statement.options(selectinload(Campaign.advertisements))
+    session_campaign = (await session.exec(statement)).first()
+    return session_campaign
+
+async def retrieve_campaign_by_name(*, session: AsyncSession, customer_id: UUID, campaign_name: str) -> Campaign:
+    statement = select(Campaign).where(Campaign.customer_id == customer_id, func.lower(Campaign.name) == campaign_name.lower())
+    session_campaign = (await session.exec(statement)).first()
+    return session_campaign
+
+async def retrieve_customer_campaigns(*, session: AsyncSession, customer_id: UUID) -> list[Campaign]:
+    statement = (
+        select(Campaign)
+        .where(Campaign.customer_id == customer_id)
+        .options(selectinload(Campaign.advertisements))
+    )
+    campaigns = (await session.exec(statement)).all()
+    return campaigns
+
+def customer_campaign_responses_query(*, customer_id: UUID, campaign_ids: list[UUID] | None = None) -> Any:
+    campaign_columns = [getattr(Campaign, field) for field in CampaignResponse.model_fields if field != "advertisements"]
+    query = (
+        select(*campaign_columns)
+        .where(Campaign.customer_id == customer_id)
+        .order_by(Campaign.created_at.desc(), Campaign.id.desc())
+    )
+    if campaign_ids is not None:
+        query = query.where(Campaign.id == any_(list(campaign_ids)))
+    return query
+
+async def retrieve_campaign_advertisements(*, session: AsyncSession, campaign_id: UUID) -> list[Advertisement]:
+    statement = select(Advertisement).where(Advertisement.campaign_id == campaign_id).order_by(Advertisement.created_at)
+    advertisements = (await session.exec(statement)).all()
+    return advertisements
+
+async def retrieve_missing_customer_campaign_ids(*, session: AsyncSession, customer_id: UUID, campaign_ids: list[UUID]) -> list[UUID]:
+    """
+    Returns the given campaign ids that don't belong to the customer, in a single statement
+    that only reads the requested campaigns.
+    """
+    if not campaign_ids:
+        return []
+    requested = (
+        func.unnest(bindparam("campaign_ids", list(set(campaign_ids)), type_=ARRAY(PG_UUID(as_uuid=True))))
+        .table_valued("id")
+        .render_derived()
+    )
+    statement = select(requested.c.id).where(
+        ~exists().where(Campaign.id == requested.c.id, Campaign.customer_id == customer_id)
+    )
+    missing_campaign_ids = (await session.exec(statement)).all()
+    return missing_campaign_ids
+
+async def retrieve_customer_campaign_responses(*, session: AsyncSession, customer_id: UUID, campaign_ids: list[UUID] | None = None, limit: int | None = None, after: tuple[datetime, UUID] | None = None) -> list[CampaignResponse]:
+    """
+    Lists the customer campaigns with their advertisements in two statements, without loading ORM objects.
+
+    When `campaign_ids` is given, only those campaigns are read (an empty list reads nothing).
+    Campaigns are sorted by (created_at, id) descending, `after` and `limit` select a page of them.
+    """
+    if campaign_ids is not None and not campaign_ids:
+        return []
+
+    query = customer_campaign_responses_query(customer_id=customer_id, campaign_ids=campaign_ids)
+    if after is not None:
+        query = query.where(tuple_(Campaign.created_at, Campaign.id) < tuple_(*after))
+    if limit is not None:
+        query = query.limit(limit)
+    campaign_rows = (await session.exec(query)).all()
+    if not campaign_rows:
+        return []
+
+    advertisements_by_campaign_id = {row.id: [] for row in campaign_rows}
+    query = (
+        select(*Advertisement.__table__.columns)
+        .where(Advertisement.campaign_id.in_(list(advertisements_by_campaign_id)))
+        .order_by(Advertisement.created_at)
+    )
+    for row in (await session.exec(query)).all():
+        advertisements_by_campaign_id[row.campaign_id].append(Advertisement.model_validate(row._mapping))
+
+    campaigns = [
+        CampaignResponse.model_validate({**row._mapping, "advertisements": advertisements_by_campaign_id[row.id]})
+        for row in campaign_rows
+    ]
+    return campaigns
+
+async def retrieve_customer_campaigns_version(*, session: AsyncSession, customer_id: UUID, campaign_ids: list[UUID] | None = None) -> tuple[int, datetime | None]:
+    """Gets the number of campaigns of the customer and their last update, the validator of the campaign list."""
+    if campaign_ids is not None and not campaign_ids:
+        return 0, None
+    query = select(func.count(), func.max(Campaign.updated_at)).where(Campaign.customer_id == customer_id)
+    if campaign_ids is not None:
+        query = query.where(Campaign.id == any_(list(campaign_ids)))
+    count, last_modified = (await session.exec(query)).one()
+    return count, last_modified
+
+async def count_customer_campaigns(*, session: AsyncSession, customer_id: UUID, campaign_ids: list[UUID] | None = None, mode: Literal["exact", "estimated"] = "exact") -> int:
+    if campaign_ids is not None and not campaign_ids:
+        return 0
+    query = customer_campaign_responses_query(customer_id=customer_id, campaign_ids=campaign_ids)
+    return await count_rows(session=session, query=query, mode=mode)
+
+
+# Update
+def update_campaign_statement(*, campaign_id: UUID, campaign_input: UpdateCampaign, updated_at: datetime) -> Update:
+    campaign_columns = [getattr(Campaign, field) for field in CampaignResponse.model_fields if field != "advertisements"]
+    return (
+        update(Campaign)
+        .where(Campaign.id == campaign_id)
+        .values(
+            updated_at=updated_at,
+            last_seen_at=updated_at,
+            budget=campaign_input.budget,
+            target_gender=campaign_input.target_gender,
+            target_age_min=campaign_input.target_age_min,
+            target_age_max=campaign_input.target_age_max,
+            target_audience_size=campaign_input.target_audience_size,
+            end_date=campaign_input.end_date,
+        )
+        .returning(*campaign_columns)
+        .execution_options(synchronize_session=False)
+    )
+
+def delete_other_advertisements_statement(*, campaign_id: UUID, advertisement_names: list[str]) -> Delete:
+    return (
+        delete(Advertisement)
+        .where(Advertisement.campaign_id == campaign_id, Advertisement.name.not_in(advertisement_names))
+        .execution_options(synchronize_session=False)
+    )
+
+def upsert_advertisements_statement(*, campaign_id: UUID, advertisements: list[Advertisement | CreateAdvertisement], updated_at: datetime) -> Insert:
+    """
+    Inserts the advertisements of the campaign, updating the existing ones with the same name
+    (uq_advertisement_name) in place. The statement returns every upserted advertisement.
+    """
+    statement = pg_insert(Advertisement).values([
+        {
+            "id": uuid4(),
+            "campaign_id": campaign_id,
+            **{field: getattr(ad, field) for field in CreateAdvertisement.model_fields},
+            "created_at": updated_at,
+            "updated_at": updated_at,
+        }
+        for ad in advertisements
+    ])
+    updated_fields = [field for field in CreateAdvertisement.model_fields if field != "name"] + ["updated_at"]
+    return (
+        statement
+        .on_conflict_do_update(
+            constraint="uq_advertisement_name",
+            set_={field: statement.excluded[field] for field in updated_fields},
+        )
+        .returning(*Advertisement.__table__.columns)
+    )
+
+async def update_campaign(*, session: AsyncSession, campaign: Campaign, campaign_input: UpdateCampaign) -> CampaignResponse | None:
+    """
+    Updates the campaign and replaces its advertisements, matched by name: the missing ones are
+    deleted, the others inserted or updated in place.
+
+    Runs three statements whatever the number of advertisements. Returns None when the campaign
+    was deleted in the meantime.
+    """
+    now = datetime.now(timezone.utc)
+    campaign_row = (await session.execute(update_campaign_statement(campaign_id=campaign.id, campaign_input=campaign_input, updated_at=now))).one_or_none()
+    if campaign_row is None:
+        return None
+
+    # The last advertisement of a name wins, an upsert can't update the same row twice
+    advertisements = list({ad.name: ad for ad in campaign_input.advertisements}.values())
+    await session.execute(delete_other_advertisements_statement(campaign_id=campaign.id, advertisement_names=[ad.name for ad in advertisements]))
+    advertisement_rows = []
+    if advertisements:
+        advertisement_rows = (await session.execute(upsert_advertisements_statement(campaign_id=campaign.id, advertisements=advertisements, updated_at=now))).all()
+    await session.commit()
+
+    return CampaignResponse.model_validate({
+        **campaign_row._mapping,
+        "advertisements": [Advertisement.model_validate(row._mapping) for row in advertisement_rows],
+    })
+
+async def touch_campaign(*, session: AsyncSession, customer_id: UUID, campaign_id: UUID) -> bool:
+    """
+    Bumps the campaign updated_at when its advertisements change, checking that it belongs to the customer.
+    Committed with the advertisement write that follows. Returns False when the campaign isn't found.
+    """
+    statement = (
+        update(Campaign)
+        .where(Campaign.id == campaign_id, Campaign.customer_id == customer_id)
+        .values(updated_at=datetime.now(timezone.utc))
+        .returning(Campaign.id)
+        .execution_options(synchronize_session=False)
+    )
+    return (await session.execute(statement)).scalar_one_or_none() is not None
+
+async def update_advertisement(*, session: AsyncSession, campaign_id: UUID, advertisement_id: UUID, advertisement_input: UpdateAdvertisement) -> Advertisement | None:
+    """
+    Updates an advertisement of the campaign in a single statement. Returns None when the campaign has no such advertisement.
+    """
+    statement = (
+        update(Advertisement)
+        .where(Advertisement.id == advertisement_id, Advertisement.campaign_id == campaign_id)
+        .values(**advertisement_input.model_dump(), updated_at=datetime.now(timezone.utc))
+        .returning(*Advertisement.__table__.columns)
+        .execution_options(synchronize_session=False)
+    )
+    row = (await session.execute(statement)).one_or_none()
+    await session.commit()
+    return Advertisement.model_validate(row._mapping) if row else None
+
+async def bulk_update_advertisements(*, session: AsyncSession, campaign_id: UUID, upsert: list[CreateAdvertisement], delete_ids: list[UUID]) -> list[Advertisement]:
+    """
+    Deletes and upserts (by name) advertisements of the campaign, in at most two statements.
+
+    Returns the upserted advertisements, the others are left untouched.
+    """
+    if delete_ids:
+        statement = (
+            delete(Advertisement)
+            .where(Advertisement.campaign_id == campaign_id, Advertisement.id == any_(list(delete_ids)))
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(statement)
+
+    # The last advertisement of a name wins, an upsert can't update the same row twice
+    advertisements = list({ad.name: ad for ad in upsert}.values())
+    advertisement_rows = []
+    if advertisements:
+        advertisement_rows = (await session.execute(upsert_advertisements_statement(campaign_id=campaign_id, advertisements=advertisements, updated_at=datetime.now(timezone.utc)))).all()
+    await session.commit()
+    return [Advertisement.model_validate(row._mapping) for row in advertisement_rows]
+
+async def update_campaign_last_seen_at(*, session: AsyncSession, campaign: Campaign) -> Campaign:
+    campaign.last_seen_at = datetime.now(timezone.utc)
+    await session.commit()
+    return campaign
+
+
+# Delete
+async def delete_campaign(*, session: AsyncSession, campaign: Campaign) -> None:
+    # Delete the campaign
+    await session.delete(campaign)
+    await session.commit()
+
+async def delete_advertisement(*, session: AsyncSession, campaign_id: UUID, advertisement_id: UUID) -> bool:
+    """Deletes an advertisement of the campaign. Returns False when the campaign has no such advertisement."""
+    statement = (
+        delete(Advertisement)
+        .where(Advertisement.id == advertisement_id, Advertisement.campaign_id == campaign_id)
+        .returning(Advertisement.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted_id = (await session.execute(statement)).scalar_one_or_none()
+    await session.commit()
+    return deleted_id is not None
@@ -0,0 +1,53 @@
+from typing import Any
+
+from sqlalchemy import event
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
+from app.models import Customer
+
+
+# Customers by subdomain, shared by the requests of this process
+customer_cache = TTLCache(
+    max_size=settings.CUSTOMER_CACHE_MAX_SIZE,
+    ttl=settings.CUSTOMER_CACHE_TTL_SECONDS,
+    negative_ttl=settings.CUSTOMER_CACHE_NEGATIVE_TTL_SECONDS,
+)
+
+
+# Retrieve
+# - Getters
+async def get_customer_by_subdomain(*, session: AsyncSession, customer_subdomain: str) -> Customer:
+    if customer_subdomain == "home":
+        return Customer(name="Home", subdomain=customer_subdomain)
+    if customer_subdomain == "admin":
+        return Customer(name="Admin", subdomain=customer_subdomain)
+
+    cached_customer = customer_cache.get(customer_subdomain)
+    if cached_customer is not MISSING:
+        return cached_customer
+
+    statement = select(Customer).where(Customer.subdomain == customer_subdomain)
+    session_customer = (await session.exec(statement)).first()
+
+    # Cache a copy outside of any session, it's read by requests running on other sessions
+    customer_cache.set(customer_subdomain, Customer(**session_customer.model_dump()) if session_customer else None)
+    return session_customer
+
+
+# Cache invalidation
+def invalidate_customer_cache(customer_subdomain: str | None = None) -> None:
+    """Drops a customer from the cache, or every customer when no subdomain is given."""
+    if customer_subdomain is None:
+        customer_cache.clear()
+    else:
+        customer_cache.invalidate(customer_subdomain)
+
+@event.listens_for(Customer, "after_insert")
+@event.listens_for(Customer, "after_update")
+@event.listens_for(Customer, "after_delete")
+def _invalidate_on_write(_mapper: Any, _connection: Any, _customer: Customer) -> None:
+    # Subdomains can change, and inserts must replace cached negative results
+    invalidate_customer_cache()
@@ -0,0 +1,185 @@
+from datetime import datetime, timezone
+from typing import Any, Literal
+from uuid import UUID
+from sqlalchemy import event, tuple_
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
+from app.core.pagination import count_rows
+from app.models import User, UserCustomerLink, Customer
+from app.schemas.users import UserResponse, CreateUser, UpdateUser
+
+
+# User customer links by (user_id, customer_id), used by the role checks of this process
+user_customer_link_cache = TTLCache(
+    max_size=settings.USER_LINK_CACHE_MAX_SIZE,
+    ttl=settings.USER_LINK_CACHE_TTL_SECONDS,
+)
+
+
+# Create
+async def create_user(*, session: AsyncSession, user_input: CreateUser) -> User:
+    user = User(
+        email=user_input.email,
+        name=user_input.name,
+        phone=user_input.phone,
+    )
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+async def create_user_customer_link(*, session: AsyncSession, user: User, customer: Customer, user_input: CreateUser) -> UserCustomerLink:
+    user_link = UserCustomerLink(
+        user_id=user.id,
+        customer_id=customer.id,
+        role=user_input.role,
+        campaign_ids=user_input.campaign_ids
+    )
+    session.add(user_link)
+    await session.commit()
+    await session.refresh(user_link)
+    return user_link
+
+
+# Retrieve
+# - Getters
+async def get_user_by_email(*, session: AsyncSession, email: str) -> User | None:
+    statement = select(User).where(User.email == email)
+    user = (await session.exec(statement)).first()
+    return user
+
+async def get_user_by_id(*, session: AsyncSession, user_id: int) -> User | None:
+    statement = select(User).where(User.id == user_id)
+    user = (await session.exec(statement)).first()
+    return user
+
+def customer_users_query(*, customer_id: UUID) -> Any:
+    return (
+        select(
+            User.id,
+            User.email,
+            User.name,
+            User.phone,
+            User.created_at,
+            UserCustomerLink.status,
+            UserCustomerLink.role,
+            UserCustomerLink.campaign_ids,
+            UserCustomerLink.created_at.label("linked_at"),
+            UserCustomerLink.updated_at,
+        )
+        .join(UserCustomerLink, UserCustomerLink.user_id == User.id)
+        .where(UserCustomerLink.customer_id == customer_id)
+    )
+
+async def retrieve_users_by_customer_id(*, session: AsyncSession, customer_id: int, limit: int | None = None, after: tuple[datetime, UUID] | None = None) -> list[UserResponse]:
+    """
+    Lists the users of the customer, sorted by (link created_at, user id) descending.
+
+    `after` and `limit` select a page of them. Pages are read in index order from
+    ix_user_customer_link_customer_id_created_at, without sorting the users of the customer.
+    """
+    query = customer_users_query(customer_id=customer_id).order_by(UserCustomerLink.created_at.desc(), UserCustomerLink.user_id.desc())
+    if after is not None:
+        query = query.where(tuple_(UserCustomerLink.created_at, UserCustomerLink.user_id) < tuple_(*after))
+    if limit is not None:
+        query = query.limit(limit)
+    rows = (await session.exec(query)).all()
+    users = [UserResponse.model_validate(row._mapping) for row in rows]
+    return users
+
+async def retrieve_user_response_by_id(*, session: AsyncSession, customer_id: UUID, user_id: UUID) -> UserResponse | None:
+    query = customer_users_query(customer_id=customer_id).where(UserCustomerLink.user_id == user_id)
+    row = (await session.exec(query)).first()
+    return UserResponse.model_validate(row._mapping) if row else None
+
+async def retrieve_customer_users_version(*, session: AsyncSession, customer_id: UUID) -> tuple[int, datetime | None]:
+    """Gets the number of users of the customer and the last update of their links, the validator of the user list."""
+    query = select(func.count(), func.max(UserCustomerLink.updated_at)).where(UserCustomerLink.customer_id == customer_id)
+    count, last_modified = (await session.exec(query)).one()
+    return count, last_modified
+
+async def count_users_by_customer_id(*, session: AsyncSession, customer_id: UUID, mode: Literal["exact", "estimated"] = "exact") -> int:
+    query = select(UserCustomerLink.user_id).where(UserCustomerLink.customer_id == customer_id)
+    return await count_rows(session=session, query=query, mode=mode)
+
+async def retrieve_user_customer_link(*, session: AsyncSession, user: User, customer: Customer) -> UserCustomerLink | None:
+    query = (
+        select(
+            UserCustomerLink
+        )
+        .where((UserCustomerLink.user_id == user.id) & (UserCustomerLink.customer_id == customer.id))
+    )
+    user_link = (await session.exec(query)).first()
+    return user_link
+
+async def retrieve_cached_user_customer_link(*, session: AsyncSession, user_id: UUID, customer_id: UUID, use_cache: bool = True) -> UserCustomerLink | None:
+    """
+    Gets the user customer link from the cache, querying (and caching) it on a miss.
+
+    The returned link is detached from the session. With `use_cache=False` the link is always
+    read from the database, for sensitive writes that can't act on a stale role.
+    """
+    key = (str(user_id), str(customer_id))
+    if use_cache:
+        cached_link = user_customer_link_cache.get(key)
+        if cached_link is not MISSING:
+            return cached_link
+
+    query = select(UserCustomerLink).where((UserCustomerLink.user_id == user_id) & (UserCustomerLink.customer_id == customer_id))
+    user_link = (await session.exec(query)).first()
+
+    user_link = UserCustomerLink(**user_link.model_dump()) if user_link else None
+    user_customer_link_cache.set(key, user_link)
+    return user_link
+
+async def retrieve_user_customer_links(*, session: AsyncSession, user: User) -> list[UserCustomerLink]:
+    query = (
+        select(
+            User.id,
+            Customer.id.label('customer_id'),
+            Customer.name.label('customer_name'),
+            Customer.subdomain.label('customer_subdomain'),
+            UserCustomerLink.status.label('link_status'),
+            UserCustomerLink.role.label('link_role'),
+            UserCustomerLink.created_at.label('link_created_at'),
+            UserCustomerLink.updated_at.label('link_updated_at'),
+        )
+        .join(UserCustomerLink, UserCustomerLink.user_id == User.id)
+        .join(Customer, UserCustomerLink.customer_id == Customer.id)
+        .where(UserCustomerLink.user_id == user.id)
+    )
+    user_links = (await session.exec(query)).all()
+    return user_links
+
+async def retrieve_user_memberships(*, session: AsyncSession, user_id: UUID) -> list[UserCustomerLink]:
+    statement = select(UserCustomerLink).where(UserCustomerLink.user_id == user_id)
+    user_links = (await session.exec(statement)).all()
+    return user_links
+
+# Update
+async def update_user_customer_link(*, session: AsyncSession, user: User, customer: Customer, user_input: UpdateUser) -> User:
+    user_link = await retrieve_user_customer_link(session=session, user=user, customer=customer)
+    user_link.campaign_ids = user_input.campaign_ids
+    user_link.role = user_input.role
+    user_link.updated_at = datetime.now(timezone.utc)
+    await session.commit()
+    return user_link
+
+
+# Cache invalidation
+def invalidate_user_customer_link_cache(*, user_id: UUID, customer_id: UUID | None = None) -> None:
+    """Drops a user customer link from the cache, or every link of the user when no customer is given."""
+    if customer_id is None:
+        user_customer_link_cache.invalidate_matching(lambda key, _: key[0] == str(user_id))
+    else:
+        user_customer_link_cache.invalidate((str(user_id), str(customer_id)))
+
+@event.listens_for(UserCustomerLink, "after_insert")
+@event.listens_for(UserCustomerLink, "after_update")
+@event.listens_for(UserCustomerLink, "after_delete")
+def _invalidate_on_write(_mapper: Any, _connection: Any, user_link: UserCustomerLink) -> None:
+    # Covers create_user_customer_link and update_user_customer_link, sync and async
+    invalidate_user_customer_link_cache(user_id=user_link.user_id, customer_id=user_link.customer_id)
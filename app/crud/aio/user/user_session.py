@@ -0,0 +1,188 @@
+from datetime import datetime, timezone
+from typing import Any
+from uuid import UUID
+from sqlalchemy import DateTime, and_, insert, literal, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.revocation import revoke_sessions
+from app.crud.aio.user import invalidate_user_customer_link_cache
+from app.models import User, UserSession, UserSessionRevocation
+
+
+# Create
+async def create_user_session(session: AsyncSession, user_id: str, refresh_token_hash: str, refresh_token_expires_at: datetime, magic_link_token_hash: str = None, magic_link_expires_at: datetime = None) -> UserSession:
+    new_session = UserSession(
+        user_id=user_id,
+        magic_link_token_hash=magic_link_token_hash,
+        magic_link_requested_at=datetime.now(timezone.utc),
+        magic_link_expires_at=magic_link_expires_at,
+        refresh_token_hash=refresh_token_hash,
+        expires_at=refresh_token_expires_at
+    )
+    session.add(new_session)
+    await session.commit()
+    await session.refresh(new_session)
+    return new_session
+
+async def rotate_user_session(*, session: AsyncSession, user_id: str, refresh_token_hash: str, refresh_token_expires_at: datetime, magic_link_token_hash: str = None, magic_link_expires_at: datetime = None) -> UserSession:
+    """
+    Revokes the active sessions of the user and creates its new session, in a single transaction.
+
+    Runs two statements whatever the number of past sessions of the user.
+    """
+    now = datetime.now(timezone.utc)
+    revoked_session_ids = (await session.execute(revoke_user_sessions_statement(user_id=user_id, revoked_at=now))).scalars().all()
+
+    new_session = UserSession(
+        user_id=user_id,
+        magic_link_token_hash=magic_link_token_hash,
+        magic_link_requested_at=now,
+        magic_link_expires_at=magic_link_expires_at,
+        refresh_token_hash=refresh_token_hash,
+        expires_at=refresh_token_expires_at
+    )
+    session.add(new_session)
+    await session.commit()
+
+    # Role checks of a signed out user must not outlive its sessions
+    invalidate_user_customer_link_cache(user_id=user_id)
+    revoke_sessions(user_id, revoked_session_ids)
+    return new_session
+
+
+# Retrieve
+async def retrieve_user_sessions_by_user_id(*, session: AsyncSession, user_id: str) -> list[UserSession]:
+    statement = select(UserSession).where(UserSession.user_id == user_id)
+    user_sessions = (await session.exec(statement)).all()
+    return user_sessions
+
+async def retrieve_active_user_session_by_user_id(*, session: AsyncSession, user_id: str) -> UserSession:
+    statement = select(UserSession).where(UserSession.user_id == user_id).where(UserSession.is_revoked.is_(False))
+    user_sessions = (await session.exec(statement)).first()
+    return user_sessions
+
+async def retrieve_user_with_active_session(*, session: AsyncSession, user_id: str) -> tuple[User | None, bool]:
+    """
+    Gets the user and whether it has a non-revoked, non-expired session, in a single query.
+    """
+    statement = (
+        select(User, UserSession.id)
+        .outerjoin(UserSession, and_(
+            UserSession.user_id == User.id,
+            UserSession.is_revoked.is_(False),
+            UserSession.expires_at > datetime.now(timezone.utc),
+        ))
+        .where(User.id == user_id)
+        .limit(1)
+    )
+    row = (await session.exec(statement)).first()
+    if row is None:
+        return None, False
+    user, user_session_id = row
+    return user, user_session_id is not None
+
+async def retrieve_user_session_by_refresh_token(*, session: AsyncSession, refresh_token_hash: str) -> UserSession:
+    statement = select(UserSession).where(UserSession.refresh_token_hash == refresh_token_hash)
+    user_session = (await session.exec(statement)).first()
+    return user_session
+
+async def retrieve_user_session_by_magic_link_token(*, session: AsyncSession, magic_link_token_hash: str) -> UserSession:
+    statement = select(UserSession).where(UserSession.magic_link_token_hash == magic_link_token_hash)
+    user_session = (await session.exec(statement)).first()
+    return user_session
+
+
+# Update
+def revoke_user_sessions_statement(*, user_id: str, revoked_at: datetime) -> Any:
+    """
+    Revokes the active sessions of the user and logs their revocation, in a single statement.
+
+    The statement returns the ids of the revoked sessions.
+    """
+    revoked = (
+        update(UserSession)
+        .where(UserSession.user_id == user_id, UserSession.is_revoked.is_(False))
+        .values(is_revoked=True)
+        .returning(UserSession.id, UserSession.user_id)
+        .cte("revoked")
+    )
+    return (
+        insert(UserSessionRevocation)
+        .from_select(
+            ["user_id", "session_id", "revoked_at"],
+            select(revoked.c.user_id, revoked.c.id, literal(revoked_at, DateTime())),
+        )
+        .returning(UserSessionRevocation.session_id)
+    )
+
+async def revoke_user_sessions(*, session: AsyncSession, user_id: str) -> None:
+    statement = revoke_user_sessions_statement(user_id=user_id, revoked_at=datetime.now(timezone.utc))
+    revoked_session_ids = (await session.execute(statement)).scalars().all()
+    await session.commit()
+
+    # Role checks of a signed out user must not outlive its sessions
+    invalidate_user_customer_link_cache(user_id=user_id)
+    revoke_sessions(user_id, revoked_session_ids)
+
+async def update_user_activity(*, session: AsyncSession, user_session: UserSession) -> None:
+    user_session.last_used = datetime.now(timezone.utc)
+    await session.commit()
+
+async def use_refresh_token(*, session: AsyncSession, refresh_token_hash: str, user_id: str, new_refresh_token_hash: str | None = None) -> UUID | None:
+    """
+    Validates the refresh token, records the session activity and optionally rotates the token,
+    in a single statement.
+
+    Returns the session id, or None when the token isn't found, belongs to another user, or its
+    session is revoked or expired.
+    """
+    now = datetime.now(timezone.utc)
+    values = {"last_used": now}
+    if new_refresh_token_hash:
+        values["refresh_token_hash"] = new_refresh_token_hash
+
+    statement = (
+        update(UserSession)
+        .where(
+            UserSession.refresh_token_hash == refresh_token_hash,
+            UserSession.user_id == user_id,
+            UserSession.is_revoked.is_(False),
+            UserSession.expires_at > now,
+        )
+        .values(**values)
+        .returning(UserSession.id)
+        .execution_options(synchronize_session=False)
+    )
+    user_session_id = (await session.execute(statement)).scalar_one_or_none()
+    await session.commit()
+    return user_session_id
+
+async def update_magic_link_used(*, session: AsyncSession, user_session: UserSession) -> None:
+    user_session.magic_link_used_at = datetime.now(timezone.utc)
+    await session.commit()
+
+async def redeem_magic_link(*, session: AsyncSession, magic_link_token_hash: str, user_id: str, refresh_token_hash: str) -> UUID | None:
+    """
+    Marks the magic link as used and sets the refresh token of its session, in a single statement.
+
+    Only one redemption of a link can succeed. Returns the session id, or None when the link isn't
+    found, belongs to another user, or is used, expired or revoked.
+    """
+    now = datetime.now(timezone.utc)
+    statement = (
+        update(UserSession)
+        .where(
+            UserSession.magic_link_token_hash == magic_link_token_hash,
+            UserSession.magic_link_used_at.is_(None),
+            UserSession.magic_link_expires_at > now,
+            UserSession.is_revoked.is_(False),
+            UserSession.user_id == user_id,
+        )
+        .values(magic_link_used_at=now, last_used=now, refresh_token_hash=refresh_token_hash)
+        .returning(UserSession.id)
+        .execution_options(synchronize_session=False)
+    )
+    user_session_id = (await session.execute(statement)).scalar_one_or_none()
+    await session.commit()
+    return user_session_id
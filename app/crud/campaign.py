@@ -1,9 +1,9 @@
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timezone
 from sqlmodel import Session, select, func
 
 from app.models import Campaign, Customer, Advertisement
-from app.schemas.campaigns import CreateCampaign, UpdateCampaign
+from app.schemas.campaigns import CreateCampaign
 
 
 # Create
@@ -55,34 +55,8 @@ def retrieve_customer_campaigns(*, session: Session, customer_id: UUID) -> list[
 
 
 # Update
-def update_campaign(*, session: Session, campaign: Campaign, campaign_input: UpdateCampaign) -> Campaign:
-    campaign.updated_at = datetime.now()
-    campaign.last_seen_at = datetime.now()
-    campaign.budget = campaign_input.budget
-    campaign.target_gender = campaign_input.target_gender
-    campaign.target_age_min = campaign_input.target_age_min
-    campaign.target_age_max = campaign_input.target_age_max
-    campaign.target_audience_size = campaign_input.target_audience_size
-    campaign.end_date = campaign_input.end_date
-
-    for ad in campaign.advertisements:
-        if ad not in campaign_input.advertisements:
-            session.delete(ad)
-
-    for ad in campaign_input.advertisements:
-        if ad not in campaign.advertisements:
-            session.add(Advertisement(
-                campaign_id=campaign.id,
-                name=ad.name,
-                description=ad.description,
-                budget=ad.budget,
-            ))
-
-    session.commit()
-    return campaign
-
 def update_campaign_last_seen_at(*, session: Session, campaign: Campaign) -> Campaign:
-    campaign.last_seen_at = datetime.now()
+    campaign.last_seen_at = datetime.now(timezone.utc)
     session.commit()
     return campaign
 
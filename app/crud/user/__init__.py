@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from sqlmodel import Session, select
 
 from app.models import User, UserCustomerLink, Customer
@@ -53,11 +53,12 @@ def retrieve_users_by_customer_id(*, session: Session, customer_id: int) -> list
             UserCustomerLink.status,
             UserCustomerLink.role,
             UserCustomerLink.campaign_ids,
+            UserCustomerLink.created_at.label("linked_at"),
             UserCustomerLink.updated_at,
         )
         .join(UserCustomerLink, UserCustomerLink.user_id == User.id)
         .where(UserCustomerLink.customer_id == customer_id)
-        .order_by(User.created_at.desc())
+        .order_by(UserCustomerLink.created_at.desc(), UserCustomerLink.user_id.desc())
     )
     rows = session.exec(query).all()
     users = [
@@ -71,6 +72,7 @@ def retrieve_users_by_customer_id(*, session: Session, customer_id: int) -> list
             campaign_ids=row.campaign_ids,
             created_at=row.created_at,
             updated_at=row.updated_at,
+            linked_at=row.linked_at,
         )
         for row in rows
     ]
@@ -110,7 +112,7 @@ def update_user_customer_link(*, session: Session, user: User, customer: Custome
     user_link = retrieve_user_customer_link(session=session, user=user, customer=customer)
     user_link.campaign_ids = user_input.campaign_ids
     user_link.role = user_input.role
-    user_link.updated_at = datetime.now()
+    user_link.updated_at = datetime.now(timezone.utc)
     session.commit()
     return user_link
 
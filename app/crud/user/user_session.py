@@ -1,17 +1,21 @@
 from datetime import datetime, timezone
+from sqlalchemy import Delete, and_, delete, or_
 from sqlmodel import Session, select
 
-from app.models import UserSession
+from app.core.revocation import revoke_sessions
+from app.crud.aio.user import invalidate_user_customer_link_cache
+from app.crud.aio.user.user_session import revoke_user_sessions_statement
+from app.models import UserSession, UserSessionRevocation
 
 
 # Create
-def create_user_session(session: Session, user_id: str, refresh_token: str, refresh_token_expires_at: datetime, magic_link_token: str = None, magic_link_expires_at: datetime = None) -> UserSession:
+def create_user_session(session: Session, user_id: str, refresh_token_hash: str, refresh_token_expires_at: datetime, magic_link_token_hash: str = None, magic_link_expires_at: datetime = None) -> UserSession:
     new_session = UserSession(
         user_id=user_id,
-        magic_link_token=magic_link_token,
+        magic_link_token_hash=magic_link_token_hash,
         magic_link_requested_at=datetime.now(timezone.utc),
         magic_link_expires_at=magic_link_expires_at,
-        refresh_token=refresh_token,
+        refresh_token_hash=refresh_token_hash,
         expires_at=refresh_token_expires_at
     )
     session.add(new_session)
@@ -31,31 +35,27 @@ def retrieve_active_user_session_by_user_id(*, session: Session, user_id: str) -
     user_sessions = session.exec(statement).first()
     return user_sessions
 
-def retrieve_user_session_by_refresh_token(*, session: Session, refresh_token: str) -> UserSession:
-    statement = select(UserSession).where(UserSession.refresh_token == refresh_token)
+def retrieve_user_session_by_refresh_token(*, session: Session, refresh_token_hash: str) -> UserSession:
+    statement = select(UserSession).where(UserSession.refresh_token_hash == refresh_token_hash)
     user_session = session.exec(statement).first()
     return user_session
 
-def retrieve_user_session_by_magic_link_token(*, session: Session, magic_link_token: str) -> UserSession:
-    statement = select(UserSession).where(UserSession.magic_link_token == magic_link_token)
+def retrieve_user_session_by_magic_link_token(*, session: Session, magic_link_token_hash: str) -> UserSession:
+    statement = select(UserSession).where(UserSession.magic_link_token_hash == magic_link_token_hash)
     user_session = session.exec(statement).first()
     return user_session
 
 
 # Update
 def revoke_user_sessions(*, session: Session, user_id: str) -> None:
-    previous_sessions = session.exec(
-        select(UserSession).where(
-            UserSession.user_id == user_id,
-            #UserSession.is_revoked == False  # Only find sessions that are not already revoked
-        )
-    ).all()
-
-    for prev_session in previous_sessions:
-        prev_session.is_revoked = True
-
+    statement = revoke_user_sessions_statement(user_id=user_id, revoked_at=datetime.now(timezone.utc))
+    revoked_session_ids = session.execute(statement).scalars().all()
     session.commit()
 
+    # Role checks of a signed out user must not outlive its sessions
+    invalidate_user_customer_link_cache(user_id=user_id)
+    revoke_sessions(user_id, revoked_session_ids)
+
 def update_user_activity(*, session: Session, user_session: UserSession) -> None:
     user_session.last_used = datetime.now(timezone.utc)
     session.commit()
@@ -64,3 +64,45 @@ def update_magic_link_used(*, session: Session, user_session: UserSession) -> No
     user_session.magic_link_used_at = datetime.now(timezone.utc)
     session.commit()
 
+
+
+# Delete
+def prune_user_sessions(*, session: Session, older_than: datetime, batch_size: int) -> int:
+    """
+    Deletes the sessions expired, or revoked and unused, before `older_than`.
+
+    Rows are deleted and committed in batches, locked rows are skipped. Returns the number of deleted sessions.
+    """
+    prunable_sessions = (
+        select(UserSession.id)
+        .where(or_(
+            UserSession.expires_at < older_than,
+            and_(UserSession.is_revoked.is_(True), UserSession.last_used < older_than),
+        ))
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    return _delete_in_batches(session=session, statement=delete(UserSession).where(UserSession.id.in_(prunable_sessions)), batch_size=batch_size)
+
+def prune_user_session_revocations(*, session: Session, older_than: datetime, batch_size: int) -> int:
+    """
+    Deletes the revocation log entries older than `older_than`, in batches. Returns the number of deleted entries.
+    """
+    prunable_revocations = (
+        select(UserSessionRevocation.id)
+        .where(UserSessionRevocation.revoked_at < older_than)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    return _delete_in_batches(session=session, statement=delete(UserSessionRevocation).where(UserSessionRevocation.id.in_(prunable_revocations)), batch_size=batch_size)
+
+def _delete_in_batches(*, session: Session, statement: Delete, batch_size: int) -> int:
+    # Short transactions, so the deletes don't hold locks on the rows the logins use
+    statement = statement.execution_options(synchronize_session=False)
+    deleted = 0
+    while True:
+        batch_deleted = session.execute(statement).rowcount
+        session.commit()
+        deleted += batch_deleted
+        if batch_deleted < batch_size:
+            return deleted
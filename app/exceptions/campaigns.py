@@ -85,6 +85,48 @@ class InvalidCampaignEndDateException(HTTPException):
     def __init__(self):
         super().__init__(status_code=422, detail="Invalid campaign end date.")
 
+class AdvertisementNotFoundException(HTTPException):
+    """
+    Exception raised when an advertisement is not found.
+
+    This exception is typically raised when an attempt is made to update or delete
+    an advertisement, but the campaign has no advertisement with the specified ID.
+
+    Attributes:
+        status_code (int): The HTTP status code for the exception (404).
+        detail (str): A message describing the exception.
+    """
+    def __init__(self):
+        super().__init__(status_code=404, detail="Advertisement not found.")
+
+class AdvertisementAlreadyExistsException(HTTPException):
+    """
+    Exception raised when an advertisement already exists.
+
+    This exception is typically raised when an attempt is made to add an advertisement
+    to a campaign, but an advertisement with this name already exists for that campaign.
+
+    Attributes:
+        status_code (int): The HTTP status code for the exception (404).
+        detail (str): A message describing the exception.
+    """
+    def __init__(self):
+        super().__init__(status_code=404, detail="An advertisement with this name already exists for that campaign.")
+
+class InvalidAdvertisementNameException(HTTPException):
+    """
+    Exception raised when an advertisement name is invalid.
+
+    This exception is typically raised when an attempt is made to create or update
+    an advertisement, but the advertisement name is empty.
+
+    Attributes:
+        status_code (int): The HTTP status code for the exception (422).
+        detail (str): A message describing the exception.
+    """
+    def __init__(self):
+        super().__init__(status_code=422, detail="Invalid advertisement name.")
+
 
 # Enpoint-specific exceptions
 class CouldNotCreateCampaignException(HTTPException):
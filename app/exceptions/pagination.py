@@ -0,0 +1,16 @@
+from fastapi import HTTPException
+
+
+class InvalidCursorException(HTTPException):
+    """
+    Exception raised when a pagination cursor is invalid.
+
+    This exception is typically raised when a list is requested with a cursor
+    that wasn't returned by the same endpoint, or was altered.
+
+    Attributes:
+        status_code (int): The HTTP status code for the exception (400).
+        detail (str): A message describing the exception.
+    """
+    def __init__(self):
+        super().__init__(status_code=400, detail="Invalid pagination cursor.")
@@ -1,9 +1,17 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 from mangum import Mangum
+from sqlmodel import Session
 
 from app.core.config import settings
+from app.core.db import engine, get_pool_stats
+from app.core.maintenance import run_maintenance
+from app.core.revocation import verified_token_cache
+from app.core.response_cache import response_cache
+from app.crud.aio.customer import customer_cache
+from app.crud.aio.user import user_customer_link_cache
+from app.core.query_budget import request_query_stats, new_request_query_stats, report_request_query_stats
 from app.services.monitoring import logger
 from app.api.v1.main import api_router
 from app.api.v1.docs import router as api_docs
@@ -72,6 +80,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Middleware for the per-request query budget
+@app.middleware("http")
+async def query_budget_middleware(request: Request, call_next):
+    if settings.QUERY_BUDGET_MODE == "off":
+        return await call_next(request)
+
+    stats = new_request_query_stats()
+    token = request_query_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        request_query_stats.reset(token)
+
+    report_request_query_stats(stats, request.url.path)
+    response.headers["Server-Timing"] = f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+    return response
+
 # Mount API Routes
 app.include_router(api_router, prefix="/v1")
 
@@ -86,4 +111,20 @@ def lambda_handler(event, context):
     logger.info(f"Lambda event: {event}")
     response = handler(event, context)
     logger.info(f"Lambda response: {response}")
+    logger.info("Database pool stats", extra=get_pool_stats())
+    logger.info("Customer cache stats", extra=customer_cache.stats())
+    logger.info("User customer link cache stats", extra=user_customer_link_cache.stats())
+    logger.info("Access token cache stats", extra=verified_token_cache.stats())
+    logger.info("Response cache stats", extra=response_cache.stats())
     return response
+
+def maintenance_handler(event, _context):
+    """
+    Entry point of the scheduled maintenance, e.g. an EventBridge schedule invoking this image
+    with the `app.main.maintenance_handler` command.
+    """
+    logger.info(f"Maintenance event: {event}")
+    with Session(engine) as session:
+        result = run_maintenance(session=session)
+    logger.info("Maintenance result", extra=result)
+    return result
@@ -51,6 +51,8 @@ class Campaign(SQLModel, table=True):
     __table_args__ = (
         UniqueConstraint("name", "customer_id", name="uq_campaign_name"),
         Index("ix_campaign_customer_id", "customer_id"),
+        # Keyset pagination of the customer campaigns, newest first
+        Index("ix_campaign_customer_id_created_at_id", "customer_id", "created_at", "id"),
     )
 
 
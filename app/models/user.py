@@ -4,7 +4,7 @@ from datetime import datetime, timezone, timedelta
 from typing import Optional, List
 from enum import Enum
 from sqlmodel import SQLModel, Field, Relationship, SQLModel, Session
-from sqlalchemy import Column, Enum as SQLAlchemyEnum, UniqueConstraint, Index, select
+from sqlalchemy import Column, Enum as SQLAlchemyEnum, UniqueConstraint, Index, select, text
 from sqlalchemy.dialects.postgresql import ARRAY, UUID
 
 
@@ -37,6 +37,12 @@ class UserCustomerLink(SQLModel, table=True):
 
     __table_args__ = (
         UniqueConstraint("user_id", "customer_id", name="uq_user_customer"),
+        # Keyset pagination of the customer users, covering the link columns of the list
+        Index(
+            "ix_user_customer_link_customer_id_created_at",
+            "customer_id", "created_at", "user_id",
+            postgresql_include=["role", "status", "campaign_ids", "updated_at"],
+        ),
     )
 
 
@@ -104,17 +110,34 @@ class UserSession(SQLModel, table=True):
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="users.id")
-    refresh_token: str
+    refresh_token_hash: str = Field(max_length=64, unique=True, index=True)   # SHA-256 of the refresh token
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     last_used: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     expires_at: datetime
     is_revoked: bool = Field(default=False)
 
-    magic_link_token: Optional[str] = Field(default=None)
+    magic_link_token_hash: Optional[str] = Field(default=None, max_length=64, unique=True, index=True)   # SHA-256 of the magic link token
     magic_link_requested_at: Optional[datetime] = Field(default=None)
     magic_link_expires_at: Optional[datetime] = Field(default=None)
     magic_link_used_at: Optional[datetime] = Field(default=None)
 
     user: "User" = Relationship(back_populates="sessions")
 
+    __table_args__ = (
+        # Active session lookup of the current user dependency
+        Index("ix_user_session_active_user_id", "user_id", "expires_at", postgresql_where=text("NOT is_revoked")),
+    )
+
+
+class UserSessionRevocation(SQLModel, table=True):
+    """
+    Append-only log of revoked user sessions, read incrementally by the revocation store.
+    """
+    __tablename__ = "user_session_revocations"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: uuid.UUID = Field(foreign_key="users.id")
+    session_id: uuid.UUID   # No foreign key, the log outlives pruned sessions
+    revoked_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
+
 
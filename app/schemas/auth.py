@@ -1,16 +1,28 @@
 from typing import Optional, List, Literal, Optional
 from datetime import datetime
+from uuid import UUID
 from sqlmodel import SQLModel
 from pydantic import ConfigDict
 
+from app.models.user import UserRole
+
 
 # Types
 AuthProvider = Literal["email", "google", "microsoft"]
 
 
 # Base Schemas
+class TokenCustomerClaim(SQLModel):
+    role: UserRole
+    status: str
+    campaign_ids: List[UUID] = []
+
 class TokenPayload(SQLModel):
     sub: str | None = None
+    # Stateless authorization claims (only in tokens created with STATELESS_AUTH)
+    sid: str | None = None                              # User session, checked against the revocation store
+    su: bool = False                                    # Superuser
+    cus: dict[str, TokenCustomerClaim] | None = None    # Memberships by customer id
 
 
 # Input Schemas
@@ -32,6 +44,7 @@ class AccessRefreshTokenResponse(SQLModel):
 
 class RefreshTokenResponse(SQLModel):
     access_token: str
+    refresh_token: Optional[str] = None     # Only with REFRESH_TOKEN_ROTATION, replaces the used refresh token
 
 class RedirectURLResponse(SQLModel):
     redirect_url: str
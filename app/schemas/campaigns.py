@@ -41,6 +41,35 @@ class UpdateCampaign(SQLModel):
     advertisements: List[Advertisement]
 
 
+class CreateAdvertisement(SQLModel):
+    """
+    Create Advertisement Input Format.
+    """
+    name: str
+    description: Optional[str] = None
+    budget: Optional[float] = None
+    target_gender: Optional[CampaignTargetGender] = None
+    target_age_min: Optional[int] = None
+    target_age_max: Optional[int] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    observation: Optional[str] = None
+
+
+class UpdateAdvertisement(CreateAdvertisement):
+    """
+    Update Advertisement Input Format (replaces every field of the advertisement).
+    """
+
+
+class BulkUpdateAdvertisements(SQLModel):
+    """
+    Bulk Advertisements Input Format.
+    """
+    upsert: List[CreateAdvertisement] = []  # Created, or updated when the campaign has an advertisement with the same name
+    delete: List[UUID] = []  # Ids of the advertisements to delete
+
+
 # Response Schemas
 class CampaignResponse(SQLModel):
     id: UUID
@@ -64,3 +93,19 @@ class CampaignResponse(SQLModel):
     advertisements: List[Advertisement]
 
 
+
+
+class AdvertisementResponse(SQLModel):
+    id: UUID
+    campaign_id: UUID
+    name: str
+    description: Optional[str] = None
+    budget: Optional[float] = None
+    target_gender: Optional[CampaignTargetGender] = None
+    target_age_min: Optional[int] = None
+    target_age_max: Optional[int] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    observation: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
@@ -29,3 +29,4 @@ class UserResponse(SQLModel):
     status: str
     role: str
     campaign_ids: List[UUID] = []
+    linked_at: Optional[datetime] = None  # When the user was linked to the customer, the list sort key
@@ -1,17 +1,18 @@
 from datetime import datetime, timezone
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models import UserSession, User, Customer
+from app.crud.aio.user import retrieve_user_customer_link
 from app.exceptions import auth as AuthExceptions
 
 
-def verify_request_user_customer(session: Session, user: User, customer: Customer) -> None:
+async def verify_request_user_customer(session: AsyncSession, user: User, customer: Customer) -> None:
     """
     Validates the request by checking the provided user and customer details.
 
     Args:
-        session (Session): The database session used for checking user active status.
+        session (AsyncSession): The database session used for checking user active status.
         user (User): The user object representing the requester.
         customer (Customer): The customer object to which access is being verified.
 
@@ -37,12 +38,18 @@ def verify_request_user_customer(session: Session, user: User, customer: Custome
     elif customer.subdomain == "admin":
         if not user.is_superuser:
             raise AuthExceptions.UserNotSuperuserException()
-        
-    # Verify user access to the customer
-    elif not user.has_access_to_customer(customer.id):
-        raise AuthExceptions.UserHasNoAccessToCustomerException()
-    elif not user.is_active(session, customer.id):
-        raise AuthExceptions.UserNotActiveException()
+
+    # Superuser has access to all customers and is always active
+    elif user.is_superuser:
+        pass
+
+    # Verify user access to the customer (a single link lookup instead of lazy loading every customer)
+    else:
+        user_link = await retrieve_user_customer_link(session=session, user=user, customer=customer)
+        if not user_link:
+            raise AuthExceptions.UserHasNoAccessToCustomerException()
+        elif user_link.status != "active":
+            raise AuthExceptions.UserNotActiveException()
     
     
 def verify_request_customer(customer: Customer) -> None:
@@ -51,14 +58,13 @@ def verify_request_customer(customer: Customer) -> None:
         raise AuthExceptions.CustomerNotFoundException()
     
 
-def validate_refresh_token(user_id: UUID, user_session: UserSession, refresh_token: str) -> None:
+def validate_refresh_token(user_id: UUID, user_session: UserSession) -> None:
     """
     Validates that the provided refresh token is correct and belongs to the user session.
 
     Args:
         user_id (UUID): The user id.
-        user_session (UserSession): The user session of the user.
-        refresh_token (str): The refresh token.
+        user_session (UserSession): The user session found by the refresh token hash.
 
     Raises:
         InvalidRefreshTokenException: If the token is invalid.
@@ -70,7 +76,7 @@ def validate_refresh_token(user_id: UUID, user_session: UserSession, refresh_tok
     if not user_id:
         raise AuthExceptions.InvalidRefreshTokenException()
     
-    if not user_session or user_session.user_id != UUID(user_id) or user_session.refresh_token != refresh_token:
+    if not user_session or user_session.user_id != UUID(user_id):
         raise AuthExceptions.TokenNotFoundException()
     
     if user_session.is_revoked:
@@ -1,15 +1,15 @@
-from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.exceptions import campaigns as CampaignExceptions
-from app.schemas.campaigns import CreateCampaign, UpdateCampaign
+from app.schemas.campaigns import CreateCampaign, UpdateCampaign, CreateAdvertisement
 from app.models import Campaign, Customer
-from app.crud.campaign import retrieve_campaign_by_name
+from app.crud.aio.campaign import retrieve_campaign_by_name
 
 
-def validate_create_campaign_input(session: Session, campaign_input: CreateCampaign, customer: Customer):
+async def validate_create_campaign_input(session: AsyncSession, campaign_input: CreateCampaign, customer: Customer):
     """
     Validates the input for creating a new campaign.
     Args:
-        session (Session): The database session to use for queries.
+        session (AsyncSession): The database session to use for queries.
         campaign_input (CreateCampaign): The input data for the new campaign.
         customer (Customer): The customer creating the campaign.
     Raises:
@@ -21,7 +21,7 @@ def validate_create_campaign_input(session: Session, campaign_input: CreateCampa
     if len(campaign_input.name) < 3 or not campaign_input.name.isascii():
         raise CampaignExceptions.InvalidCampaignNameException()
 
-    if retrieve_campaign_by_name(session=session, customer_id=customer.id, campaign_name=campaign_input.name):
+    if await retrieve_campaign_by_name(session=session, customer_id=customer.id, campaign_name=campaign_input.name):
         raise CampaignExceptions.CampaignAlreadyExistsException()
 
     # Validate campaign dates
@@ -29,11 +29,11 @@ def validate_create_campaign_input(session: Session, campaign_input: CreateCampa
         raise CampaignExceptions.InvalidCampaignEndDateException()
 
 
-def validate_update_campaign_input(session: Session, campaign_input: UpdateCampaign, customer: Customer, campaign: Campaign):
+def validate_update_campaign_input(session: AsyncSession, campaign_input: UpdateCampaign, customer: Customer, campaign: Campaign):
     """
     Validates the input for updating a campaign.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         campaign_input (UpdateCampaign): The input data for updating the campaign.
         customer (Customer): The customer associated with the campaign.
         campaign (Campaign): The campaign to be updated.
@@ -48,4 +48,17 @@ def validate_update_campaign_input(session: Session, campaign_input: UpdateCampa
     # Check if the campaign end date is valid
     if campaign_input.end_date:
         if campaign_input.end_date.replace(tzinfo=None) <= campaign.start_date.replace(tzinfo=None):
-            raise CampaignExceptions.InvalidCampaignEndDateException()
\ No newline at end of file
+            raise CampaignExceptions.InvalidCampaignEndDateException()
+
+
+def validate_advertisement_input(advertisement_input: CreateAdvertisement):
+    """
+    Validates the input for creating or updating an advertisement.
+    Args:
+        advertisement_input (CreateAdvertisement): The input data of the advertisement.
+    Raises:
+        CampaignExceptions.InvalidAdvertisementNameException: If the advertisement name is empty.
+    """
+    # Validate advertisement name
+    if not advertisement_input.name.strip():
+        raise CampaignExceptions.InvalidAdvertisementNameException()
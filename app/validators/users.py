@@ -1,16 +1,16 @@
 import re
-from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.exceptions import users as UserExceptions, campaigns as CampaignExceptions
 from app.schemas.users import CreateUser, UpdateUser
 from app.models import Customer, UserRole
-from app.crud.campaign import retrieve_customer_campaigns
+from app.crud.aio.campaign import retrieve_missing_customer_campaign_ids
 
 
-def validate_create_user_input(session: Session, user_input: CreateUser, customer: Customer) -> None:
+async def validate_create_user_input(session: AsyncSession, user_input: CreateUser, customer: Customer) -> None:
     """
     Validates the input provided for creating a new user.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         user_input (CreateUser): The input data for the new user.
         customer (Customer): The customer to which the user will be associated.
     Raises:
@@ -32,18 +32,15 @@ def validate_create_user_input(session: Session, user_input: CreateUser, custome
             raise UserExceptions.InvalidUserRoleRequirementsException()
 
         # Validate campaign association
-        customer_campaigns = retrieve_customer_campaigns(session=session, customer_id=customer.id)
-        customer_campaign_ids = [campaign.id for campaign in customer_campaigns]
-        for campaign_id in user_input.campaign_ids:
-            if campaign_id not in customer_campaign_ids:
-                raise CampaignExceptions.CampaignNotAssociatedException()
+        if await retrieve_missing_customer_campaign_ids(session=session, customer_id=customer.id, campaign_ids=user_input.campaign_ids):
+            raise CampaignExceptions.CampaignNotAssociatedException()
 
 
-def validate_update_user_input(session: Session, user_input: UpdateUser, customer: Customer) -> None:
+async def validate_update_user_input(session: AsyncSession, user_input: UpdateUser, customer: Customer) -> None:
     """
     Validates the input provided for updating a user.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         user_input (UpdateUser): The input data for the updated user.
         customer (Customer): The customer to which the user will be associated.
     Raises:
@@ -56,9 +53,6 @@ def validate_update_user_input(session: Session, user_input: UpdateUser, custome
             raise UserExceptions.InvalidUserRoleRequirementsException()
 
         # Validate campaign association
-        customer_campaigns = retrieve_customer_campaigns(session=session, customer_id=customer.id)
-        customer_campaign_ids = [campaign.id for campaign in customer_campaigns]
-        for campaign_id in user_input.campaign_ids:
-            if campaign_id not in customer_campaign_ids:
-                raise CampaignExceptions.CampaignNotAssociatedException()
+        if await retrieve_missing_customer_campaign_ids(session=session, customer_id=customer.id, campaign_ids=user_input.campaign_ids):
+            raise CampaignExceptions.CampaignNotAssociatedException()
 
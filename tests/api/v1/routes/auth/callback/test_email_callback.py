@@ -1,11 +1,14 @@
 from sqlmodel import select
 from fastapi.testclient import TestClient
 
+from app.core.security.token import hash_token
 from app.models import UserSession
 from app.models.user import UserRole
 from app.schemas.auth import CallbackAuthInput, AccessRefreshTokenResponse
 from app.crud.user.user_session import retrieve_user_session_by_magic_link_token
 
+from tests.config.populate_db import MAGIC_LINK_TOKENS
+
 CALLBACK_EMAIL_PATH = "/v1/auth/callback/email"
 
 # Unit tests
@@ -46,17 +49,34 @@ def test_email_callback(auth_client, db) -> None:
     assert len(content["access_token"]) > 4
     assert len(content["refresh_token"]) > 4
 
+def test_email_callback_single_use(auth_client, db) -> None:
+    client = auth_client(UserRole.MANAGER)
+    body = create_callback_email_input(db)
+    response = client.post(CALLBACK_EMAIL_PATH, json=body)
+    assert response.status_code == 200
+    response = client.post(CALLBACK_EMAIL_PATH, json=body)
+    content = response.json()
+    assert response.status_code == 401
+    assert content["detail"] == "Token has been used."
+
+def test_email_callback_refresh_token(auth_client, db) -> None:
+    client = auth_client(UserRole.MANAGER)
+    response = client.post(CALLBACK_EMAIL_PATH, json=create_callback_email_input(db))
+    refresh_token = response.json()["refresh_token"]
+    response = client.post("/v1/auth/refresh", headers={"Authorization": f"Bearer {refresh_token}"})
+    assert response.status_code == 200
+
 
 # Integration tests
 def test_email_callback_integration(auth_client, db) -> None:
     client = auth_client(UserRole.MANAGER)
     body = create_callback_email_input(db)
     _response = client.post(CALLBACK_EMAIL_PATH, json=body)
-    user_session = retrieve_user_session_by_magic_link_token(session=db, magic_link_token=body["token"])
-    assert user_session.magic_link_token is not None
+    user_session = retrieve_user_session_by_magic_link_token(session=db, magic_link_token_hash=hash_token(body["token"]))
+    assert user_session.magic_link_token_hash is not None
     assert user_session.magic_link_used_at is not None
     assert user_session.magic_link_expires_at is not None
-    assert user_session.refresh_token is not None
+    assert user_session.refresh_token_hash is not None
     assert user_session.last_used is not None
 
 
@@ -74,14 +94,16 @@ def test_authenticated_user(auth_client, db) -> None:
 
 # Helper functions
 def create_callback_email_input(session) -> CallbackAuthInput:
-    user_session = session.exec(
+    # Magic links are single use, take one that wasn't redeemed yet
+    user_sessions = session.exec(
         select(UserSession)
         .where(UserSession.magic_link_used_at == None)
-        .where(UserSession.magic_link_token != None)
-    ).first()
+        .where(UserSession.magic_link_token_hash.in_(list(MAGIC_LINK_TOKENS)))
+        .where(UserSession.is_revoked == False)
+    ).all()
 
     return CallbackAuthInput(
-        token=user_session.magic_link_token if user_session else "test_token",
+        token=MAGIC_LINK_TOKENS[user_sessions[0].magic_link_token_hash] if user_sessions else "test_token",
         customer_subdomain="test-customer-0",
         callback_url=None,
     ).model_dump(mode="json")
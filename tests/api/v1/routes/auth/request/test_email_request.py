@@ -1,8 +1,9 @@
 import pytest
 from unittest.mock import patch
 from fastapi.testclient import TestClient
+from sqlmodel import select
 
-from app.models.user import UserRole, SuperUserRole
+from app.models.user import UserRole, SuperUserRole, UserSessionRevocation
 from app.schemas.auth import RequestAuthInput, RedirectURLResponse
 from app.crud.user.user_session import retrieve_user_sessions_by_user_id
 from app.crud.user import get_user_by_email
@@ -88,11 +89,37 @@ def test_email_request_integration(auth_client, db, patch_email_if_unavailable)
     user = get_user_by_email(session=db, email=body["email"])
     user_sessions = retrieve_user_sessions_by_user_id(session=db, user_id=user.id)
     assert len(user_sessions) >= 1
-    assert user_sessions[-1].magic_link_token is not None
+    assert user_sessions[-1].magic_link_token_hash is not None
     assert user_sessions[-1].magic_link_requested_at is not None
     assert user_sessions[-1].magic_link_used_at is None
     assert user_sessions[-1].magic_link_expires_at is not None
-    assert user_sessions[-1].refresh_token is not None
+    assert user_sessions[-1].refresh_token_hash is not None
+
+def test_email_request_revokes_previous_sessions(auth_client, db, patch_email_if_unavailable) -> None:
+    client = auth_client(UserRole.MANAGER)
+    body = create_request_email_input()
+    client.post(REQUEST_EMAIL_PATH, json=body)
+    user = get_user_by_email(session=db, email=body["email"])
+    previous_session_ids = {user_session.id for user_session in retrieve_user_sessions_by_user_id(session=db, user_id=user.id) if not user_session.is_revoked}
+
+    response = client.post(REQUEST_EMAIL_PATH, json=body)
+    assert response.status_code == 200
+    db.expire_all()
+    user_sessions = retrieve_user_sessions_by_user_id(session=db, user_id=user.id)
+    active_sessions = [user_session for user_session in user_sessions if not user_session.is_revoked]
+    assert len(active_sessions) == 1
+    assert active_sessions[0].id not in previous_session_ids
+    revoked_session_ids = set(db.exec(select(UserSessionRevocation.session_id).where(UserSessionRevocation.user_id == user.id)).all())
+    assert previous_session_ids <= revoked_session_ids
+
+def test_email_request_query_count(auth_client, assert_max_queries, patch_email_if_unavailable) -> None:
+    client = auth_client(UserRole.MANAGER)
+    body = create_request_email_input()
+    client.post(REQUEST_EMAIL_PATH, json=body)
+    # Constant whatever the number of past sessions of the user
+    with assert_max_queries(4, max_repeats=1):
+        response = client.post(REQUEST_EMAIL_PATH, json=body)
+    assert response.status_code == 200
 
 
 # Authorization tests
@@ -1,7 +1,11 @@
+import time
+
 from fastapi.testclient import TestClient
 
 from app.models.user import UserRole, SuperUserRole
 from app.schemas.auth import MyUserResponse
+from app.crud.user import get_user_by_email
+from app.core.config import settings
 
 ME_PATH = "/v1/auth/me"
 
@@ -18,6 +22,47 @@ def test_me_endpoint(auth_client) -> None:
     assert content["customers"][0]["role"] == UserRole.MANAGER
 
 
+# Response cache tests
+def test_me_response_cache(auth_client, assert_max_queries, memory_response_cache) -> None:
+    client = auth_client(UserRole.ANALYST)
+    first_response = client.get(ME_PATH)
+    with assert_max_queries(2) as stats:
+        response = client.get(ME_PATH)
+    assert response.headers["X-Cache"] == "HIT"
+    assert response.json() == first_response.json()
+    assert not any("JOIN customers" in statement for statement in stats.statements)
+
+def test_me_response_cache_invalidation(db, auth_client, memory_response_cache) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    visitor_client = auth_client(UserRole.VISITOR)
+    user = get_user_by_email(session=db, email=visitor_client.get(ME_PATH).json()["email"])
+    update_response = manager_client.put(f"/v1/users/test-customer-0/{user.id}", json={
+        "role": UserRole.VISITOR,
+        "campaign_ids": ["00000000-0000-0000-0000-000000000001"],
+    })
+    response = visitor_client.get(ME_PATH)
+    assert update_response.status_code == 200
+    assert response.headers["X-Cache"] == "MISS"
+
+
+def test_me_stale_if_error(client, stateless_auth_token, memory_response_cache, database_unavailable, monkeypatch) -> None:
+    monkeypatch.setattr(memory_response_cache, "ttl", 0.01)
+    monkeypatch.setattr(memory_response_cache, "stale_ttl", 60)
+    # Only tokens carrying their session are authenticated without the database
+    monkeypatch.setattr(settings, "STATELESS_AUTH", True)
+    _, token = stateless_auth_token(UserRole.ANALYST)
+    monkeypatch.setattr(settings, "STATELESS_AUTH", False)
+    client = TestClient(client.app, headers={"Authorization": token})
+    first_response = client.get(ME_PATH)
+    time.sleep(0.02)
+
+    database_unavailable()
+    response = client.get(ME_PATH)
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "STALE"
+    assert response.json() == first_response.json()
+
+
 # Authorization tests
 def test_non_authenticated_user(client) -> None:
     client = TestClient(client.app)
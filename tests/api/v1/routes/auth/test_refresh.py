@@ -1,7 +1,10 @@
+from datetime import date, timedelta
 from fastapi.testclient import TestClient
-from sqlmodel import select
 
+from app.core.config import settings
+from app.core.security.token import create_refresh_token, hash_token
 from app.models import UserSession
+from app.models.user import UserRole
 from app.schemas.auth import RefreshTokenResponse
 
 REFRESH_PATH = "/v1/auth/refresh"
@@ -15,31 +18,44 @@ def test_refresh_endpoint_invalid_token(client) -> None:
     assert isinstance(content, dict)
     assert content["detail"] == "Invalid refresh token."
 
-def test_refresh_endpoint_revoked(client, db) -> None:
-    user_session = db.exec(
-        select(UserSession)
-        .where(UserSession.is_revoked == True)
-        .where(UserSession.refresh_token.is_not(None))
-    ).first()
+def test_refresh_endpoint_revoked(client, db, create_user) -> None:
+    refresh_token = create_refresh_token_session(db, create_user, is_revoked=True)
     client = TestClient(client.app)
-    response = client.post(REFRESH_PATH, headers={"Authorization": f"Bearer {user_session.refresh_token}"})
+    response = client.post(REFRESH_PATH, headers={"Authorization": f"Bearer {refresh_token}"})
     content = response.json()
     assert response.status_code == 401
     assert content["detail"] == "Token has been revoked."
 
-def test_refresh_endpoint(client, db) -> None:
-    user_session = db.exec(
-        select(UserSession)
-        .where(UserSession.is_revoked == False)
-        .where(UserSession.refresh_token.is_not(None))
-    ).first()
+def test_refresh_endpoint_not_found(client) -> None:
     client = TestClient(client.app)
-    response = client.post(REFRESH_PATH, headers={"Authorization": f"Bearer {user_session.refresh_token}"})
+    response = client.post(REFRESH_PATH, headers={"Authorization": f"Bearer {create_refresh_token('00000000-0000-0000-0000-000000000009')}"})
+    content = response.json()
+    assert response.status_code == 404
+    assert content["detail"] == "Token not found."
+
+def test_refresh_endpoint(client, db, create_user) -> None:
+    refresh_token = create_refresh_token_session(db, create_user)
+    client = TestClient(client.app)
+    response = client.post(REFRESH_PATH, headers={"Authorization": f"Bearer {refresh_token}"})
     content = response.json()
     assert response.status_code == 200
     assert isinstance(content, dict)
     assert set(RefreshTokenResponse.model_fields.keys()).issubset(content.keys())
     assert len(content["access_token"]) > 4
+    assert content["refresh_token"] is None
+
+def test_refresh_endpoint_rotation(client, db, create_user, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "REFRESH_TOKEN_ROTATION", True)
+    refresh_token = create_refresh_token_session(db, create_user)
+    client = TestClient(client.app)
+    response = client.post(REFRESH_PATH, headers={"Authorization": f"Bearer {refresh_token}"})
+    content = response.json()
+    assert response.status_code == 200
+    assert content["refresh_token"] and content["refresh_token"] != refresh_token
+    response = client.post(REFRESH_PATH, headers={"Authorization": f"Bearer {refresh_token}"})
+    assert response.status_code == 404
+    response = client.post(REFRESH_PATH, headers={"Authorization": f"Bearer {content['refresh_token']}"})
+    assert response.status_code == 200
 
 
 # Authorization tests
@@ -50,3 +66,17 @@ def test_non_authenticated_user(client) -> None:
     assert response.status_code == 401
     assert content["detail"] == "The user is not authenticated."
 
+
+
+# Helper functions
+def create_refresh_token_session(db, create_user, is_revoked: bool = False) -> str:
+    user = create_user(UserRole.MANAGER)
+    refresh_token = create_refresh_token(user.id)
+    db.add(UserSession(
+        user_id=user.id,
+        refresh_token_hash=hash_token(refresh_token),
+        expires_at=date.today() + timedelta(days=10),
+        is_revoked=is_revoked,
+    ))
+    db.commit()
+    return refresh_token
@@ -1,5 +1,8 @@
+import hashlib
 from fastapi.testclient import TestClient
 
+from app.core.cache import MISSING
+from app.core.revocation import verified_token_cache
 from app.models.user import UserRole, SuperUserRole
 from app.schemas import Message
 
@@ -19,6 +22,15 @@ def test_signout(auth_client) -> None:
     assert response2.status_code == 401
     assert content2["detail"] == "The user is not authenticated."
 
+def test_signout_evicts_cached_token(auth_client) -> None:
+    client = auth_client(UserRole.MANAGER)
+    token_digest = hashlib.sha256(client.headers["Authorization"].split(" ")[1].encode()).digest()
+    assert client.get("/v1/auth/me").status_code == 200
+    assert verified_token_cache.get(token_digest) is not MISSING
+    response = client.post(SIGNOUT_PATH)
+    assert response.status_code == 200
+    assert verified_token_cache.get(token_digest) is MISSING
+
 
 # Authorization tests
 def test_non_authenticated_user(client) -> None:
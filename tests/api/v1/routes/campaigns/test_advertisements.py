@@ -0,0 +1,170 @@
+import random
+from uuid import UUID
+
+from app.models.campaign import Advertisement
+from app.models.user import UserRole, SuperUserRole
+from app.schemas.campaigns import AdvertisementResponse, CreateAdvertisement
+
+from fastapi.testclient import TestClient
+
+ADVERTISEMENTS_PATH = "/v1/campaigns/test-customer-0/00000000-0000-0000-0000-000000000001/advertisements"
+ADVERTISEMENT_PATH = lambda id: f"{ADVERTISEMENTS_PATH}/{id}"
+
+# Unit tests
+def test_create_advertisement(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    advertisement_input = create_advertisement_input()
+    response = manager_client.post(ADVERTISEMENTS_PATH, json=advertisement_input)
+    content = response.json()
+    assert response.status_code == 200
+    assert AdvertisementResponse(**content)
+    assert content["name"] == advertisement_input["name"]
+    assert content["budget"] == advertisement_input["budget"]
+
+def test_create_advertisement_already_exists(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    advertisement_input = create_advertisement_input()
+    manager_client.post(ADVERTISEMENTS_PATH, json=advertisement_input)
+    response = manager_client.post(ADVERTISEMENTS_PATH, json=advertisement_input)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "An advertisement with this name already exists for that campaign."
+
+def test_create_advertisement_invalid_name(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    advertisement_input = create_advertisement_input()
+    advertisement_input["name"] = " "
+    response = manager_client.post(ADVERTISEMENTS_PATH, json=advertisement_input)
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Invalid advertisement name."
+
+def test_create_advertisement_campaign_not_found(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    response = manager_client.post(ADVERTISEMENTS_PATH.replace("000000000001", "000000000404"), json=create_advertisement_input())
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Campaign not found."
+
+def test_list_advertisements(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    advertisement = manager_client.post(ADVERTISEMENTS_PATH, json=create_advertisement_input()).json()
+    response = manager_client.get(ADVERTISEMENTS_PATH)
+    content = response.json()
+    assert response.status_code == 200
+    assert advertisement["id"] in [item["id"] for item in content]
+    for item in content:
+        assert set(AdvertisementResponse.model_fields.keys()).issubset(item.keys())
+
+def test_update_advertisement(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    advertisement = manager_client.post(ADVERTISEMENTS_PATH, json=create_advertisement_input()).json()
+    advertisement_input = create_advertisement_input()
+    response = manager_client.put(ADVERTISEMENT_PATH(advertisement["id"]), json=advertisement_input)
+    content = response.json()
+    assert response.status_code == 200
+    assert content["id"] == advertisement["id"]
+    assert content["name"] == advertisement_input["name"]
+    assert content["description"] == advertisement_input["description"]
+
+def test_update_advertisement_not_found(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    response = manager_client.put(ADVERTISEMENT_PATH("00000000-0000-0000-0000-000000000404"), json=create_advertisement_input())
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Advertisement not found."
+
+def test_delete_advertisement(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    advertisement = manager_client.post(ADVERTISEMENTS_PATH, json=create_advertisement_input()).json()
+    response = manager_client.delete(ADVERTISEMENT_PATH(advertisement["id"]))
+    assert response.status_code == 200
+    assert response.json()["message"] == "Advertisement deleted successfully."
+    assert advertisement["id"] not in [item["id"] for item in manager_client.get(ADVERTISEMENTS_PATH).json()]
+    response = manager_client.delete(ADVERTISEMENT_PATH(advertisement["id"]))
+    assert response.status_code == 404
+
+def test_bulk_update_advertisements(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    updated = manager_client.post(ADVERTISEMENTS_PATH, json=create_advertisement_input()).json()
+    deleted = manager_client.post(ADVERTISEMENTS_PATH, json=create_advertisement_input()).json()
+    untouched = manager_client.post(ADVERTISEMENTS_PATH, json=create_advertisement_input()).json()
+    created_input = create_advertisement_input()
+    response = manager_client.patch(ADVERTISEMENTS_PATH, json={
+        "upsert": [created_input, {**create_advertisement_input(), "name": updated["name"], "budget": 42}],
+        "delete": [deleted["id"]],
+    })
+    content = response.json()
+    assert response.status_code == 200
+    assert {item["name"] for item in content} == {created_input["name"], updated["name"]}
+    upserted = next(item for item in content if item["name"] == updated["name"])
+    assert upserted["id"] == updated["id"]
+    assert upserted["budget"] == 42
+    advertisement_ids = [item["id"] for item in manager_client.get(ADVERTISEMENTS_PATH).json()]
+    assert deleted["id"] not in advertisement_ids
+    assert untouched["id"] in advertisement_ids
+
+
+def test_advertisement_updates_in_utc(auth_client, db, local_timezone_behind_utc) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    updated = manager_client.post(ADVERTISEMENTS_PATH, json=create_advertisement_input()).json()
+    upserted = manager_client.post(ADVERTISEMENTS_PATH, json=create_advertisement_input()).json()
+    manager_client.put(ADVERTISEMENT_PATH(updated["id"]), json=create_advertisement_input())
+    manager_client.patch(ADVERTISEMENTS_PATH, json={"upsert": [{**create_advertisement_input(), "name": upserted["name"]}], "delete": []})
+    for advertisement_id in (updated["id"], upserted["id"]):
+        advertisement = db.get(Advertisement, UUID(advertisement_id))
+        assert advertisement.updated_at > advertisement.created_at
+
+
+# Query budget tests
+def test_update_advertisement_query_count(auth_client, assert_max_queries) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    advertisement = manager_client.post(ADVERTISEMENTS_PATH, json=create_advertisement_input()).json()
+    with assert_max_queries(4, max_repeats=1):
+        response = manager_client.put(ADVERTISEMENT_PATH(advertisement["id"]), json=create_advertisement_input())
+    assert response.status_code == 200
+
+
+# Authorization tests
+def test_non_authenticated_user(client) -> None:
+    client = TestClient(client.app)
+    response = client.get(ADVERTISEMENTS_PATH)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "The user is not authenticated."
+
+def test_not_authorized_user(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    response = manager_client.post(ADVERTISEMENTS_PATH.replace("test-customer-0", "test-customer-1"), json=create_advertisement_input())
+    assert response.status_code == 403
+    assert response.json()["detail"] == "The user has no access to this customer."
+
+def test_analyst_user(auth_client) -> None:
+    analyst_client = auth_client(UserRole.ANALYST)
+    response = analyst_client.post(ADVERTISEMENTS_PATH, json=create_advertisement_input())
+    assert response.status_code == 200
+
+def test_operation_user(auth_client) -> None:
+    operation_client = auth_client(UserRole.OPERATION)
+    response = operation_client.post(ADVERTISEMENTS_PATH, json=create_advertisement_input())
+    assert response.status_code == 403
+    assert response.json()["detail"] == "The user is not allowed to perform this action."
+
+def test_visitor_user(auth_client) -> None:
+    visitor_client = auth_client(UserRole.VISITOR)
+    response = visitor_client.get(ADVERTISEMENTS_PATH)
+    assert response.status_code == 403
+    assert response.json()["detail"] == "The user has no access to this campaign."
+    response = visitor_client.post(ADVERTISEMENTS_PATH, json=create_advertisement_input())
+    assert response.status_code == 403
+    assert response.json()["detail"] == "The user is not allowed to perform this action."
+
+def test_superuser(superuser_client) -> None:
+    superuser_client = superuser_client(SuperUserRole.STAFF)
+    response = superuser_client.get(ADVERTISEMENTS_PATH)
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+
+
+# Helper functions
+def create_advertisement_input() -> CreateAdvertisement:
+    return CreateAdvertisement(
+        name=f"Test Advertisement {random.random()}",
+        description="Test Description",
+        budget=int(random.random()*1000),
+    ).model_dump(mode="json")
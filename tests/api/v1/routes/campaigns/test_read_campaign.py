@@ -0,0 +1,102 @@
+from email.utils import parsedate_to_datetime
+
+from app.models.user import UserRole, SuperUserRole
+from app.schemas.campaigns import CampaignResponse
+
+from fastapi.testclient import TestClient
+
+READ_CAMPAIGN_PATH = lambda id: f"/v1/campaigns/test-customer-0/00000000-0000-0000-0000-00000000{str(id).zfill(4)}"
+
+# Unit tests
+def test_read_campaign(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    response = manager_client.get(READ_CAMPAIGN_PATH(1))
+    content = response.json()
+    assert response.status_code == 200
+    assert CampaignResponse(**content)
+    assert content["id"] == "00000000-0000-0000-0000-000000000001"
+    assert response.headers["ETag"].startswith('W/"')
+    assert response.headers["Last-Modified"].endswith("GMT")
+
+def test_read_campaign_not_found(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    response = manager_client.get(READ_CAMPAIGN_PATH(404))
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Campaign not found."
+
+def test_read_campaign_of_other_customer(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    response = manager_client.get(READ_CAMPAIGN_PATH(1000))
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Campaign not found."
+
+
+# Conditional requests tests
+def test_read_campaign_if_none_match(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    etag = manager_client.get(READ_CAMPAIGN_PATH(1)).headers["ETag"]
+    response = manager_client.get(READ_CAMPAIGN_PATH(1), headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+def test_read_campaign_if_modified_since(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    last_modified = manager_client.get(READ_CAMPAIGN_PATH(1)).headers["Last-Modified"]
+    response = manager_client.get(READ_CAMPAIGN_PATH(1), headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+    response = manager_client.get(READ_CAMPAIGN_PATH(1), headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+    assert response.status_code == 200
+
+def test_read_campaign_etag_changes_with_advertisements(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    etag = manager_client.get(READ_CAMPAIGN_PATH(1)).headers["ETag"]
+    manager_client.post(f"{READ_CAMPAIGN_PATH(1)}/advertisements", json={"name": "ETag Advertisement"})
+    response = manager_client.get(READ_CAMPAIGN_PATH(1), headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert "ETag Advertisement" in [ad["name"] for ad in response.json()["advertisements"]]
+
+
+def test_read_campaign_last_modified_after_advertisement_write(auth_client, local_timezone_behind_utc) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    last_modified = manager_client.get(READ_CAMPAIGN_PATH(1)).headers["Last-Modified"]
+    manager_client.post(f"{READ_CAMPAIGN_PATH(1)}/advertisements", json={"name": "Last-Modified Advertisement"})
+    response = manager_client.get(READ_CAMPAIGN_PATH(1))
+    assert parsedate_to_datetime(response.headers["Last-Modified"]) >= parsedate_to_datetime(last_modified)
+
+
+# Authorization tests
+def test_non_authenticated_user(client) -> None:
+    client = TestClient(client.app)
+    response = client.get(READ_CAMPAIGN_PATH(1))
+    assert response.status_code == 401
+    assert response.json()["detail"] == "The user is not authenticated."
+
+def test_not_authorized_user(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    response = manager_client.get(READ_CAMPAIGN_PATH(1).replace("test-customer-0", "test-customer-1"))
+    assert response.status_code == 403
+    assert response.json()["detail"] == "The user has no access to this customer."
+
+def test_analyst_user(auth_client) -> None:
+    analyst_client = auth_client(UserRole.ANALYST)
+    response = analyst_client.get(READ_CAMPAIGN_PATH(1))
+    assert response.status_code == 200
+
+def test_operation_user(auth_client) -> None:
+    operation_client = auth_client(UserRole.OPERATION)
+    response = operation_client.get(READ_CAMPAIGN_PATH(1))
+    assert response.status_code == 403
+    assert response.json()["detail"] == "The user is not allowed to perform this action."
+
+def test_visitor_user(auth_client) -> None:
+    visitor_client = auth_client(UserRole.VISITOR)
+    response = visitor_client.get(READ_CAMPAIGN_PATH(1))
+    assert response.status_code == 403
+    assert response.json()["detail"] == "The user has no access to this campaign."
+
+def test_superuser(superuser_client) -> None:
+    superuser_client = superuser_client(SuperUserRole.STAFF)
+    response = superuser_client.get(READ_CAMPAIGN_PATH(1))
+    assert response.status_code == 200
@@ -1,9 +1,22 @@
-from app.models.user import UserRole, SuperUserRole
+import base64
+import json
+import random
+import time
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlmodel import select
+
+from app.models.user import UserRole, SuperUserRole, UserSession, UserSessionRevocation
 from app.schemas.campaigns import CampaignResponse
 from app.schemas.users import UpdateUser
 from app.crud.campaign import retrieve_customer_campaigns
 from app.crud.customer import get_customer_by_subdomain
 from app.crud.user import update_user_customer_link, get_user_by_email
+from app.crud.user.user_session import revoke_user_sessions
+from app.core.config import settings
+from app.core.deps import decode_access_token
+from app.core.revocation import revoke_sessions
 
 from fastapi.testclient import TestClient
 
@@ -34,6 +47,291 @@ def test_list_visitor_campaigns(db, auth_client) -> None:
     assert isinstance(content, list)
     assert len(content) > 0
 
+def test_list_visitor_campaigns_only_allowed(db, auth_client) -> None:
+    visitor_client = auth_client(UserRole.VISITOR)
+    customer = get_customer_by_subdomain(session=db, customer_subdomain="test-customer-0")
+    user_response = visitor_client.get("/v1/auth/me").json()
+    user = get_user_by_email(session=db, email=user_response["email"])
+    campaigns = retrieve_customer_campaigns(session=db, customer_id=customer.id)
+    update_user_input = UpdateUser(email=user.email, role=UserRole.VISITOR, campaign_ids=[campaigns[1].id])
+    update_user_customer_link(session=db, user=user, customer=customer, user_input=update_user_input)
+    response = visitor_client.get("/v1/campaigns/test-customer-0")
+    content = response.json()
+    assert response.status_code == 200
+    assert [item["id"] for item in content] == [str(campaigns[1].id)]
+
+def test_list_visitor_campaigns_after_role_change(db, auth_client) -> None:
+    visitor_client = auth_client(UserRole.VISITOR)
+    customer = get_customer_by_subdomain(session=db, customer_subdomain="test-customer-0")
+    user_response = visitor_client.get("/v1/auth/me").json()
+    user = get_user_by_email(session=db, email=user_response["email"])
+    campaigns = retrieve_customer_campaigns(session=db, customer_id=customer.id)
+    update_user_input = UpdateUser(email=user.email, role=UserRole.VISITOR, campaign_ids=[campaigns[0].id])
+    update_user_customer_link(session=db, user=user, customer=customer, user_input=update_user_input)
+    assert visitor_client.get("/v1/campaigns/test-customer-0").status_code == 200
+    update_user_input = UpdateUser(email=user.email, role=UserRole.VISITOR, campaign_ids=[campaigns[1].id])
+    update_user_customer_link(session=db, user=user, customer=customer, user_input=update_user_input)
+    response = visitor_client.get("/v1/campaigns/test-customer-0")
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == [str(campaigns[1].id)]
+
+
+# Pagination tests
+def test_list_campaigns_pages(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    all_ids = [item["id"] for item in manager_client.get("/v1/campaigns/test-customer-0").json()]
+    page_ids, cursor = [], None
+    while True:
+        params = {"limit": 1, **({"cursor": cursor} if cursor else {})}
+        response = manager_client.get("/v1/campaigns/test-customer-0", params=params)
+        assert response.status_code == 200
+        assert len(response.json()) <= 1
+        page_ids += [item["id"] for item in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert page_ids == all_ids
+
+def test_list_campaigns_count(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    response = manager_client.get("/v1/campaigns/test-customer-0", params={"limit": 1, "count": "exact"})
+    all_campaigns = manager_client.get("/v1/campaigns/test-customer-0").json()
+    assert response.status_code == 200
+    assert int(response.headers["X-Total-Count"]) == len(all_campaigns)
+    response = manager_client.get("/v1/campaigns/test-customer-0", params={"limit": 1, "count": "estimated"})
+    assert response.status_code == 200
+    assert int(response.headers["X-Total-Count"]) >= 0
+
+def test_list_campaigns_invalid_cursor(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    response = manager_client.get("/v1/campaigns/test-customer-0", params={"cursor": "invalid"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor."
+
+def test_list_campaigns_tampered_cursor(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    cursor = manager_client.get("/v1/campaigns/test-customer-0", params={"limit": 1}).headers["X-Next-Cursor"]
+    values = json.loads(base64.urlsafe_b64decode(cursor))
+    for tampered_values in (values[:1], [*values, values[-1]]):
+        tampered_cursor = base64.urlsafe_b64encode(json.dumps(tampered_values).encode()).decode()
+        response = manager_client.get("/v1/campaigns/test-customer-0", params={"limit": 1, "cursor": tampered_cursor})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid pagination cursor."
+
+def test_list_campaigns_limit_too_large(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    response = manager_client.get("/v1/campaigns/test-customer-0", params={"limit": settings.PAGINATION_MAX_LIMIT + 1})
+    assert response.status_code == 422
+
+
+# Conditional requests tests
+def test_list_campaigns_if_none_match(auth_client, assert_max_queries) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    manager_client.get("/v1/campaigns/test-customer-0")
+    etag = manager_client.get("/v1/campaigns/test-customer-0").headers["ETag"]
+    with assert_max_queries(2) as stats:
+        response = manager_client.get("/v1/campaigns/test-customer-0", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert not any("FROM campaign_advertisements" in statement for statement in stats.statements)
+
+def test_list_campaigns_etag_changes(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    etag = manager_client.get("/v1/campaigns/test-customer-0").headers["ETag"]
+    manager_client.post("/v1/campaigns/test-customer-0/00000000-0000-0000-0000-000000000001/advertisements", json={"name": f"List ETag Advertisement {random.random()}"})
+    response = manager_client.get("/v1/campaigns/test-customer-0", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_list_campaigns_page_etag(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    first_page = manager_client.get("/v1/campaigns/test-customer-0", params={"limit": 1})
+    second_page = manager_client.get("/v1/campaigns/test-customer-0", params={"limit": 1, "cursor": first_page.headers["X-Next-Cursor"]})
+    assert first_page.headers["ETag"] != second_page.headers["ETag"]
+    response = manager_client.get("/v1/campaigns/test-customer-0", params={"limit": 1}, headers={"If-None-Match": first_page.headers["ETag"]})
+    assert response.status_code == 304
+
+
+# Query budget tests
+def test_list_campaigns_query_count(auth_client, assert_max_queries) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    with assert_max_queries(5, max_repeats=1):
+        response = manager_client.get("/v1/campaigns/test-customer-0")
+    assert response.status_code == 200
+    assert len(response.json()) >= 2
+
+def test_list_campaigns_cached_tenant(auth_client, assert_max_queries) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    manager_client.get("/v1/campaigns/test-customer-0")
+    with assert_max_queries(3) as stats:
+        response = manager_client.get("/v1/campaigns/test-customer-0")
+    assert response.status_code == 200
+    assert not any("FROM customers" in statement for statement in stats.statements)
+    assert not any("FROM user_customer_links" in statement for statement in stats.statements)
+
+
+# Response cache tests
+def test_list_campaigns_response_cache(auth_client, assert_max_queries, memory_response_cache) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    first_response = manager_client.get("/v1/campaigns/test-customer-0")
+    with assert_max_queries(2) as stats:
+        response = manager_client.get("/v1/campaigns/test-customer-0")
+    assert first_response.headers["X-Cache"] == "MISS"
+    assert response.headers["X-Cache"] == "HIT"
+    assert response.json() == first_response.json()
+    assert response.headers["ETag"] == first_response.headers["ETag"]
+    assert not any("FROM campaigns" in statement for statement in stats.statements)
+
+def test_list_campaigns_response_cache_if_none_match(auth_client, memory_response_cache) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    etag = manager_client.get("/v1/campaigns/test-customer-0").headers["ETag"]
+    response = manager_client.get("/v1/campaigns/test-customer-0", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["X-Cache"] == "HIT"
+
+def test_list_campaigns_response_cache_by_role(auth_client, memory_response_cache) -> None:
+    auth_client(UserRole.MANAGER).get("/v1/campaigns/test-customer-0")
+    response = auth_client(UserRole.ANALYST).get("/v1/campaigns/test-customer-0")
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "MISS"
+
+def test_list_campaigns_response_cache_invalidation(auth_client, memory_response_cache) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    manager_client.get("/v1/campaigns/test-customer-0")
+    campaign = manager_client.post("/v1/campaigns/test-customer-0", json={
+        "name": f"Response Cache Campaign {random.random()}",
+        "announcer": "Test Announcer",
+        "target_gender": "female",
+        "target_age_min": 18,
+        "target_age_max": 50,
+        "target_audience_size": 10000,
+        "start_date": "2022-01-01",
+        "end_date": "2022-02-01",
+    }).json()
+    response = manager_client.get("/v1/campaigns/test-customer-0")
+    assert response.headers["X-Cache"] == "MISS"
+    assert campaign["id"] in [item["id"] for item in response.json()]
+
+    manager_client.delete(f"/v1/campaigns/test-customer-0/{campaign['id']}")
+    response = manager_client.get("/v1/campaigns/test-customer-0")
+    assert response.headers["X-Cache"] == "MISS"
+    assert campaign["id"] not in [item["id"] for item in response.json()]
+
+def test_list_campaigns_stale_if_error(client, stateless_auth_token, memory_response_cache, database_unavailable, monkeypatch) -> None:
+    monkeypatch.setattr(memory_response_cache, "ttl", 0.01)
+    monkeypatch.setattr(memory_response_cache, "stale_ttl", 60)
+    manager_client = TestClient(client.app, headers={"Authorization": session_token(stateless_auth_token, UserRole.MANAGER, monkeypatch)})
+    first_response = manager_client.get("/v1/campaigns/test-customer-0")
+    time.sleep(0.02)
+
+    database_unavailable()
+    response = manager_client.get("/v1/campaigns/test-customer-0")
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "STALE"
+    assert response.json() == first_response.json()
+
+def test_list_campaigns_stale_if_error_without_session(auth_client, memory_response_cache, database_unavailable, monkeypatch) -> None:
+    monkeypatch.setattr(memory_response_cache, "stale_ttl", 60)
+    manager_client = auth_client(UserRole.MANAGER)
+    manager_client.get("/v1/campaigns/test-customer-0")
+
+    # Tokens without a session can't be checked against the revocations
+    database_unavailable()
+    response = manager_client.get("/v1/campaigns/test-customer-0")
+    assert response.status_code == 401
+    assert "X-Cache" not in response.headers
+
+def test_list_campaigns_stale_if_error_revoked_session(client, stateless_auth_token, memory_response_cache, database_unavailable, monkeypatch) -> None:
+    monkeypatch.setattr(memory_response_cache, "stale_ttl", 60)
+    token = session_token(stateless_auth_token, UserRole.MANAGER, monkeypatch)
+    manager_client = TestClient(client.app, headers={"Authorization": token})
+    manager_client.get("/v1/campaigns/test-customer-0")
+
+    token_data = decode_access_token(token.removeprefix("Bearer "))
+    revoke_sessions(token_data.sub, [token_data.sid])
+    database_unavailable()
+    response = manager_client.get("/v1/campaigns/test-customer-0")
+    assert response.status_code == 401
+    assert "X-Cache" not in response.headers
+
+def test_list_campaigns_stale_if_error_disabled(client, stateless_auth_token, memory_response_cache, database_unavailable, monkeypatch) -> None:
+    manager_client = TestClient(client.app, headers={"Authorization": session_token(stateless_auth_token, UserRole.MANAGER, monkeypatch)})
+    manager_client.get("/v1/campaigns/test-customer-0")
+
+    # Without a stale window the dependencies don't fall back to the token claims
+    database_unavailable()
+    with pytest.raises(OperationalError):
+        manager_client.get("/v1/campaigns/test-customer-0")
+
+def test_list_campaigns_stale_if_error_stateless(client, stateless_auth_token, memory_response_cache, database_unavailable, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "STATELESS_AUTH", True)
+    monkeypatch.setattr(settings, "REVOCATION_REFRESH_SECONDS", 0)
+    monkeypatch.setattr(memory_response_cache, "ttl", 0.01)
+    monkeypatch.setattr(memory_response_cache, "stale_ttl", 60)
+    _, token = stateless_auth_token(UserRole.MANAGER)
+    manager_client = TestClient(client.app, headers={"Authorization": token})
+    first_response = manager_client.get("/v1/campaigns/test-customer-0")
+    time.sleep(0.02)
+
+    database_unavailable()
+    response = manager_client.get("/v1/campaigns/test-customer-0")
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "STALE"
+    assert response.json() == first_response.json()
+
+def test_list_campaigns_database_unavailable(auth_client, memory_response_cache, database_unavailable) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    manager_client.get("/v1/campaigns/test-customer-0")
+    database_unavailable()
+    # Without a cached response the error is raised, the stale entries only cover cached requests
+    with pytest.raises(OperationalError):
+        manager_client.get("/v1/campaigns/test-customer-0?limit=1")
+
+
+# Stateless authorization tests
+def test_list_campaigns_stateless(client, stateless_auth_token, assert_max_queries, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "STATELESS_AUTH", True)
+    _, token = stateless_auth_token(UserRole.MANAGER)
+    manager_client = TestClient(client.app, headers={"Authorization": token})
+    manager_client.get("/v1/campaigns/test-customer-0")
+    with assert_max_queries(2) as stats:
+        response = manager_client.get("/v1/campaigns/test-customer-0")
+    assert response.status_code == 200
+    assert len(response.json()) >= 2
+    assert not any("FROM users" in statement or "FROM user_sessions" in statement for statement in stats.statements)
+
+def test_list_campaigns_stateless_not_authorized(client, stateless_auth_token, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "STATELESS_AUTH", True)
+    _, token = stateless_auth_token(UserRole.OPERATION)
+    response = TestClient(client.app, headers={"Authorization": token}).get("/v1/campaigns/test-customer-0")
+    assert response.status_code == 403
+    assert response.json()["detail"] == "The user is not allowed to perform this action."
+    response = TestClient(client.app, headers={"Authorization": token}).get("/v1/campaigns/test-customer-1")
+    assert response.status_code == 403
+    assert response.json()["detail"] == "The user has no access to this customer."
+
+def test_list_campaigns_stateless_revoked_session(db, client, stateless_auth_token, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "STATELESS_AUTH", True)
+    user, token = stateless_auth_token(UserRole.MANAGER)
+    revoke_user_sessions(session=db, user_id=user.id)
+    response = TestClient(client.app, headers={"Authorization": token}).get("/v1/campaigns/test-customer-0")
+    assert response.status_code == 401
+    assert response.json()["detail"] == "The user is not authenticated."
+
+def test_list_campaigns_stateless_revoked_by_other_process(db, client, stateless_auth_token, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "STATELESS_AUTH", True)
+    monkeypatch.setattr(settings, "REVOCATION_REFRESH_SECONDS", 0)
+    user, token = stateless_auth_token(UserRole.MANAGER)
+    stateless_client = TestClient(client.app, headers={"Authorization": token})
+    assert stateless_client.get("/v1/campaigns/test-customer-0").status_code == 200
+    user_session = db.exec(select(UserSession).where(UserSession.user_id == user.id)).first()
+    db.add(UserSessionRevocation(user_id=user.id, session_id=user_session.id))
+    db.commit()
+    response = stateless_client.get("/v1/campaigns/test-customer-0")
+    assert response.status_code == 401
+    assert response.json()["detail"] == "The user is not authenticated."
+
 
 # Authorization tests
 def test_non_authenticated_user(client) -> None:
@@ -83,3 +381,12 @@ def test_superuser(superuser_client) -> None:
     assert response.status_code == 200
     assert isinstance(response.json(), list)
     assert len(response.json()) > 0
+
+
+# Helper functions
+def session_token(stateless_auth_token, role: UserRole, monkeypatch) -> str:
+    """Access token carrying its user session, used with the role read from the database (STATELESS_AUTH off)."""
+    monkeypatch.setattr(settings, "STATELESS_AUTH", True)
+    _, token = stateless_auth_token(role)
+    monkeypatch.setattr(settings, "STATELESS_AUTH", False)
+    return token
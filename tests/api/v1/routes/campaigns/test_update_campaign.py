@@ -7,6 +7,8 @@ from app.models.campaign import Advertisement
 from app.schemas.campaigns import CampaignResponse, UpdateCampaign
 from app.crud.campaign import retrieve_customer_campaigns
 from app.crud.customer import get_customer_by_subdomain
+from app.crud.aio import campaign as campaign_crud
+from app.models import Campaign
 
 from fastapi.testclient import TestClient
 
@@ -73,6 +75,71 @@ def test_update_campaign_db(auth_client, db) -> None:
     assert campaign.target_audience_size == campaign_input["target_audience_size"] == content["target_audience_size"]
     assert campaign.end_date.isoformat() == campaign_input["end_date"] == content["end_date"]
 
+def test_update_campaign_updated_at_in_utc(auth_client, db, local_timezone_behind_utc) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    customer = get_customer_by_subdomain(session=db, customer_subdomain="test-customer-0")
+    campaign = next(campaign for campaign in retrieve_customer_campaigns(session=db, customer_id=customer.id) if campaign.name == "Test Campaign 1")
+    updated_at_before = campaign.updated_at
+    response = manager_client.put(UPDATE_CAMPAIGN_PATH(1), json=edit_campaign_input())
+    assert response.status_code == 200
+    db.refresh(campaign)
+    assert campaign.updated_at > updated_at_before
+    assert campaign.last_seen_at > updated_at_before
+
+def test_update_campaign_deleted_meanwhile(auth_client, db, monkeypatch) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    campaign = manager_client.post("/v1/campaigns/test-customer-0", json={
+        "name": f"Deleted Campaign {random.random()}",
+        "announcer": "Test Announcer",
+        "target_gender": "female",
+        "target_age_min": 18,
+        "target_age_max": 50,
+        "target_audience_size": 10000,
+        "start_date": "2022-01-01",
+        "end_date": "2022-02-01",
+    }).json()
+
+    # The campaign is deleted by another request between its read and its update
+    retrieve_campaign_by_id = campaign_crud.retrieve_campaign_by_id
+    async def retrieve_then_delete(**kwargs):
+        found = await retrieve_campaign_by_id(**kwargs)
+        db.delete(db.get(Campaign, uuid.UUID(campaign["id"])))
+        db.commit()
+        return found
+    monkeypatch.setattr(campaign_crud, "retrieve_campaign_by_id", retrieve_then_delete)
+
+    response = manager_client.put(f"/v1/campaigns/test-customer-0/{campaign['id']}", json=edit_campaign_input(campaign_id=campaign["id"]))
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Campaign not found."
+
+def test_update_campaign_advertisements_by_name(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    campaign_input = edit_campaign_input()
+    kept_ad, removed_ad = campaign_input["advertisements"][0], edit_campaign_input()["advertisements"][0]
+    campaign_input["advertisements"] = [kept_ad, removed_ad]
+    content = manager_client.put(UPDATE_CAMPAIGN_PATH(1), json=campaign_input).json()
+    kept_ad_id = next(ad["id"] for ad in content["advertisements"] if ad["name"] == kept_ad["name"])
+
+    kept_ad["budget"] = 500
+    campaign_input["advertisements"] = [kept_ad]
+    response = manager_client.put(UPDATE_CAMPAIGN_PATH(1), json=campaign_input)
+    content = response.json()
+    assert response.status_code == 200
+    assert [(ad["id"], ad["name"], ad["budget"]) for ad in content["advertisements"]] == [(kept_ad_id, kept_ad["name"], 500)]
+
+
+# Query budget tests
+def test_update_campaign_query_count(auth_client, assert_max_queries) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    campaign_input = edit_campaign_input()
+    campaign_input["advertisements"] = [edit_campaign_input()["advertisements"][0] for _ in range(50)]
+    manager_client.put(UPDATE_CAMPAIGN_PATH(1), json=campaign_input)
+    campaign_input["advertisements"] = campaign_input["advertisements"][10:] + [edit_campaign_input()["advertisements"][0] for _ in range(10)]
+    with assert_max_queries(5, max_repeats=1):
+        response = manager_client.put(UPDATE_CAMPAIGN_PATH(1), json=campaign_input)
+    assert response.status_code == 200
+    assert len(response.json()["advertisements"]) == 50
+
 
 # Authorization tests
 def test_non_authenticated_user(client) -> None:
@@ -83,6 +83,19 @@ def test_create_visitor_user(db, auth_client) -> None:
     assert content_2["detail"] == "Campaign not associated with the customer."
     assert response_3.status_code == 200
 
+def test_create_visitor_user_other_customer_campaign(db, auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    customer = get_customer_by_subdomain(session=db, customer_subdomain="test-customer-0")
+    campaigns = retrieve_customer_campaigns(session=db, customer_id=customer.id)
+    other_customer_campaign_id = "00000000-0000-0000-0000-000000001000"
+    assert other_customer_campaign_id not in [str(campaign.id) for campaign in campaigns]
+    user_input = create_user_input()
+    user_input["role"] = UserRole.VISITOR
+    user_input["campaign_ids"] = [str(campaigns[0].id), other_customer_campaign_id]
+    response = manager_client.post("/v1/users/test-customer-0", json=user_input)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Campaign not associated with the customer."
+
 
 # Integration tests
 def test_create_user_db(db, auth_client) -> None:
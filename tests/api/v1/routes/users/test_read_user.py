@@ -0,0 +1,53 @@
+from app.models.user import UserRole, SuperUserRole
+from app.schemas.users import UserResponse
+
+from fastapi.testclient import TestClient
+
+READ_USER_PATH = lambda id: f"/v1/users/test-customer-0/{id}"
+
+# Unit tests
+def test_read_user(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    user = manager_client.get("/v1/users/test-customer-0").json()[0]
+    response = manager_client.get(READ_USER_PATH(user["id"]))
+    content = response.json()
+    assert response.status_code == 200
+    assert UserResponse(**content)
+    assert content == user
+    assert response.headers["ETag"].startswith('W/"')
+    assert response.headers["Last-Modified"].endswith("GMT")
+
+def test_read_user_not_found(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    response = manager_client.get(READ_USER_PATH("00000000-0000-0000-0000-000000000404"))
+    assert response.status_code == 404
+    assert response.json()["detail"] == "User not found."
+
+
+# Conditional requests tests
+def test_read_user_if_none_match(auth_client) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    user = manager_client.get("/v1/users/test-customer-0").json()[0]
+    etag = manager_client.get(READ_USER_PATH(user["id"])).headers["ETag"]
+    response = manager_client.get(READ_USER_PATH(user["id"]), headers={"If-None-Match": f'"other", {etag}'})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+# Authorization tests
+def test_non_authenticated_user(client) -> None:
+    client = TestClient(client.app)
+    response = client.get(READ_USER_PATH("00000000-0000-0000-0000-000000000404"))
+    assert response.status_code == 401
+    assert response.json()["detail"] == "The user is not authenticated."
+
+def test_analyst_user(auth_client) -> None:
+    analyst_client = auth_client(UserRole.ANALYST)
+    response = analyst_client.get(READ_USER_PATH("00000000-0000-0000-0000-000000000404"))
+    assert response.status_code == 403
+    assert response.json()["detail"] == "The user is not allowed to perform this action."
+
+def test_superuser(superuser_client) -> None:
+    superuser_client = superuser_client(SuperUserRole.STAFF)
+    response = superuser_client.get(READ_USER_PATH("00000000-0000-0000-0000-000000000404"))
+    assert response.status_code == 404
@@ -16,6 +16,63 @@ def test_list_users(auth_client) -> None:
         assert set(UserResponse.model_fields.keys()).issubset(item.keys())
 
 
+# Pagination tests
+def test_list_users_pages(auth_client) -> None:
+    client = auth_client(UserRole.MANAGER)
+    all_ids = [item["id"] for item in client.get("/v1/users/test-customer-0").json()]
+    page_ids, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/v1/users/test-customer-0", params=params)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        page_ids += [item["id"] for item in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert page_ids == all_ids
+
+def test_list_users_count(auth_client) -> None:
+    client = auth_client(UserRole.MANAGER)
+    response = client.get("/v1/users/test-customer-0", params={"limit": 1, "count": "exact"})
+    all_users = client.get("/v1/users/test-customer-0").json()
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert int(response.headers["X-Total-Count"]) == len(all_users)
+
+def test_list_users_invalid_cursor(auth_client) -> None:
+    client = auth_client(UserRole.MANAGER)
+    response = client.get("/v1/users/test-customer-0", params={"cursor": "W10="})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor."
+
+
+# Conditional requests tests
+def test_list_users_if_none_match(auth_client) -> None:
+    client = auth_client(UserRole.MANAGER)
+    etag = client.get("/v1/users/test-customer-0").headers["ETag"]
+    response = client.get("/v1/users/test-customer-0", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+def test_list_users_etag_changes(auth_client, create_user) -> None:
+    client = auth_client(UserRole.MANAGER)
+    etag = client.get("/v1/users/test-customer-0").headers["ETag"]
+    create_user(UserRole.ANALYST)
+    response = client.get("/v1/users/test-customer-0", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+# Query budget tests
+def test_list_users_query_count(auth_client, assert_max_queries) -> None:
+    manager_client = auth_client(UserRole.MANAGER)
+    with assert_max_queries(4, max_repeats=1):
+        response = manager_client.get("/v1/users/test-customer-0")
+    assert response.status_code == 200
+    assert len(response.json()) >= 2
+
+
 # Authorization tests
 def test_non_authenticated_user(client) -> None:
     client = TestClient(client.app)
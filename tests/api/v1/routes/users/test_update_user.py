@@ -81,6 +81,16 @@ def test_update_user_db(db, auth_client) -> None:
     assert user.updated_at > date_before
 
 
+def test_update_user_updated_at_in_utc(db, auth_client, local_timezone_behind_utc) -> None:
+    user_id = UPDATE_USER_PATH.split("/")[-1]
+    manager_client = auth_client(UserRole.MANAGER)
+    manager_client.put(UPDATE_USER_PATH, json=update_user_input(UserRole.ANALYST))
+    customer = get_customer_by_subdomain(session=db, customer_subdomain="test-customer-0")
+    users = retrieve_users_by_customer_id(session=db, customer_id=customer.id)
+    user = next((user for user in users if str(user.id) == user_id), None)
+    assert user.updated_at > user.created_at
+
+
 # Authorization tests
 def test_non_authenticated_user(client) -> None:
     client = TestClient(client.app)
@@ -1,13 +1,17 @@
+import asyncio
 import pytest
 
 from datetime import date, timedelta
 from collections.abc import Generator
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models import User, UserCustomerLink, UserSession, SuperUserRole, UserRole
 from app.core import security
 from app.core.security.providers.email import generate_magic_link_token
 from app.crud.customer import get_customer_by_subdomain
 
+from .populate_db import MAGIC_LINK_TOKENS
 from .utils import random_string
 
 @pytest.fixture(scope="session")
@@ -23,11 +27,13 @@ def create_user(db) -> Generator[User, None, None]:
             superuser_role=superuser_role,
         )
         db.add(user)
+        magic_link_token = generate_magic_link_token(user.email, user.id)
+        MAGIC_LINK_TOKENS[security.hash_token(magic_link_token)] = magic_link_token
         db.add(UserSession(
             user_id=user.id,
-            refresh_token="token",
+            refresh_token_hash=security.hash_token(security.create_refresh_token(user.id)),
             expires_at=date.today() + timedelta(days=10),
-            magic_link_token=generate_magic_link_token(user.email),
+            magic_link_token_hash=security.hash_token(magic_link_token),
             magic_link_requested_at=date.today(),
             magic_link_expires_at=date.today() + timedelta(days=100),
         ))
@@ -62,3 +68,20 @@ def auth_token(create_user):
     return _auth_token
 
 
+
+
+@pytest.fixture(scope="session")
+def stateless_auth_token(create_user, db, async_engine):
+    """
+    Factory function to generate stateless JWT tokens (with authorization claims) for different roles.
+    """
+    async def _create_user_access_token(user: User, user_session: UserSession) -> str:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            return await security.create_user_access_token(session=session, user_id=user.id, user_session_id=user_session.id)
+
+    def _stateless_auth_token(role: UserRole, is_superuser: bool = False, superuser_role: SuperUserRole = None):
+        user = create_user(role, is_superuser, superuser_role)
+        user_session = db.exec(select(UserSession).where(UserSession.user_id == user.id)).first()
+        access_token = asyncio.run(_create_user_access_token(user, user_session))
+        return user, f"Bearer {access_token}"
+    return _stateless_auth_token
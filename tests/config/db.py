@@ -3,6 +3,8 @@ import pytest
 from collections.abc import Generator
 
 from sqlalchemy.future import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import SQLModel, create_engine
 
 from testcontainers.core.waiting_utils import wait_for_logs
@@ -52,3 +54,14 @@ def engine(postgres_container) -> Engine:
 
     return engine
 
+
+
+@pytest.fixture(scope="session")
+def async_engine(postgres_container, engine) -> AsyncEngine:
+    """
+    Create the async engine for the test session, on the database prepared by the sync engine
+    """
+    url = postgres_container.get_connection_url(driver="psycopg")
+
+    # The test client runs each request on its own event loop, so connections can't be pooled
+    return create_async_engine(url, echo=False, poolclass=NullPool)
@@ -6,7 +6,10 @@ from sqlmodel import Session as SQLSession
 
 from app.models import Customer, User, UserCustomerLink, UserSession, UserRole, Campaign
 from app.core.security.providers.email import generate_magic_link_token
-from app.core.security.token import create_refresh_token
+from app.core.security.token import create_refresh_token, hash_token
+
+# Raw magic link tokens of the test user sessions by hash
+MAGIC_LINK_TOKENS: dict[str, str] = {}
 
 def populate_test_db(engine) -> None:
     """
@@ -73,11 +76,13 @@ def create_users(session: SQLSession, customer_ids: List[UUID]) -> None:
     
     # Create test user-sessions
     for i in range(0, 10):
+        magic_link_token = generate_magic_link_token(f"test_user_{i}@email.com", get_user_id(i))
+        MAGIC_LINK_TOKENS[hash_token(magic_link_token)] = magic_link_token
         session.add(UserSession(
             user_id=get_user_id(i),
-            refresh_token=create_refresh_token(get_user_id(i)),
+            refresh_token_hash=hash_token(create_refresh_token(get_user_id(i))),
             expires_at=date.today() + timedelta(days=10),
-            magic_link_token=generate_magic_link_token(f"test_user_{i}@email.com"),
+            magic_link_token_hash=hash_token(magic_link_token),
             magic_link_requested_at=date.today(),
             magic_link_expires_at=date.today() + timedelta(days=100),
             is_revoked=i < 5,
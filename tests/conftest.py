@@ -1,16 +1,24 @@
+import time
+
+import psycopg
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlmodel import Session as SQLSession
+from sqlmodel.ext.asyncio.session import AsyncSession
 import pytest
 
 from collections.abc import Generator
+from contextlib import contextmanager
 
-from app.core.deps import get_db
+from app.core.deps import get_db, get_async_db
+from app.core.query_budget import QueryStats
+from app.core.response_cache import MemoryResponseCacheBackend, response_cache
 from app.models import UserRole, SuperUserRole
 from app.main import app
 
 # Database fixtures - DONT REMOVE
-from .config.db import postgres_container, engine
-from .config.auth import auth_token, create_user
+from .config.db import postgres_container, engine, async_engine
+from .config.auth import auth_token, create_user, stateless_auth_token
 # Database fixtures - DONT REMOVE
 
 
@@ -26,7 +34,7 @@ def db(engine) -> Generator[SQLSession, None, None]:
 
 # Clients
 @pytest.fixture(scope="session")
-def client(engine) -> Generator[TestClient, None, None]:
+def client(engine, async_engine) -> Generator[TestClient, None, None]:
     """
     Create a test client with an overridden database dependency
     """
@@ -35,8 +43,13 @@ def client(engine) -> Generator[TestClient, None, None]:
         with SQLSession(engine) as session:
             yield session
 
+    async def override_get_async_db():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
     # Apply override to main app
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
 
     # Apply override to each subapp
     # If you have multiple sub-apps, you should override them here as well
@@ -78,3 +91,67 @@ def superuser_client(client, auth_token) -> Generator[TestClient, None, None]:
     
     return _superuser_client
 
+
+
+# Query budget
+@pytest.fixture
+def assert_max_queries(engine, async_engine):
+    """
+    Asserts the maximum number of statements (and repeats of the same statement)
+    executed on the test database within the block.
+    """
+    @contextmanager
+    def _assert_max_queries(max_queries: int, max_repeats: int | None = None):
+        stats = QueryStats(max_queries=max_queries, max_repeats=max_repeats)
+
+        def record(_conn, _cursor, statement, _parameters, _context, _executemany):
+            stats.record(statement, 0.0)
+
+        engines = [engine, async_engine.sync_engine]
+        for test_engine in engines:
+            event.listen(test_engine, "after_cursor_execute", record)
+        try:
+            yield stats
+        finally:
+            for test_engine in engines:
+                event.remove(test_engine, "after_cursor_execute", record)
+
+        assert not stats.problems(), stats.summary()
+
+    return _assert_max_queries
+
+
+# Response cache
+@pytest.fixture
+def memory_response_cache(monkeypatch):
+    """
+    Enables the response cache on a new in-process backend, the stand-in of the shared backend.
+    """
+    monkeypatch.setattr(response_cache, "backend", MemoryResponseCacheBackend(max_size=128, ttl=60))
+    monkeypatch.setattr(response_cache, "ttl", 60)
+    return response_cache
+
+
+# Database failures
+@pytest.fixture
+def database_unavailable(async_engine, monkeypatch):
+    """Returns a function making every new connection of the test engine fail, as when the database is unreachable."""
+    def _database_unavailable() -> None:
+        def refuse_connection():
+            raise psycopg.OperationalError("connection refused")
+        monkeypatch.setattr(async_engine.sync_engine, "raw_connection", refuse_connection)
+    return _database_unavailable
+
+
+# Time zone
+@pytest.fixture
+def local_timezone_behind_utc(monkeypatch):
+    """
+    Runs the test in a local time zone 3 hours behind UTC, as on hosts whose clock isn't in UTC.
+    Timestamps are stored in UTC, naive local times would move them backwards.
+    """
+    monkeypatch.setenv("TZ", "America/Sao_Paulo")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
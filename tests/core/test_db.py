@@ -0,0 +1,41 @@
+import threading
+import time
+
+from sqlalchemy import text
+from sqlmodel import create_engine
+
+from app.core.db import PoolStats, TimedNullPool, TimedQueuePool, get_engine_options
+
+
+# Unit tests
+def test_lambda_mode_sync_engine_does_not_pool() -> None:
+    assert get_engine_options("lambda")["poolclass"] is TimedNullPool
+    assert get_engine_options("lambda", is_async=True)["pool_size"] == 1
+
+def test_server_mode_pools() -> None:
+    options = get_engine_options("server")
+    assert options["poolclass"] is TimedQueuePool
+    assert options["pool_size"] == 5
+
+
+# Integration tests
+def test_pool_stats_checkout_wait(postgres_container) -> None:
+    engine = create_engine(postgres_container.get_connection_url(), poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=5)
+    stats = PoolStats()
+    stats.register(engine)
+
+    # The second checkout queues until the first connection is returned to the pool
+    connection = engine.connect()
+    def release() -> None:
+        time.sleep(0.2)
+        connection.close()
+    threading.Thread(target=release).start()
+    with engine.connect() as queued_connection:
+        queued_connection.execute(text("SELECT 1"))
+
+    pool_stats = stats.as_dict(engine)
+    engine.dispose()
+    assert pool_stats["checkouts"] == 2
+    assert pool_stats["connects"] == 1
+    assert pool_stats["checkout_wait_max_ms"] >= 150
+    assert pool_stats["connect_wait_max_ms"] < pool_stats["checkout_wait_max_ms"]
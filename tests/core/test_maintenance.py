@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+from app.core import security
+from app.core.maintenance import run_maintenance
+from app.models.user import UserRole, UserSession, UserSessionRevocation
+
+
+# Integration tests
+def test_maintenance_prunes_old_sessions(db, create_user) -> None:
+    user = create_user(UserRole.MANAGER)
+    long_ago = datetime.now(timezone.utc) - timedelta(days=60)
+    expired_session = create_session(user_id=user.id, expires_at=long_ago, last_used=long_ago)
+    revoked_session = create_session(user_id=user.id, expires_at=datetime.now(timezone.utc) + timedelta(days=10), last_used=long_ago, is_revoked=True)
+    recently_revoked_session = create_session(user_id=user.id, expires_at=datetime.now(timezone.utc) + timedelta(days=10), last_used=datetime.now(timezone.utc), is_revoked=True)
+    revocation = UserSessionRevocation(user_id=user.id, session_id=revoked_session.id, revoked_at=long_ago)
+    db.add_all([expired_session, revoked_session, recently_revoked_session, revocation])
+    db.commit()
+    expired_session_id, revoked_session_id, recently_revoked_session_id, revocation_id = expired_session.id, revoked_session.id, recently_revoked_session.id, revocation.id
+
+    result = run_maintenance(session=db)
+    assert result["pruned_sessions"] >= 2
+    assert result["pruned_revocations"] >= 1
+
+    db.expire_all()
+    assert db.get(UserSession, expired_session_id) is None
+    assert db.get(UserSession, revoked_session_id) is None
+    assert db.get(UserSession, recently_revoked_session_id) is not None
+    assert db.get(UserSessionRevocation, revocation_id) is None
+
+def test_maintenance_keeps_active_sessions(db, create_user) -> None:
+    user = create_user(UserRole.MANAGER)
+    active_session_ids = [user_session.id for user_session in user.sessions]
+    run_maintenance(session=db)
+    db.expire_all()
+    assert all(db.get(UserSession, session_id) is not None for session_id in active_session_ids)
+
+
+# Helper functions
+def create_session(*, user_id, expires_at: datetime, last_used: datetime, is_revoked: bool = False) -> UserSession:
+    return UserSession(
+        user_id=user_id,
+        refresh_token_hash=security.hash_token(security.create_refresh_token(user_id)),
+        expires_at=expires_at,
+        last_used=last_used,
+        is_revoked=is_revoked,
+    )
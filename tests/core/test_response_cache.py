@@ -0,0 +1,129 @@
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+import pytest
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from app.core import response_cache as response_cache_module
+from app.core.response_cache import DynamoDBResponseCacheBackend, MemoryResponseCacheBackend, response_cache
+from app.models.user import UserRole
+
+
+class FakeDynamoDBTable:
+    """
+    In-memory stand-in of a DynamoDB table resource. Items go through the boto3 (de)serializers, as
+    on the wire: bytes come back as Binary and numbers as Decimal.
+    """
+    def __init__(self) -> None:
+        self.items: dict[str, dict] = {}
+        self.consistent_reads = 0
+        self._serializer = TypeSerializer()
+        self._deserializer = TypeDeserializer()
+
+    def get_item(self, Key: dict, ConsistentRead: bool = False) -> dict:
+        self.consistent_reads += ConsistentRead
+        item = self.items.get(Key["key"])
+        return {"Item": {name: self._deserializer.deserialize(value) for name, value in item.items()}} if item else {}
+
+    def put_item(self, Item: dict) -> dict:
+        self.items[Item["key"]] = {name: self._serializer.serialize(value) for name, value in Item.items()}
+        return {}
+
+    def update_item(self, Key: dict, UpdateExpression: str, ExpressionAttributeNames: dict, ExpressionAttributeValues: dict) -> dict:
+        action, name, value = UpdateExpression.split()
+        assert action == "ADD"
+        item = self.get_item(Key).get("Item", {"key": Key["key"]})
+        attribute = ExpressionAttributeNames[name]
+        item[attribute] = item.get(attribute, 0) + ExpressionAttributeValues[value]
+        self.put_item(item)
+        return {}
+
+
+@pytest.fixture
+def dynamodb_table(monkeypatch):
+    """Points the DynamoDB backends to a new fake table."""
+    table = FakeDynamoDBTable()
+    session = SimpleNamespace(resource=lambda _service, endpoint_url=None: SimpleNamespace(Table=lambda _name: table))
+    monkeypatch.setattr(response_cache_module, "get_aws_session", lambda: session)
+    return table
+
+
+# Memory backend tests
+def test_memory_backend_entries() -> None:
+    backend = MemoryResponseCacheBackend(max_size=2, ttl=60)
+    asyncio.run(backend.set("first", b"1", ttl=60))
+    asyncio.run(backend.set("second", b"2", ttl=60))
+    asyncio.run(backend.set("expired", b"3", ttl=0))
+    assert asyncio.run(backend.get("first")) == b"1"
+    assert asyncio.run(backend.get("expired")) is None
+    asyncio.run(backend.set("third", b"3", ttl=60))
+    assert asyncio.run(backend.get("second")) is None
+
+def test_memory_backend_bump_version() -> None:
+    backend = MemoryResponseCacheBackend(max_size=2, ttl=60)
+    version = asyncio.run(backend.get_version("customer:1"))
+    assert asyncio.run(backend.get_version("customer:1")) == version
+    asyncio.run(backend.bump_version("customer:1"))
+    assert asyncio.run(backend.get_version("customer:1")) != version
+    assert asyncio.run(backend.get_version("customer:2")) != version
+
+def test_memory_backend_versions_bounded() -> None:
+    backend = MemoryResponseCacheBackend(max_size=2, ttl=60)
+    asyncio.run(backend.bump_version("customer:1"))
+    versions = [asyncio.run(backend.get_version(f"customer:{i}")) for i in range(1, 10)]
+    assert backend._versions.stats()["size"] == 2
+    # A scope evicted from the versions never gets back a version of its previous entries
+    assert asyncio.run(backend.get_version("customer:1")) not in versions
+
+
+# DynamoDB backend tests
+def test_dynamodb_backend_entries(dynamodb_table) -> None:
+    backend = DynamoDBResponseCacheBackend(table_name="response-cache")
+    asyncio.run(backend.set("first", b"1", ttl=60))
+    assert asyncio.run(backend.get("first")) == b"1"
+    assert asyncio.run(backend.get("missing")) is None
+    assert dynamodb_table.items["first"]["expires_at"]["N"] == str(int(time.time() + 60) + 1)
+
+def test_dynamodb_backend_expired_entry(dynamodb_table) -> None:
+    backend = DynamoDBResponseCacheBackend(table_name="response-cache")
+    asyncio.run(backend.set("expired", b"1", ttl=60))
+    dynamodb_table.items["expired"]["expires_at"] = {"N": str(int(time.time()) - 1)}
+    # Expired items are still returned by DynamoDB until they are deleted
+    assert asyncio.run(backend.get("expired")) is None
+
+def test_dynamodb_backend_bump_version(dynamodb_table) -> None:
+    backend = DynamoDBResponseCacheBackend(table_name="response-cache")
+    assert asyncio.run(backend.get_version("customer:1")) == 0
+    asyncio.run(backend.bump_version("customer:1"))
+    asyncio.run(backend.bump_version("customer:1"))
+    assert asyncio.run(backend.get_version("customer:1")) == 2
+    assert asyncio.run(backend.get_version("customer:2")) == 0
+    assert dynamodb_table.consistent_reads == 3
+
+def test_dynamodb_backend_responses(auth_client, dynamodb_table, monkeypatch) -> None:
+    monkeypatch.setattr(response_cache, "backend", DynamoDBResponseCacheBackend(table_name="response-cache"))
+    monkeypatch.setattr(response_cache, "ttl", 60)
+    manager_client = auth_client(UserRole.MANAGER)
+    first_response = manager_client.get("/v1/campaigns/test-customer-0")
+    response = manager_client.get("/v1/campaigns/test-customer-0")
+    assert first_response.headers["X-Cache"] == "MISS"
+    assert response.headers["X-Cache"] == "HIT"
+    assert response.json() == first_response.json()
+    assert response.headers["ETag"] == first_response.headers["ETag"]
+
+    # Writes of any process bump the version stored in the table
+    campaign = manager_client.post("/v1/campaigns/test-customer-0", json={
+        "name": f"DynamoDB Response Cache Campaign {random.random()}",
+        "announcer": "Test Announcer",
+        "target_gender": "female",
+        "target_age_min": 18,
+        "target_age_max": 50,
+        "target_audience_size": 10000,
+        "start_date": "2022-01-01",
+        "end_date": "2022-02-01",
+    }).json()
+    response = manager_client.get("/v1/campaigns/test-customer-0")
+    assert response.headers["X-Cache"] == "MISS"
+    assert campaign["id"] in [item["id"] for item in response.json()]